@@ -0,0 +1,60 @@
+"""
+Compare creating proxies one at a time with ProxyManager.create() against
+a single batched ProxyManager.create_many() call.
+
+Usage: python benchmarks/create_many.py [count]
+"""
+
+import sys
+import time
+
+from trame_simput.core.proxy import ProxyManager
+
+MODEL = """
+Material:
+  Name:
+    type: string
+    initial: steel
+  Density:
+    type: float64
+    initial: 7.8
+  Color:
+    type: float64
+    size: 3
+    initial: [0.5, 0.5, 0.5]
+  Opacity:
+    type: float64
+    initial: 1
+    domains:
+      - type: Range
+        value_range: [0, 1]
+        level: 2
+"""
+
+
+def create_manager():
+    pxm = ProxyManager()
+    pxm.load_model(yaml_content=MODEL)
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append(topic))
+    return pxm, events
+
+
+def main(count=10000):
+    pxm, events = create_manager()
+    t0 = time.perf_counter()
+    for _ in range(count):
+        pxm.create("Material")
+    single = time.perf_counter() - t0
+    print(f"create() x {count}: {single:.3f}s ({len(events)} events)")
+
+    pxm, events = create_manager()
+    t0 = time.perf_counter()
+    pxm.create_many("Material", count)
+    batch = time.perf_counter() - t0
+    print(f"create_many({count}): {batch:.3f}s ({len(events)} events)")
+    print(f"speedup: {single / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+Measure the memory retained by each proxy instance.
+
+Usage: python benchmarks/proxy_memory.py [count]
+"""
+
+import sys
+import gc
+import tracemalloc
+
+from trame_simput.core.proxy import ProxyManager
+
+MODEL = """
+Point:
+  X:
+    type: float64
+    initial: 0
+  Y:
+    type: float64
+    initial: 0
+  Z:
+    type: float64
+    initial: 0
+  Label:
+    type: string
+    initial: point
+  Weight:
+    type: float64
+    initial: 1
+    domains:
+      - type: Range
+        value_range: [0, 1]
+        level: 2
+"""
+
+
+def main(count=50000):
+    pxm = ProxyManager()
+    pxm.load_model(yaml_content=MODEL)
+
+    # Warm up so shared/class level allocations are not accounted for
+    pxm.create("Point")
+
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    for _ in range(count):
+        pxm.create("Point")
+    gc.collect()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"proxies: {count}")
+    print(f"bytes per proxy: {(end - start) / count:.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,106 @@
+"""
+Compare the size and speed of the JSON and binary snapshot formats.
+
+Usage: python benchmarks/snapshot.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from trame_simput.core.proxy import ProxyManager
+
+MODEL = """
+Item:
+  Name:
+    type: string
+    initial: item
+  Opacity:
+    type: float64
+    initial: 0.5
+  Count:
+    type: int32
+    initial: 1
+  Color:
+    type: float64
+    size: 3
+    initial: [1, 1, 1]
+  Points:
+    type: float32
+    array: true
+  Child:
+    type: proxy
+"""
+
+
+def create_manager():
+    pxm = ProxyManager()
+    pxm.load_model(yaml_content=MODEL)
+    return pxm
+
+
+def populate(pxm, count, array_size):
+    previous = None
+    for i in range(count):
+        proxy = pxm.create(
+            "Item",
+            Name=f"item {i}",
+            Opacity=(i % 100) / 100,
+            Count=i,
+            Points=[float(v) for v in range(array_size)],
+        )
+        proxy.Child = previous
+        previous = proxy
+    pxm.commit_all()
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(count, array_size, directory):
+    pxm = create_manager()
+    populate(pxm, count, array_size)
+
+    json_path = os.path.join(directory, "state.json")
+    bin_path = os.path.join(directory, "state.simput")
+    cases = [
+        (
+            "json",
+            json_path,
+            lambda: pxm.save(json_path),
+            lambda dst: dst.load(json_path),
+        ),
+        (
+            "json (restore)",
+            json_path,
+            lambda: pxm.save(json_path),
+            lambda dst: dst.load(json_path, restore=True, keep_ids=True),
+        ),
+        (
+            "snapshot",
+            bin_path,
+            lambda: pxm.save_snapshot(bin_path),
+            lambda dst: dst.load_snapshot(bin_path, keep_ids=True),
+        ),
+    ]
+
+    print(f"{count} proxies with arrays of {array_size} float32")
+    for name, path, save, load in cases:
+        _, save_time = measure(save)
+        _, load_time = measure(lambda: load(create_manager()))
+        size = os.path.getsize(path) / 1e6
+        print(
+            f"  {name:<16} {size:8.2f} MB"
+            f"  save {save_time:6.3f}s  load {load_time:6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        for array_size in (0, 1000):
+            run(count, array_size, directory)
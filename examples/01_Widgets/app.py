@@ -97,7 +97,7 @@ with SinglePageLayout(server) as layout:
             hide_details=True,
         )
         vuetify.VCheckbox(
-            v_model=("showChangeSet", False),
+            v_model=("simputChangeSetWatch", False),
             on_icon="mdi-bug",
             off_icon="mdi-shield-bug-outline",
             classes="mx-1",
@@ -147,7 +147,7 @@ with SinglePageLayout(server) as layout:
 
     with layout.content:
         with vuetify.VContainer(fluid=True, v_if="active"):
-            html.Pre("{{ simputChangeSetContent }}", v_if="showChangeSet")
+            html.Pre("{{ simputChangeSetContent }}", v_if="simputChangeSetWatch")
             simput.SimputItem(
                 item_id="active",
             )
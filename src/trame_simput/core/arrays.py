@@ -0,0 +1,260 @@
+import sys
+import array
+import base64
+import hashlib
+import logging
+
+logger = logging.getLogger("simput.core.arrays")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# Supported data types
+# -----------------------------------------------------------------------------
+
+TYPECODES = {
+    "int8": "b",
+    "uint8": "B",
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "int64": "q",
+    "uint64": "Q",
+    "float32": "f",
+    "float64": "d",
+}
+
+DEFAULT_DTYPE = "float64"
+
+# -----------------------------------------------------------------------------
+# TypedArray
+# -----------------------------------------------------------------------------
+
+
+class TypedArray:
+    """
+    Immutable and contiguous array of numbers of a given dtype.
+
+    TypedArray is used to store the value of properties flagged with
+    `array: true` in their definition. The values live in a single buffer
+    (array.array or a memoryview when created with from_buffer()) rather than
+    a list of Python objects which allows them to be
+    compared through a digest of that buffer and to be sent as-is over the
+    network.
+
+    Since the content is never modified in place, the same TypedArray can be
+    shared between the current and committed values of a proxy.
+    """
+
+    __slots__ = ("_dtype", "_data", "_digest")
+
+    def __init__(self, values=(), dtype=DEFAULT_DTYPE):
+        if dtype not in TYPECODES:
+            raise ValueError(f"Invalid dtype '{dtype}' for TypedArray")
+
+        typecode = TYPECODES[dtype]
+        self._dtype = dtype
+        self._digest = None
+
+        if isinstance(values, TypedArray):
+            if values._dtype == dtype:
+                self._data = values._data
+                self._digest = values._digest
+            else:
+                self._data = _from_values(typecode, values._data)
+        elif isinstance(values, (bytes, bytearray, memoryview)):
+            self._data = _from_bytes(typecode, values)
+        elif isinstance(values, array.array) and values.typecode == typecode:
+            self._data = array.array(typecode, values)
+        elif hasattr(values, "__array__"):
+            # numpy (or alike) array => single copy of its buffer
+            self._data = array.array(typecode)
+            self._data.frombytes(_numpy().asarray(values, dtype=dtype).tobytes())
+        else:
+            self._data = _from_values(typecode, values)
+
+    @classmethod
+    def from_buffer(cls, buffer, dtype=DEFAULT_DTYPE):
+        """
+        Create a TypedArray using a little-endian buffer (bytes, mmap, ...)
+        as storage without copying it. The content of the buffer must not
+        change during the lifetime of the array.
+        """
+        if dtype not in TYPECODES:
+            raise ValueError(f"Invalid dtype '{dtype}' for TypedArray")
+
+        if not _LITTLE_ENDIAN:
+            return cls(buffer, dtype)
+
+        result = cls.__new__(cls)
+        result._dtype = dtype
+        result._digest = None
+        result._data = memoryview(buffer).cast("B").cast(TYPECODES[dtype])
+        return result
+
+    @property
+    def dtype(self):
+        """Name of the type of the values (float32, int64, ...)"""
+        return self._dtype
+
+    @property
+    def nbytes(self):
+        """Size of the array in bytes"""
+        return len(self._data) * self._data.itemsize
+
+    @property
+    def buffer(self):
+        """Read-only view over the content of the array (no copy)"""
+        return memoryview(self._data).toreadonly()
+
+    @property
+    def digest(self):
+        """Hash of the content of the array, computed once"""
+        if self._digest is None:
+            self._digest = hashlib.blake2b(
+                self._data, digest_size=16, person=self._dtype.encode()
+            ).digest()
+        return self._digest
+
+    def tolist(self):
+        """Return the values as a list of Python numbers"""
+        return self._data.tolist()
+
+    def tobytes(self):
+        """Return a copy of the content of the array as little-endian bytes"""
+        return _to_bytes(self._data)
+
+    def numpy(self):
+        """Return a read-only numpy array sharing the memory of that array"""
+        return _numpy().frombuffer(self.buffer, dtype=self._dtype)
+
+    def to_state(self):
+        """Return a JSON serializable representation of the array"""
+        return {
+            "dtype": self._dtype,
+            "base64": base64.b64encode(_to_bytes(self._data)).decode("ascii"),
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._data[key].tolist()
+        return self._data[key]
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, TypedArray):
+            return (
+                self._dtype == other._dtype
+                and len(self._data) == len(other._data)
+                and self.digest == other.digest
+            )
+        if isinstance(other, (list, tuple)):
+            return len(self._data) == len(other) and self._data.tolist() == list(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"TypedArray(dtype={self._dtype}, size={len(self._data)})"
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+
+# Raw buffers (network, files) are little-endian to match browser typed arrays
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+_INTEGER_TYPECODES = "bBhHiIqQ"
+
+
+def _from_values(typecode, values):
+    try:
+        return array.array(typecode, values)
+    except TypeError:
+        if typecode not in _INTEGER_TYPECODES:
+            raise
+        # floats into an integer dtype get truncated
+        return array.array(typecode, (int(value) for value in values))
+
+
+def _from_bytes(typecode, content):
+    data = array.array(typecode)
+    data.frombytes(memoryview(content).cast("B"))
+    if not _LITTLE_ENDIAN:
+        data.byteswap()
+    return data
+
+
+def _to_bytes(data):
+    if _LITTLE_ENDIAN:
+        return data.tobytes()
+    swapped = array.array(data.typecode, data)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _numpy():
+    import numpy
+
+    return numpy
+
+
+def to_typed_array(value, dtype=DEFAULT_DTYPE):
+    """
+    Convert a value into a TypedArray of the given dtype.
+    The value can be a TypedArray, a list/tuple of numbers, a numpy array,
+    a buffer or a serialized array ({dtype, base64} or {dtype, buffer}).
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, TypedArray):
+        if value.dtype == dtype:
+            return value
+        return TypedArray(value, dtype)
+
+    if isinstance(value, dict):
+        src_dtype = value.get("dtype", dtype)
+        if "base64" in value:
+            content = TypedArray(base64.b64decode(value["base64"]), src_dtype)
+        else:
+            content = TypedArray(value.get("buffer", b""), src_dtype)
+        return to_typed_array(content, dtype)
+
+    return TypedArray(value, dtype)
+
+
+def json_default(obj):
+    """Serializer for json.dump(s) handling TypedArray"""
+    if isinstance(obj, TypedArray):
+        return obj.to_state()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_properties(properties):
+    """
+    Return a copy of a properties dict where the TypedArray got replaced by
+    {dtype, buffer} so their memory can be sent as binary without copy.
+    """
+    if properties is None:
+        return properties
+
+    result = None
+    for name, value in properties.items():
+        if isinstance(value, TypedArray):
+            if result is None:
+                result = dict(properties)
+            buffer = value.buffer if _LITTLE_ENDIAN else value.tobytes()
+            result[name] = {"dtype": value.dtype, "buffer": buffer}
+
+    return properties if result is None else result
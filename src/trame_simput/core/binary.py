@@ -0,0 +1,268 @@
+import array
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from .arrays import TYPECODES, TypedArray, _LITTLE_ENDIAN
+
+logger = logging.getLogger("simput.core.binary")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# File layout
+# -----------------------------------------------------------------------------
+#  MAGIC (8 bytes)
+#  header size (uint64 little-endian)
+#  header (JSON utf-8)
+#  buffers (each one aligned on ALIGNMENT bytes, offsets are relative to the
+#           end of the header padded to ALIGNMENT bytes)
+# -----------------------------------------------------------------------------
+#  header = {
+#    "version": 1,
+#    "model": {...},
+#    "count": 3,
+#    "buffers": [[offset, nbytes], ...],
+#    "types": {
+#      "Item": {
+#        "ids": ["1", "2"],
+#        "names": null,                  # or one name per proxy
+#        "tags": null,                   # or one list of tags per proxy
+#        "own": null,                    # or one list of ids per proxy
+#        "properties": ["Opacity", "Points", "Child"],
+#        "columns": [
+#          {"dtype": "float64", "buffer": 0},   # numbers as one buffer
+#          [{"dtype": "float32", "buffer": 1}], # arrays as one buffer each
+#          ["3", null],                         # anything else as JSON
+#        ],
+#      },
+#    },
+#  }
+# -----------------------------------------------------------------------------
+
+MAGIC = b"SIMPUT\x00\x01"
+VERSION = 1
+ALIGNMENT = 64
+
+_INT64_RANGE = (-(2**63), 2**63 - 1)
+
+# -----------------------------------------------------------------------------
+# Writer
+# -----------------------------------------------------------------------------
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+class _Buffers:
+    """Internal helper to keep track of the raw buffers to write"""
+
+    def __init__(self):
+        self.buffers = []
+        self.size = 0
+
+    def add(self, content):
+        content = memoryview(content).cast("B")
+        self.size += _padding(self.size)
+        self.buffers.append((self.size, content))
+        self.size += content.nbytes
+        return len(self.buffers) - 1
+
+
+def _numbers_dtype(values):
+    """Return the dtype to use for a column of numbers or None"""
+    if not values:
+        return None
+
+    value_type = type(values[0])
+    if value_type not in (int, float):
+        return None
+    for value in values:
+        if type(value) is not value_type:
+            return None
+
+    if value_type is int:
+        if min(values) < _INT64_RANGE[0] or max(values) > _INT64_RANGE[1]:
+            return None
+        return "int64"
+
+    return "float64"
+
+
+def _column(values, buffers):
+    dtype = _numbers_dtype(values)
+    if dtype is not None:
+        content = array.array(TYPECODES[dtype], values)
+        if not _LITTLE_ENDIAN:
+            content.byteswap()
+        return {"dtype": dtype, "buffer": buffers.add(content)}
+
+    column = []
+    for value in values:
+        if isinstance(value, TypedArray):
+            content = value.buffer if _LITTLE_ENDIAN else value.tobytes()
+            value = {"dtype": value.dtype, "buffer": buffers.add(content)}
+        column.append(value)
+    return column
+
+
+def _optional(values, default):
+    """Only keep the list of values if one of them is not the default one"""
+    for value in values:
+        if value != default:
+            return values
+    return None
+
+
+def write_snapshot(proxy_manager, file_output):
+    """
+    Write the definitions and proxies of a ProxyManager into a binary file.
+    Return the header of the written file.
+    """
+    buffers = _Buffers()
+    types = {}
+    count = 0
+    for proxy_type, proxies in proxy_manager._type_map.items():
+        proxies = list(proxies.values())
+        if not proxies:
+            continue
+
+        count += len(proxies)
+        names = proxies[0]._schema.names
+        types[proxy_type] = {
+            "ids": [proxy._id for proxy in proxies],
+            "names": _optional([proxy._name for proxy in proxies], proxy_type),
+            "tags": _optional([sorted(proxy._tags or ()) for proxy in proxies], []),
+            "own": _optional([sorted(proxy._own or ()) for proxy in proxies], []),
+            "properties": list(names),
+            "columns": [
+                _column([proxy._values[idx] for proxy in proxies], buffers)
+                for idx in range(len(names))
+            ],
+        }
+
+    header = {
+        "version": VERSION,
+        "model": proxy_manager._model_definition,
+        "count": count,
+        "types": types,
+    }
+
+    header["buffers"] = [
+        [offset, content.nbytes] for offset, content in buffers.buffers
+    ]
+    header_content = json.dumps(header).encode("utf-8")
+
+    # The file may still be memory mapped by the proxies loaded from it so
+    # it get replaced rather than truncated
+    path = Path(file_output)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as output:
+            output.write(MAGIC)
+            output.write(struct.pack("<Q", len(header_content)))
+            output.write(header_content)
+            output.write(b"\0" * _padding(len(MAGIC) + 8 + len(header_content)))
+            position = 0
+            for offset, content in buffers.buffers:
+                output.write(b"\0" * (offset - position))
+                output.write(content)
+                position = offset + content.nbytes
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return header
+
+
+# -----------------------------------------------------------------------------
+# Reader
+# -----------------------------------------------------------------------------
+
+
+class Snapshot:
+    """
+    Content of a binary snapshot file. The arrays keep using the file content
+    (memory mapped or not) so no copy of their values is made.
+    """
+
+    def __init__(self, content):
+        if bytes(content[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Invalid simput snapshot file")
+
+        start = len(MAGIC) + 8
+        (size,) = struct.unpack("<Q", content[len(MAGIC) : start])
+        if start + size > len(content):
+            raise ValueError("Truncated simput snapshot file")
+        self.header = json.loads(bytes(content[start : start + size]))
+        self._start = start + size + _padding(start + size)
+        if self.header.get("version") != VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {self.header.get('version')}"
+            )
+        self._content = memoryview(content)
+
+    @property
+    def model(self):
+        return self.header["model"]
+
+    @property
+    def count(self):
+        return self.header["count"]
+
+    def _buffer(self, idx):
+        offset, size = self.header["buffers"][idx]
+        offset += self._start
+        if offset + size > len(self._content):
+            raise ValueError("Truncated simput snapshot file")
+        return self._content[offset : offset + size]
+
+    def _column(self, column):
+        if isinstance(column, dict):
+            content = self._buffer(column["buffer"])
+            return TypedArray.from_buffer(content, column["dtype"]).tolist()
+
+        return [
+            TypedArray.from_buffer(self._buffer(v["buffer"]), v["dtype"])
+            if isinstance(v, dict)
+            else v
+            for v in column
+        ]
+
+    def proxy_states(self):
+        """Yield the state of each proxy (see Proxy.state)"""
+        for proxy_type, content in self.header["types"].items():
+            names = content["properties"]
+            columns = [self._column(column) for column in content["columns"]]
+            proxy_names = content["names"]
+            tags = content["tags"]
+            own = content["own"]
+            for i, proxy_id in enumerate(content["ids"]):
+                yield {
+                    "id": proxy_id,
+                    "type": proxy_type,
+                    "name": proxy_names[i] if proxy_names else proxy_type,
+                    "tags": tags[i] if tags else [],
+                    "own": own[i] if own else [],
+                    "properties": {
+                        name: column[i] for name, column in zip(names, columns)
+                    },
+                }
+
+
+def read_snapshot(file_input, memory_map=True):
+    """
+    Open a binary snapshot file. With memory_map=True the file get memory
+    mapped and the arrays of the restored proxies directly use it.
+    """
+    with open(file_input, "rb") as file:
+        if memory_map:
+            content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            content = file.read()
+
+    return Snapshot(content)
@@ -0,0 +1,631 @@
+import logging
+
+from . import arrays, utils
+
+logger = logging.getLogger("simput.core.branches")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# Copy-on-write
+# -----------------------------------------------------------------------------
+#  A snapshot does not copy anything when created. Instead, the live proxies
+#  hand their current state to the snapshots still alive right before being
+#  modified or deleted (see Proxy._preserve) and the ids of the proxies created
+#  afterward are recorded as missing. Reading a proxy from a snapshot therefore
+#  either hit that preserved state or the live proxy which did not change.
+#
+#  A branch sits on top of a snapshot and only copies the proxies it modifies.
+# -----------------------------------------------------------------------------
+
+
+class _Record:
+    """Internal container mimicking the attributes of a Proxy state"""
+
+    __slots__ = ("_type", "_name", "_tags", "_own", "_values")
+
+    def __init__(self, _type, _name, _tags, _own, _values):
+        self._type = _type
+        self._name = _name
+        self._tags = _tags
+        self._own = _own
+        self._values = _values
+
+
+def _freeze(proxy):
+    return _Record(
+        proxy._type,
+        proxy._name,
+        frozenset(proxy._tags or ()),
+        frozenset(proxy._own or ()),
+        tuple(v.copy() if isinstance(v, list) else v for v in proxy._values),
+    )
+
+
+def _thaw(record):
+    return _Record(
+        record._type,
+        record._name,
+        set(record._tags or ()),
+        set(record._own or ()),
+        [v.copy() if isinstance(v, list) else v for v in record._values],
+    )
+
+
+def _state(proxy_id, record, names):
+    return {
+        "id": proxy_id,
+        "type": record._type,
+        "name": record._name,
+        "tags": sorted(record._tags or ()),
+        "own": sorted(record._own or ()),
+        "properties": dict(zip(names, record._values)),
+    }
+
+
+# -----------------------------------------------------------------------------
+# ProxyView
+# -----------------------------------------------------------------------------
+
+
+class ProxyView:
+    """
+    Read-only proxy of a snapshot/branch which can be accessed like a Proxy
+    (proxy.prop_name, proxy["prop_name"], get_property, state...).
+    Proxy properties resolve to views of the same snapshot/branch.
+    """
+
+    __slots__ = ("_source", "_id")
+
+    def __init__(self, source, proxy_id):
+        object.__setattr__(self, "_source", source)
+        object.__setattr__(self, "_id", proxy_id)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._id})"
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ProxyView)
+            and other._source is self._source
+            and other._id == self._id
+        )
+
+    def __hash__(self):
+        return hash(self._id)
+
+    @property
+    def _record(self):
+        record = self._source._lookup(self._id)
+        if record is None:
+            raise KeyError(self._id)
+        return record
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def type(self):
+        return self._record._type
+
+    @property
+    def name(self):
+        return self._record._name
+
+    @property
+    def schema(self):
+        return self._source.manager.get_schema(self._record._type)
+
+    @property
+    def definition(self):
+        return self._source.manager.get_definition(self._record._type)
+
+    @property
+    def tags(self):
+        return frozenset(self._record._tags or ())
+
+    @property
+    def own(self):
+        return frozenset(self._record._own or ())
+
+    @property
+    def state(self):
+        """Return the proxy state (see Proxy.state)"""
+        record = self._record
+        return _state(self._id, record, self.schema.names)
+
+    def list_property_names(self):
+        return list(self.schema.names)
+
+    def get_property(self, name, default=None):
+        """Return a property value"""
+        record = self._record
+        schema = self._source.manager.get_schema(record._type)
+        idx = schema.index.get(name)
+        if idx is None:
+            return default
+        value = record._values[idx]
+        if schema.is_proxy[idx]:
+            if isinstance(value, (list, tuple)):
+                return [self._source.get(proxy_id) for proxy_id in value]
+            return self._source.get(value)
+        if isinstance(value, list):
+            return value.copy()
+        return value
+
+    def __getitem__(self, name):
+        if name in self.schema.index:
+            return self.get_property(name)
+        raise AttributeError(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.__getitem__(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self!r} is read-only")
+
+    def __setitem__(self, name, value):
+        raise AttributeError(f"{self!r} is read-only")
+
+
+# -----------------------------------------------------------------------------
+# ProxyManagerSnapshot
+# -----------------------------------------------------------------------------
+
+
+class ProxyManagerSnapshot:
+    """
+    Read-only view of the proxies of a ProxyManager at the time it was taken
+    (see ProxyManager.snapshot). Values are the current ones, committed or not.
+
+    Taking a snapshot is O(1) and it shares the proxies with the live state.
+    While it is alive, the live proxies save their state into it before
+    their first modification or deletion, so the memory it uses only grows
+    with the number of proxies changed since. Call release() (or drop it)
+    to stop tracking the changes.
+    """
+
+    def __init__(self, proxy_manager):
+        self._pxm = proxy_manager
+        self._mtime = proxy_manager.mtime
+        self._preserved = {}
+        self._released = False
+        proxy_manager._snapshots.add(self)
+
+    @property
+    def manager(self):
+        return self._pxm
+
+    @property
+    def mtime(self):
+        """Modification stamp of the ProxyManager when taken"""
+        return self._mtime
+
+    @property
+    def preserved_count(self):
+        """Number of proxies copied because the live state changed"""
+        return len(self._preserved)
+
+    def release(self):
+        """Stop tracking the live state, the snapshot can no longer be used"""
+        self._pxm._snapshots.discard(self)
+        self._preserved = {}
+        self._released = True
+
+    def _preserve(self, proxy_id, proxy):
+        """Called by the live state before a proxy get modified/created/deleted"""
+        if proxy_id not in self._preserved:
+            self._preserved[proxy_id] = None if proxy is None else _freeze(proxy)
+
+    def _lookup(self, proxy_id):
+        if self._released:
+            raise RuntimeError("Snapshot has been released")
+        if proxy_id in self._preserved:
+            return self._preserved[proxy_id]
+        return self._pxm._id_map.get(proxy_id)
+
+    def _view(self, proxy_id):
+        return ProxyView(self, proxy_id)
+
+    def ids(self):
+        """Return the list of proxy ids"""
+        if self._released:
+            raise RuntimeError("Snapshot has been released")
+        preserved = self._preserved
+        ids = [_id for _id in self._pxm._id_map if _id not in preserved]
+        ids.extend(_id for _id, record in preserved.items() if record is not None)
+        return ids
+
+    def get(self, proxy_id):
+        """Return a ProxyView or None"""
+        if proxy_id is None or self._lookup(proxy_id) is None:
+            return None
+        return self._view(proxy_id)
+
+    def get_instances_of_type(self, proxy_type):
+        preserved = self._preserved
+        ids = [
+            _id
+            for _id in self._pxm._type_map.get(proxy_type, {})
+            if _id not in preserved
+        ]
+        ids.extend(
+            _id
+            for _id, record in preserved.items()
+            if record is not None and record._type == proxy_type
+        )
+        return [self._view(_id) for _id in ids]
+
+    def __contains__(self, proxy_id):
+        return self._lookup(proxy_id) is not None
+
+    def __len__(self):
+        return len(self.ids())
+
+    def __iter__(self):
+        return (self._view(_id) for _id in self.ids())
+
+    def branch(self):
+        """Return a writable ProxyManagerBranch starting from that snapshot"""
+        return ProxyManagerBranch(self)
+
+
+# -----------------------------------------------------------------------------
+# ProxyManagerBranch
+# -----------------------------------------------------------------------------
+
+
+class BranchProxy(ProxyView):
+    """Proxy of a branch, only copied when one of its properties is set"""
+
+    __slots__ = ()
+
+    def set_property(self, name, value):
+        """Update a property, return True if it changed"""
+        return self._source._set_property(self._id, name, value)
+
+    def set_properties(self, values):
+        """Update several properties, return the names of the changed ones"""
+        return [
+            name
+            for name, value in values.items()
+            if self._source._set_property(self._id, name, value)
+        ]
+
+    def __setattr__(self, name, value):
+        if name.startswith("_") or name not in self.schema.index:
+            raise AttributeError(f"{self!r} has no property '{name}'")
+        self.set_property(name, value)
+
+    def __setitem__(self, name, value):
+        self.__setattr__(name, value)
+
+
+class ProxyManagerBranch:
+    """
+    Writable copy of a ProxyManager (see ProxyManager.branch) which keeps
+    track of the proxies it creates, modifies or deletes. Only those proxies
+    get copied, the other ones are read from the snapshot it started from.
+
+    Property values are stored as is: domains are only evaluated once the
+    branch get merged back.
+
+        what_if = pxm.branch()
+        what_if.get(proxy_id).Radius = 2
+        print(what_if.diff())
+        what_if.merge()
+    """
+
+    def __init__(self, snapshot):
+        self._base = snapshot
+        self._records = {}  # id => _Record or None when deleted
+        self._created = {}
+
+    @property
+    def manager(self):
+        return self._base.manager
+
+    @property
+    def base(self):
+        """Snapshot the branch started from"""
+        return self._base
+
+    def release(self):
+        """Stop tracking the live state, the branch can no longer be used"""
+        self._base.release()
+        self._records = {}
+        self._created = {}
+
+    # -------------------------------------------------------------------------
+    # Read
+    # -------------------------------------------------------------------------
+
+    def _lookup(self, proxy_id):
+        if proxy_id in self._records:
+            return self._records[proxy_id]
+        return self._base._lookup(proxy_id)
+
+    def _view(self, proxy_id):
+        return BranchProxy(self, proxy_id)
+
+    def ids(self):
+        """Return the list of proxy ids"""
+        records = self._records
+        ids = [_id for _id in self._base.ids() if _id not in records]
+        ids.extend(_id for _id, record in records.items() if record is not None)
+        return ids
+
+    def get(self, proxy_id):
+        """Return a BranchProxy or None"""
+        if proxy_id is None or self._lookup(proxy_id) is None:
+            return None
+        return self._view(proxy_id)
+
+    def get_instances_of_type(self, proxy_type):
+        return [proxy for proxy in self if proxy.type == proxy_type]
+
+    def __contains__(self, proxy_id):
+        return self._lookup(proxy_id) is not None
+
+    def __len__(self):
+        return len(self.ids())
+
+    def __iter__(self):
+        return (self._view(_id) for _id in self.ids())
+
+    # -------------------------------------------------------------------------
+    # Write
+    # -------------------------------------------------------------------------
+
+    def _copy_on_write(self, proxy_id):
+        record = self._records.get(proxy_id)
+        if record is None:
+            base_record = self._base._lookup(proxy_id)
+            if base_record is None or proxy_id in self._records:
+                raise KeyError(proxy_id)
+            record = self._records[proxy_id] = _thaw(base_record)
+        return record
+
+    def _normalize(self, schema, idx, value):
+        """Store proxies as ids and arrays as TypedArray (see Proxy._assign)"""
+        if value is None:
+            return None
+        if schema.is_proxy[idx]:
+            if isinstance(value, (list, tuple)):
+                return [v if isinstance(v, str) else v.id for v in value]
+            return value if isinstance(value, str) else value.id
+        if schema.array_types[idx] is not None:
+            return arrays.to_typed_array(value, schema.array_types[idx])
+        if isinstance(value, tuple):
+            return list(value)
+        return value
+
+    def _set_property(self, proxy_id, name, value):
+        record = self._lookup(proxy_id)
+        if record is None:
+            raise KeyError(proxy_id)
+        schema = self.manager.get_schema(record._type)
+        idx = schema.index.get(name)
+        if idx is None:
+            raise AttributeError(f"{record._type} has no property '{name}'")
+
+        value = self._normalize(schema, idx, value)
+        if utils.is_equal(value, record._values[idx], schema.tolerances[idx]):
+            return False
+
+        self._copy_on_write(proxy_id)._values[idx] = value
+        return True
+
+    def create(self, proxy_type, **initial_values):
+        """
+        Create a new proxy within the branch. Its id is reserved so it stays
+        the same once merged.
+        """
+        pxm = self.manager
+        if proxy_type in pxm._registry:
+            pxm._require(proxy_type)
+        if proxy_type not in pxm._model_definition:
+            raise ValueError(
+                f"Object of type: {proxy_type} was not found in our loaded model"
+                "definitions"
+            )
+
+        schema = pxm.get_schema(proxy_type)
+        values = []
+        for idx, name in enumerate(schema.names):
+            size = schema.sizes[idx]
+            initial = schema.initials[idx]
+            sub_type = schema.proxy_types[idx]
+            if name in initial_values:
+                value = self._normalize(schema, idx, initial_values[name])
+            elif isinstance(initial, dict):
+                logger.error("Don't know how to deal with domain yet: %s", initial)
+                value = None
+            elif (
+                schema.is_proxy[idx]
+                and sub_type is not None
+                and isinstance(size, int)
+                and size > 0
+            ):
+                value = [self.create(sub_type).id for _ in range(size)]
+            else:
+                value = initial
+            values.append(value)
+
+        proxy_id = pxm._new_proxy_id()
+        self._records[proxy_id] = _Record(
+            proxy_type, proxy_type, set(schema.tags), set(), values
+        )
+        self._created[proxy_id] = True
+        return self._view(proxy_id)
+
+    def delete(self, proxy_id):
+        """
+        Delete a proxy along with the ones it owns. References to the deleted
+        proxies get cleared when merged.
+        """
+        stack = [proxy_id]
+        deleted = []
+        while stack:
+            _id = stack.pop()
+            record = self._lookup(_id)
+            if record is None:
+                continue
+            stack.extend(record._own or ())
+            deleted.append(_id)
+            if self._created.pop(_id, None):
+                del self._records[_id]
+            else:
+                self._records[_id] = None
+
+        if not deleted:
+            raise KeyError(proxy_id)
+        return deleted
+
+    # -------------------------------------------------------------------------
+    # Diff / Merge
+    # -------------------------------------------------------------------------
+
+    def diff(self):
+        """
+        Return the changes made within the branch
+        {
+            "created": [proxy_state, ...],
+            "updated": [{id, name, value}, ...],  # ProxyManager.update() format
+            "deleted": [proxy_id, ...],
+        }
+        """
+        pxm = self.manager
+        created = []
+        updated = []
+        deleted = []
+        for proxy_id, record in self._records.items():
+            if record is None:
+                deleted.append(proxy_id)
+                continue
+
+            schema = pxm.get_schema(record._type)
+            if proxy_id in self._created:
+                created.append(_state(proxy_id, record, schema.names))
+                continue
+
+            base_values = self._base._lookup(proxy_id)._values
+            for idx, name in enumerate(schema.names):
+                value = record._values[idx]
+                if not utils.is_equal(value, base_values[idx], schema.tolerances[idx]):
+                    updated.append({"id": proxy_id, "name": name, "value": value})
+
+        return {"created": created, "updated": updated, "deleted": deleted}
+
+    def conflicts(self, diff=None):
+        """
+        Return the changes of the branch conflicting with the ones made on the
+        ProxyManager since the branch started as a list of (proxy_id, name)
+        where name is None when the proxy was deleted or modified on one side
+        and deleted on the other.
+        """
+        if diff is None:
+            diff = self.diff()
+
+        pxm = self.manager
+        preserved = self._base._preserved
+        conflicts = []
+        for change in diff["updated"]:
+            proxy_id, name = change["id"], change["name"]
+            if proxy_id not in preserved:
+                continue  # untouched on the live side
+            proxy = pxm.get(proxy_id)
+            if proxy is None:
+                conflicts.append((proxy_id, None))
+                continue
+            idx = proxy._schema.index[name]
+            tolerance = proxy._schema.tolerances[idx]
+            live_value = proxy._values[idx]
+            if not utils.is_equal(
+                live_value, preserved[proxy_id]._values[idx], tolerance
+            ) and not utils.is_equal(live_value, change["value"], tolerance):
+                conflicts.append((proxy_id, name))
+
+        for proxy_id in diff["deleted"]:
+            proxy = pxm.get(proxy_id)
+            record = preserved.get(proxy_id)
+            if proxy is None or record is None:
+                continue
+            schema = proxy._schema
+            if any(
+                not utils.is_equal(a, b, tolerance)
+                for a, b, tolerance in zip(
+                    proxy._values, record._values, schema.tolerances
+                )
+            ):
+                conflicts.append((proxy_id, None))
+
+        return conflicts
+
+    def merge(self, force=False):
+        """
+        Apply the changes of the branch onto its ProxyManager within a single
+        transaction (and undo step). Updated properties are left uncommitted
+        like with ProxyManager.update(). A ValueError is raised if some
+        changes conflict with the live state unless force=True in which case
+        the branch wins. The branch then starts over from the merged state.
+        Return the applied diff.
+        """
+        diff = self.diff()
+        conflicts = self.conflicts(diff)
+        if conflicts and not force:
+            raise ValueError(f"Branch conflicts with the ProxyManager: {conflicts}")
+
+        pxm = self.manager
+        with pxm.transaction():
+            created_ids = self._merge_created(diff["created"])
+            if diff["updated"]:
+                pxm.update(diff["updated"])
+            if diff["deleted"]:
+                pxm.delete_many(diff["deleted"])
+
+        if created_ids:
+            pxm._emit("created", ids=created_ids)
+
+        self._base.release()
+        self._base = pxm.snapshot()
+        self._records = {}
+        self._created = {}
+
+        return diff
+
+    def _merge_created(self, states):
+        """Create the proxies of the branch while keeping their ids"""
+        pxm = self.manager
+        per_type = {}
+        for state in states:
+            per_type.setdefault(state["type"], []).append(state)
+
+        created_ids = []
+        for proxy_type, type_states in per_type.items():
+            pxm._life_cycle(
+                "proxies_create_before",
+                proxy_type=proxy_type,
+                initial_values=type_states,
+            )
+            with pxm._history_paused(changes_only=True):
+                _, ids = pxm._restore(type_states, True, len(type_states), None)
+                proxies = [pxm.get(_id) for _id in ids]
+
+                # Evaluate the domains skipped by the branch like create() does
+                for proxy in proxies:
+                    proxy._init_domains()
+                    proxy.commit()
+            pxm._life_cycle(
+                "proxies_create_after_commit",
+                proxy_type=proxy_type,
+                initial_values=type_states,
+                proxies=proxies,
+            )
+            if pxm._history is not None:
+                pxm._history.created(ids)
+            created_ids.extend(ids)
+
+        return created_ids
@@ -1,4 +1,5 @@
 import logging
+import weakref
 
 logger = logging.getLogger("simput.core.domains")
 logger.setLevel(logging.INFO)
@@ -20,6 +21,10 @@ class PropertyDomain:
         (0: info), (1: warning), (2: error)
      - message personalize the context in which a given domain is used to help
        understand why a given value is not valid.
+
+    The evaluation of a domain (available, valid, hints) is cached until
+    invalidate() get called, which happens when one of its dependent
+    properties or its configuration change.
     """
 
     def __init__(self, _proxy, _property: str, **kwargs):
@@ -30,19 +35,60 @@ class PropertyDomain:
         self._level = kwargs.get("level", 0)
         self._message = kwargs.get("message", str(__class__))
         self._should_compute_value = "initial" in kwargs
+        self._state = None
+        self._stale = True
 
     def __del__(self):
-        logger.info(
-            "PropertyDomain::__del__ %s[%s].%s",
-            self._proxy.type,
-            self._proxy.id,
-            self._property_name,
-        )
+        logger.info("PropertyDomain::__del__ %s", self._property_name)
+
+    @property
+    def _proxy(self):
+        """Proxy owning that domain (None once the proxy is gone)"""
+        return self._proxy_ref() if self._proxy_ref is not None else None
+
+    @_proxy.setter
+    def _proxy(self, proxy):
+        # weak reference to prevent a proxy <=> domain reference cycle
+        self._proxy_ref = weakref.ref(proxy) if proxy is not None else None
+
+    def invalidate(self):
+        """Flag the cached evaluation of the domain as outdated"""
+        self._stale = True
+
+    def update_state(self):
+        """
+        Evaluate the domain if its cached state is outdated.
+        Return True if the new evaluation differs from the previous one.
+        """
+        if not self._stale:
+            return False
+
+        self._stale = False
+        new_state = {
+            "available": self.available(),
+            "valid": self.valid(),
+            "hints": self.hints(),
+        }
+        if new_state == self._state:
+            return False
+
+        self._state = new_state
+        return True
+
+    @property
+    def state(self):
+        """Return the cached evaluation of the domain (available, valid, hints)"""
+        self.update_state()
+        return self._state
 
     def enable_set_value(self):
         """Reset domain set so it can re-compute a default value"""
         self._should_compute_value = True
 
+    def disable_set_value(self):
+        """Keep the current value, used when restoring a saved state"""
+        self._should_compute_value = False
+
     def set_value(self):
         """
         Ask domain to compute and set a value to a property.
@@ -79,6 +125,7 @@ class PropertyDomain:
     def level(self, value):
         """Update domain level"""
         self._level = value
+        self.invalidate()
 
     @property
     def message(self):
@@ -89,6 +136,7 @@ class PropertyDomain:
     def message(self, value):
         """Update domain message"""
         self._message = value
+        self.invalidate()
 
     def hints(self):
         """
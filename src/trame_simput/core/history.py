@@ -0,0 +1,393 @@
+import logging
+import sys
+from collections import deque
+
+from .arrays import TypedArray
+
+logger = logging.getLogger("simput.core.history")
+logger.setLevel(logging.WARN)
+
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+
+# Step entries
+SET = 0  # (SET, proxy_id, property_name, old_value, new_value)
+CREATE = 1  # (CREATE, [proxy_id, ...])
+DELETE = 2  # (DELETE, [tombstone, ...])
+
+# tombstone = (id, type, name, tags, own, values) with values following the
+# schema of the proxy type so property names are not repeated
+
+# -----------------------------------------------------------------------------
+# Memory estimation
+# -----------------------------------------------------------------------------
+
+_ENTRY_SIZE = sys.getsizeof((None,) * 5)
+
+
+def _sizeof(value):
+    """Rough estimate of the memory used by a property value"""
+    if isinstance(value, TypedArray):
+        return value.nbytes + 64
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _tombstone(proxy):
+    return (
+        proxy._id,
+        proxy._type,
+        proxy._name,
+        tuple(proxy._tags or ()),
+        tuple(proxy._own or ()),
+        tuple(proxy._values),
+    )
+
+
+def _closure(pxm, proxy_ids):
+    """Return the proxies along with the ones they own"""
+    proxies = {}
+    stack = list(proxy_ids)
+    while stack:
+        proxy = pxm.get(stack.pop())
+        if proxy is None or proxy._id in proxies:
+            continue
+        proxies[proxy._id] = proxy
+        stack.extend(proxy._own or ())
+    return list(proxies.values())
+
+
+def _tombstone_size(tombstone):
+    return _ENTRY_SIZE + sum(_sizeof(v) for v in tombstone[5])
+
+
+def _tombstone_state(pxm, tombstone):
+    _id, _type, _name, _tags, _own, _values = tombstone
+    return {
+        "id": _id,
+        "type": _type,
+        "name": _name,
+        "tags": list(_tags),
+        "own": list(_own),
+        "properties": dict(zip(pxm.get_schema(_type).names, _values)),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Step
+# -----------------------------------------------------------------------------
+
+
+class Step:
+    """Set of changes undone/redone together"""
+
+    __slots__ = ("entries", "size", "_diffs")
+
+    def __init__(self):
+        self.entries = []
+        self.size = sys.getsizeof(self)
+        self._diffs = {}
+
+    def __bool__(self):
+        return len(self.entries) > 0
+
+    def add_diff(self, proxy_id, name, old_value, new_value):
+        key = (proxy_id, name)
+        position = self._diffs.get(key)
+        if position is not None:
+            # Only keep the first old value and the last new value
+            entry = self.entries[position]
+            self.size += _sizeof(new_value) - _sizeof(entry[4])
+            self.entries[position] = (SET, proxy_id, name, entry[3], new_value)
+            return
+
+        self._diffs[key] = len(self.entries)
+        self.entries.append((SET, proxy_id, name, old_value, new_value))
+        self.size += _ENTRY_SIZE + _sizeof(old_value) + _sizeof(new_value)
+
+    def add(self, entry, size):
+        # Diffs can't be merged across a create/delete
+        self._diffs = {}
+        self.entries.append(entry)
+        self.size += _ENTRY_SIZE + size
+
+    def seal(self):
+        self._diffs = None
+
+    def ids(self):
+        result = {}
+        for entry in self.entries:
+            if entry[0] == SET:
+                result[entry[1]] = True
+            elif entry[0] == CREATE:
+                result.update(dict.fromkeys(entry[1], True))
+            else:
+                result.update(dict.fromkeys((t[0] for t in entry[1]), True))
+        return list(result)
+
+
+# -----------------------------------------------------------------------------
+# History
+# -----------------------------------------------------------------------------
+
+
+class History:
+    """
+    Undo/redo history of a ProxyManager.
+
+    Rather than snapshotting the state, the history only keeps the
+    (proxy_id, property, old, new) diffs captured when properties are set
+    along with tombstones of the created/deleted proxies. The changes are
+    grouped into steps which get closed by a commit or at the end of a
+    ProxyManager operation (update, create, delete, transaction...).
+
+    Steps are kept in a ring buffer, the oldest ones being dropped once the
+    estimated memory used by the history exceed the memory budget.
+    """
+
+    def __init__(self, proxy_manager, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self._pxm = proxy_manager
+        self._memory_budget = memory_budget
+        self._undo = deque()
+        self._redo = deque()
+        self._size = 0
+        self._pending = Step()
+        self._depth = 0
+        self._paused = 0
+        self._paused_changes = 0
+
+    @property
+    def memory_budget(self):
+        return self._memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, value):
+        self._memory_budget = value
+        self._enforce_budget()
+
+    @property
+    def size(self):
+        """Estimated memory used by the history in bytes"""
+        return self._size + (self._pending.size if self._pending else 0)
+
+    @property
+    def can_undo(self):
+        return bool(self._pending) or len(self._undo) > 0
+
+    @property
+    def can_redo(self):
+        return len(self._redo) > 0
+
+    @property
+    def state(self):
+        """Number of available undo/redo steps"""
+        return {
+            "undo": len(self._undo) + (1 if self._pending else 0),
+            "redo": len(self._redo),
+        }
+
+    def clear(self):
+        """Forget all the recorded changes"""
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+        self._pending = Step()
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    def begin(self):
+        """Group the upcoming changes into a single step until end()"""
+        self._depth += 1
+
+    def end(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self.seal()
+
+    def pause(self, changes_only=False):
+        """
+        Stop recording until resume(). With changes_only=True the creations
+        and deletions of proxies are still recorded (initialization of new
+        proxies).
+        """
+        if changes_only:
+            self._paused_changes += 1
+        else:
+            self._paused += 1
+
+    def resume(self, changes_only=False):
+        if changes_only:
+            self._paused_changes -= 1
+        else:
+            self._paused -= 1
+
+    @property
+    def recording(self):
+        return self._paused == 0
+
+    def record(self, proxy_id, name, old_value, new_value):
+        """Record the change of a property value"""
+        if self._paused == 0 and self._paused_changes == 0:
+            self._pending.add_diff(proxy_id, name, old_value, new_value)
+
+    def created(self, proxy_ids):
+        """Record the creation of some proxies"""
+        if self._paused == 0 and proxy_ids:
+            self._pending.add((CREATE, list(proxy_ids)), 8 * len(proxy_ids))
+            if self._depth == 0:
+                self.seal()
+
+    def deleted(self, proxies):
+        """Record the deletion of some proxies (before they get removed)"""
+        if self._paused == 0 and proxies:
+            tombstones = [_tombstone(proxy) for proxy in proxies]
+            size = sum(_tombstone_size(t) for t in tombstones)
+            self._pending.add((DELETE, tombstones), size)
+            if self._depth == 0:
+                self.seal()
+
+    def seal(self):
+        """Close the current step"""
+        if self._depth > 0 or not self._pending:
+            return
+
+        step = self._pending
+        step.seal()
+        self._pending = Step()
+        self._undo.append(step)
+        self._size += step.size
+
+        # New changes invalidate the redo steps
+        for redo_step in self._redo:
+            self._size -= redo_step.size
+        self._redo.clear()
+
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        while (self._undo or self._redo) and self._size > self._memory_budget:
+            if self._redo:
+                self._size -= self._redo.popleft().size
+            else:
+                dropped = self._undo.popleft()
+                self._size -= dropped.size
+                logger.info("Drop history step (%s bytes)", dropped.size)
+
+    # -------------------------------------------------------------------------
+    # Undo / Redo
+    # -------------------------------------------------------------------------
+
+    def undo(self):
+        """Revert the latest step and return the list of affected proxy ids"""
+        if self._depth > 0:
+            raise RuntimeError("Can not undo during an operation")
+
+        self.seal()
+        if not self._undo:
+            return []
+
+        step = self._undo.pop()
+        self._apply(step, undo=True)
+        self._redo.append(step)
+        return step.ids()
+
+    def redo(self):
+        """Apply again the latest undone step and return the affected ids"""
+        if self._depth > 0:
+            raise RuntimeError("Can not redo during an operation")
+
+        if not self._redo:
+            return []
+
+        step = self._redo.pop()
+        self._apply(step, undo=False)
+        self._undo.append(step)
+        return step.ids()
+
+    def _apply(self, step, undo):
+        pxm = self._pxm
+        entries = list(reversed(step.entries)) if undo else step.entries
+
+        # Proxies without pending edits stay committed
+        clean_ids = set()
+        for _id in step.ids():
+            proxy = pxm.get(_id)
+            if proxy is not None and not proxy._dirty_properties:
+                clean_ids.add(_id)
+
+        created_ids = []
+        changed_ids = {}
+        self.pause()
+        try:
+            with pxm.transaction(apply_domains=False):
+                values = {}
+                for i, entry in enumerate(entries):
+                    kind = entry[0]
+                    if kind == SET:
+                        _, _id, name, old_value, new_value = entry
+                        values.setdefault(_id, {})[name] = (
+                            old_value if undo else new_value
+                        )
+                        continue
+
+                    self._set_values(values, changed_ids)
+                    values = {}
+                    if (kind == CREATE) == undo:
+                        # remove the proxies while keeping what we need to
+                        # create them back
+                        ids = entry[1] if kind == CREATE else [t[0] for t in entry[1]]
+                        if kind == CREATE:
+                            tombstones = [_tombstone(p) for p in _closure(pxm, ids)]
+                        pxm.delete_many(ids)
+                        if kind == CREATE:
+                            self._replace(step, entries, i, (CREATE, ids, tombstones))
+                    else:
+                        tombstones = entry[1] if kind == DELETE else entry[2]
+                        pxm._restore(
+                            [_tombstone_state(pxm, t) for t in tombstones],
+                            True,
+                            len(tombstones),
+                            None,
+                        )
+                        clean_ids.update(t[0] for t in tombstones)
+                        created_ids.extend(t[0] for t in tombstones)
+                        if kind == CREATE:
+                            self._replace(step, entries, i, (CREATE, entry[1]))
+
+                self._set_values(values, changed_ids)
+
+                for _id in clean_ids:
+                    proxy = pxm.get(_id)
+                    if proxy is not None:
+                        proxy.commit()
+
+                # Same notifications as the operations being reverted/replayed
+                created_ids = [_id for _id in created_ids if _id in pxm._id_map]
+                if created_ids:
+                    pxm._emit("created", ids=created_ids)
+                changed_ids = [_id for _id in changed_ids if _id in pxm._id_map]
+                if changed_ids:
+                    pxm._emit("changed", ids=changed_ids)
+        finally:
+            self.resume()
+
+    def _set_values(self, values, changed_ids):
+        for _id, proxy_values in values.items():
+            proxy = self._pxm.get(_id)
+            if proxy is not None:
+                proxy.set_properties(proxy_values)
+                changed_ids[_id] = True
+
+    def _replace(self, step, entries, i, entry):
+        """Swap an entry of a step (create <=> tombstones of created proxies)"""
+        position = len(entries) - 1 - i if entries is not step.entries else i
+        previous = step.entries[position]
+        step.entries[position] = entry
+        if len(entry) > 2:
+            delta = sum(_tombstone_size(t) for t in entry[2])
+        else:
+            delta = -sum(_tombstone_size(t) for t in previous[2])
+        step.size += delta
+        self._size += delta
@@ -0,0 +1,339 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+from . import arrays
+from .mapping import ProxyManagerLifeCycleListener
+
+logger = logging.getLogger("simput.core.journal")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# Journal layout
+# -----------------------------------------------------------------------------
+#  directory/
+#    checkpoint-{generation}.simput   (see ProxyManager.save_snapshot)
+#    journal-{generation}.jsonl       (changes made after that checkpoint)
+#
+#  journal records:
+#    {"op": "create", "state": {...}}           # Proxy.state
+#    {"op": "update", "changes": [{id, name, value}, ...]}
+#    {"op": "domains", "changes": [{id, name, value}, ...]}  # set by domains
+#    {"op": "delete", "ids": [...]}
+#    {"op": "commit", "ids": [...]}
+#    {"op": "reset", "ids": [...]}
+#
+#  A checkpoint stores the current values, so a log starts with the records
+#  bringing back the committed values of the proxies having pending edits.
+# -----------------------------------------------------------------------------
+
+CHECKPOINT = "checkpoint-{}.simput"
+LOG = "journal-{}.jsonl"
+
+
+def _generation(path):
+    try:
+        return int(path.stem.split("-")[-1].split(".")[0])
+    except ValueError:
+        return -1
+
+
+def _encode_value(value):
+    """Turn arrays received as raw buffers into serializable TypedArray"""
+    if isinstance(value, dict) and "buffer" in value:
+        return arrays.to_typed_array(value, value.get("dtype", arrays.DEFAULT_DTYPE))
+    return value
+
+
+# -----------------------------------------------------------------------------
+# Journal
+# -----------------------------------------------------------------------------
+
+
+class Journal(ProxyManagerLifeCycleListener):
+    """
+    Append-only log of the changes made to a ProxyManager so a session can be
+    recovered after a crash without saving the full state after each edit.
+
+    The journal is a life cycle listener which append a record for each
+    created proxy, change set applied with ProxyManager.update() and deleted
+    proxy. Records are written through a buffered file and every
+    checkpoint_interval records, the log get compacted into a checkpoint
+    (binary snapshot of the full state) and a new log is started.
+
+    Commits and resets of proxies are recorded as well so the recovered
+    proxies keep their pending edits. The values set by the domains during
+    ProxyManager.apply_domains() are recorded too, so the replay does not
+    evaluate any domain and rebuilds the values as they were. Changes
+    made directly on proxies (set_property) are only captured by the next
+    checkpoint.
+
+        journal = Journal(directory)
+        journal.recover(pxm)              # replay the previous session if any
+        pxm.add_life_cycle_listener(journal)
+    """
+
+    def __init__(self, directory, checkpoint_interval=1000, buffer_size=65536):
+        super().__init__()
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._checkpoint_interval = checkpoint_interval
+        self._buffer_size = buffer_size
+        self._generation = self._latest_generation()
+        self._log = None
+        self._count = 0
+        self._depth = 0
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def set_proxymanager(self, pxm):
+        super().set_proxymanager(pxm)
+        if pxm is None:
+            self.close()
+        else:
+            # Start from the current state
+            self.checkpoint()
+
+    # -------------------------------------------------------------------------
+    # Files
+    # -------------------------------------------------------------------------
+
+    def _latest_generation(self):
+        generations = [
+            _generation(path) for path in self._directory.glob(CHECKPOINT.format("*"))
+        ]
+        return max(generations, default=0)
+
+    def _checkpoint_path(self, generation):
+        return self._directory / CHECKPOINT.format(generation)
+
+    def _log_path(self, generation):
+        return self._directory / LOG.format(generation)
+
+    def _append(self, record):
+        if self._log is None:
+            return
+
+        self._log.write(json.dumps(record, default=arrays.json_default))
+        self._log.write("\n")
+        self._count += 1
+
+    def _begin(self):
+        self._depth += 1
+
+    def _end(self):
+        # Only compact between operations (no proxy half created)
+        self._depth = max(0, self._depth - 1)
+        if (
+            self._depth == 0
+            and self._checkpoint_interval
+            and self._count >= self._checkpoint_interval
+        ):
+            self.checkpoint()
+
+    def flush(self, sync=False):
+        """Write the buffered records, and with sync=True, make them durable"""
+        if self._log is not None:
+            self._log.flush()
+            if sync:
+                os.fsync(self._log.fileno())
+
+    def close(self):
+        """Write the pending records and stop journaling"""
+        if self._log is not None:
+            self.flush(sync=True)
+            self._log.close()
+            self._log = None
+
+    def checkpoint(self):
+        """
+        Compact the journal by saving the full state of the proxy manager into
+        a new checkpoint and by starting a new log.
+        """
+        if self._pxm is None:
+            return
+
+        generation = self._generation + 1
+        checkpoint_path = self._checkpoint_path(generation)
+        tmp_path = checkpoint_path.with_suffix(".tmp")
+        self._pxm.save_snapshot(tmp_path)
+        with open(tmp_path, "rb") as file:
+            os.fsync(file.fileno())
+
+        # The checkpoint only becomes visible once fully written
+        os.replace(tmp_path, checkpoint_path)
+
+        if self._log is not None:
+            self._log.close()
+        self._generation = generation
+        self._log = open(self._log_path(generation), "w", buffering=self._buffer_size)
+        self._count = 0
+        self._append_pending_edits()
+
+        # Older generations are no longer needed
+        for pattern in (CHECKPOINT, LOG):
+            for path in self._directory.glob(pattern.format("*")):
+                if _generation(path) < generation:
+                    path.unlink()
+
+    def _append_pending_edits(self):
+        """
+        Internal helper logging the committed values of the proxies with
+        pending edits followed by those edits (the checkpoint only has the
+        current values).
+        """
+        committed = []
+        edited = []
+        ids = []
+        for proxy in self._pxm._id_map.values():
+            if not proxy._dirty_properties or proxy._pushed_values is None:
+                continue
+            ids.append(proxy.id)
+            for name in proxy._dirty_properties:
+                idx = proxy._schema.index[name]
+                committed.append(
+                    {"id": proxy.id, "name": name, "value": proxy._pushed_values[idx]}
+                )
+                edited.append(
+                    {"id": proxy.id, "name": name, "value": proxy._values[idx]}
+                )
+
+        if ids:
+            self._append({"op": "update", "changes": committed})
+            self._append({"op": "commit", "ids": ids})
+            self._append({"op": "update", "changes": edited})
+
+    def recover(self, pxm, progress=None):
+        """
+        Restore the state of a previous session into a ProxyManager by loading
+        the latest checkpoint and replaying the changes of its log. Edits which
+        were not committed are restored as such.
+        Return the number of replayed records.
+        """
+        generation = self._latest_generation()
+        if not generation:
+            return 0
+
+        # Not memory mapped as the checkpoint get removed by the next one
+        pxm.load_snapshot(
+            self._checkpoint_path(generation), keep_ids=True, memory_map=False
+        )
+
+        log_path = self._log_path(generation)
+        if not log_path.exists():
+            return 0
+
+        count = 0
+        with open(log_path) as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last record was being written when the crash happened
+                    logger.warning("Skipping truncated journal record")
+                    break
+
+                self._replay(pxm, record)
+                count += 1
+                if progress:
+                    progress(count)
+
+        return count
+
+    @staticmethod
+    def _replay(pxm, record):
+        op = record.get("op")
+        if op == "create":
+            pxm._restore([record["state"]], True, 1, None)
+        elif op == "update":
+            pxm.update(record["changes"])
+        elif op == "domains":
+            # Assigned as the domains did (no auto_commit)
+            for change in record["changes"]:
+                proxy = pxm.get(change["id"])
+                if proxy is not None:
+                    proxy.set_property(change["name"], change["value"])
+        elif op == "delete":
+            pxm.delete_many(record["ids"])
+        elif op in ("commit", "reset"):
+            for proxy_id in record["ids"]:
+                proxy = pxm.get(proxy_id)
+                if proxy is not None:
+                    getattr(proxy, op)()
+        else:
+            logger.warning("Unknown journal record %s", op)
+
+    # -------------------------------------------------------------------------
+    # Life cycle
+    # -------------------------------------------------------------------------
+
+    def before_load_model(self, definition, **kwargs):
+        self._begin()
+
+    def after_load_model(self, definition, **kwargs):
+        self._depth = max(0, self._depth - 1)
+        if self._depth == 0:
+            self.checkpoint()
+
+    def proxy_create_before(self, proxy_type, initial_values, **kwargs):
+        self._begin()
+
+    def proxy_create_after_commit(self, proxy_type, initial_values, proxy, **kwargs):
+        self._append({"op": "create", "state": proxy.state})
+        self._end()
+
+    def proxies_create_before(self, proxy_type, initial_values, **kwargs):
+        self._begin()
+
+    def proxies_create_after_commit(
+        self, proxy_type, initial_values, proxies, **kwargs
+    ):
+        for proxy in proxies:
+            self._append({"op": "create", "state": proxy.state})
+        self._end()
+
+    def proxy_delete_before(self, proxy_id, trigger_modified, **kwargs):
+        self._begin()
+        self._append({"op": "delete", "ids": [proxy_id]})
+
+    def proxy_delete_after_own(self, proxy_id, trigger_modified, proxy, **kwargs):
+        self._end()
+
+    def proxies_delete_before(self, proxy_ids, trigger_modified, **kwargs):
+        self._begin()
+        self._append({"op": "delete", "ids": list(proxy_ids)})
+
+    def proxies_delete_after_own(self, proxy_ids, trigger_modified, proxies, **kwargs):
+        self._end()
+
+    def proxy_update_before(self, change_set, **kwargs):
+        self._begin()
+
+    def proxy_update_after(self, change_set, dirty_ids, **kwargs):
+        changes = [
+            {**change, "value": _encode_value(change["value"])} for change in change_set
+        ]
+        self._append({"op": "update", "changes": changes})
+        self._end()
+
+    def proxy_domains_after(self, change_set, data_ids, **kwargs):
+        self._begin()
+        self._append({"op": "domains", "changes": change_set})
+        self._end()
+
+    def proxy_commit(self, proxy_id, properties_dirty, **kwargs):
+        self._append({"op": "commit", "ids": [proxy_id]})
+
+    def proxy_reset(self, proxy_id, properties_dirty, **kwargs):
+        self._append({"op": "reset", "ids": [proxy_id]})
+
+    def import_before(self, file_input, file_content, **kwargs):
+        self._begin()
+
+    def import_after(self, file_input, file_content, data, new_ids, id_remap, **kwargs):
+        self._depth = max(0, self._depth - 1)
+        if self._depth == 0:
+            self.checkpoint()
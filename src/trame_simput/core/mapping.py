@@ -44,6 +44,111 @@ class ProxyObjectAdapter:
         pass
 
 
+# ----------------------------------------------------------------------------
+# ProxyManagerLifeCycleListener
+# ----------------------------------------------------------------------------
+class ProxyManagerLifeCycleListener:
+    """
+    API for listening to the life cycle of a ProxyManager.
+
+    Listeners don't have to inherit from that class, as only the methods
+    they implement get called, but it documents the available hooks
+    along with their arguments.
+    """
+
+    def __init__(self):
+        self._pxm = None
+
+    @property
+    def proxymanager(self):
+        return self._pxm
+
+    def set_proxymanager(self, pxm):
+        self._pxm = pxm
+
+    def before_modified(self, mtime, **kwargs):
+        pass
+
+    def after_modified(self, mtime, **kwargs):
+        pass
+
+    def before_load_model(self, definition, **kwargs):
+        pass
+
+    def after_load_model(self, definition, **kwargs):
+        pass
+
+    def proxy_create_before(self, proxy_type, initial_values, **kwargs):
+        pass
+
+    def proxy_create_before_commit(self, proxy_type, initial_values, proxy, **kwargs):
+        pass
+
+    def proxy_create_after_commit(self, proxy_type, initial_values, proxy, **kwargs):
+        pass
+
+    def proxies_create_before(self, proxy_type, initial_values, **kwargs):
+        pass
+
+    def proxies_create_before_commit(
+        self, proxy_type, initial_values, proxies, **kwargs
+    ):
+        pass
+
+    def proxies_create_after_commit(
+        self, proxy_type, initial_values, proxies, **kwargs
+    ):
+        pass
+
+    def proxy_delete_before(self, proxy_id, trigger_modified, **kwargs):
+        pass
+
+    def proxy_delete_after_self(self, proxy_id, trigger_modified, proxy, **kwargs):
+        pass
+
+    def proxy_delete_after_own(self, proxy_id, trigger_modified, proxy, **kwargs):
+        pass
+
+    def proxies_delete_before(self, proxy_ids, trigger_modified, **kwargs):
+        pass
+
+    def proxies_delete_after_self(self, proxy_ids, trigger_modified, proxies, **kwargs):
+        pass
+
+    def proxies_delete_after_own(self, proxy_ids, trigger_modified, proxies, **kwargs):
+        pass
+
+    def proxy_update_before(self, change_set, **kwargs):
+        pass
+
+    def proxy_update_after(self, change_set, dirty_ids, **kwargs):
+        pass
+
+    def proxy_domains_after(self, change_set, data_ids, **kwargs):
+        pass
+
+    def proxy_commit(self, proxy_id, properties_dirty, **kwargs):
+        pass
+
+    def proxy_reset(self, proxy_id, properties_dirty, **kwargs):
+        pass
+
+    def export_before(self, file_output, **kwargs):
+        pass
+
+    def export_after(self, file_output, data, **kwargs):
+        pass
+
+    def import_before(self, file_input, file_content, **kwargs):
+        pass
+
+    def import_before_processing(self, file_input, file_content, data, **kwargs):
+        pass
+
+    def import_after(self, file_input, file_content, data, new_ids, id_remap, **kwargs):
+        pass
+
+
 # ----------------------------------------------------------------------------
 # ObjectFactory
 # ----------------------------------------------------------------------------
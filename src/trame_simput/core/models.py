@@ -0,0 +1,511 @@
+import hashlib
+import logging
+import os
+import pickle
+import textwrap
+import threading
+import weakref
+from collections import ChainMap
+from pathlib import Path
+from types import MappingProxyType
+
+import yaml
+from trame_client.utils.version import get_version
+
+from .schema import compile_schema, resolve_mixins
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+logger = logging.getLogger("simput.core.models")
+logger.setLevel(logging.WARN)
+
+# Bump when the content of the cache entries changes
+CACHE_VERSION = 1
+
+# Pickled schemas are only valid for the package version which produced them
+PACKAGE_VERSION = get_version("trame_simput")
+
+# -----------------------------------------------------------------------------
+# Parsing
+# -----------------------------------------------------------------------------
+
+
+def parse_yaml(yaml_content):
+    """Same as yaml.safe_load() but using libyaml when available"""
+    return yaml.load(yaml_content, Loader=SafeLoader)
+
+
+def read_content(yaml_file=None, yaml_content=None):
+    """Return the content of a YAML file or the provided content"""
+    if yaml_file:
+        path = Path(yaml_file)
+        if path.exists():
+            yaml_content = path.read_text(encoding="UTF-8")
+
+    return yaml_content or None
+
+
+# -----------------------------------------------------------------------------
+# ModelCache
+# -----------------------------------------------------------------------------
+
+
+class ModelCache:
+    """
+    On-disk cache of parsed/compiled models keyed by the hash of their YAML
+    content. Entries are pickled so the directory must be a trusted one.
+
+    directory/
+      {digest}.model.pickle     # parsed YAML
+      {digest}.compiled.pickle  # definitions with mixins + ProxySchema
+    """
+
+    def __init__(self, directory):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _path(self, digest, kind):
+        return self._directory / f"{digest}.{kind}.pickle"
+
+    def get(self, digest, kind):
+        """Return a cached entry or None"""
+        try:
+            with open(self._path(digest, kind), "rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Invalid model cache entry %s.%s", digest, kind)
+            return None
+
+    def set(self, digest, kind, value):
+        """Store an entry, the cache is best effort so errors are only logged"""
+        path = self._path(digest, kind)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.warning("Could not write model cache entry %s.%s", digest, kind)
+            tmp_path.unlink(missing_ok=True)
+
+
+def content_digest(content):
+    """
+    Hash of a YAML/XML content used to address cached and shared models.
+    The package version is part of it so an upgrade invalidates the cache.
+    """
+    content_hash = hashlib.sha256(
+        f"simput-{PACKAGE_VERSION}-{CACHE_VERSION}\n".encode()
+    )
+    content_hash.update(content.encode("UTF-8"))
+    return content_hash.hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# Model
+# -----------------------------------------------------------------------------
+
+
+class Model:
+    """
+    YAML content of a model parsed only once for the ProxyManager
+    definitions, the UIManager language and its auto generated UI.
+    With a cache, the parsed definition and the compiled schemas are read
+    from the disk when that same content was already loaded.
+    """
+
+    def __init__(self, yaml_content, cache=None):
+        self.content = yaml_content
+        self._cache = cache
+        self._digest = None
+        self._definition = None
+
+    @property
+    def cached(self):
+        """True if that model uses an on-disk cache"""
+        return self._cache is not None
+
+    @property
+    def digest(self):
+        """Hash of the YAML content used as cache key"""
+        if self._digest is None:
+            self._digest = content_digest(self.content)
+        return self._digest
+
+    @property
+    def definition(self):
+        """Parsed YAML content"""
+        if self._definition is None:
+            if self._cache is not None:
+                self._definition = self._cache.get(self.digest, "model")
+
+            if self._definition is None:
+                self._definition = parse_yaml(self.content) or {}
+                if self._cache is not None:
+                    self._cache.set(self.digest, "model", self._definition)
+
+        return self._definition
+
+    def compiled(self):
+        """
+        Return the cached {definitions, schemas} produced by loading that model
+        into an empty ProxyManager or None.
+        """
+        if self._cache is None:
+            return None
+        return self._cache.get(self.digest, "compiled")
+
+    def save_compiled(self, definitions, schemas):
+        if self._cache is not None:
+            self._cache.set(
+                self.digest,
+                "compiled",
+                {"definitions": definitions, "schemas": schemas},
+            )
+
+
+def read_model(yaml_file=None, yaml_content=None, cache_dir=None):
+    """
+    Return a Model for a YAML file/content or None if there is nothing to
+    load. cache_dir can be a directory or a ModelCache.
+    """
+    yaml_content = read_content(yaml_file, yaml_content)
+    if yaml_content is None:
+        return None
+
+    cache = cache_dir
+    if cache is not None and not isinstance(cache, ModelCache):
+        cache = ModelCache(cache)
+
+    return Model(yaml_content, cache)
+
+
+# -----------------------------------------------------------------------------
+# Shared models
+# -----------------------------------------------------------------------------
+
+
+class FrozenDict(dict):
+    """dict which can't be edited, used for the content of shared models"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Shared model content is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """list which can't be edited, used for the content of shared models"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Shared model content is read-only")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+def freeze(value):
+    """
+    Return a read-only copy of some parsed YAML content. Containers stay
+    dict/list instances so the code checking for them keeps working.
+    """
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+class SharedModel:
+    """
+    Immutable content of a model referenced by all the sessions of the process
+    which loaded it (see SharedModels). Each part is filled by the first
+    session which needs it:
+
+      definitions/schemas/type_tags  (ProxyManager.load_model into an empty pxm)
+      language/ui                    (UIManager.load_model/load_language)
+      ui                             (UIManager.load_ui)
+
+    The type definitions and languages are deep-frozen copies (see freeze)
+    and the schemas are compiled from them, so no session can edit what the
+    others use. Sessions copy the mappings and add or replace their own
+    entries on top of them.
+    """
+
+    __slots__ = (
+        "digest",
+        "definitions",
+        "schemas",
+        "type_tags",
+        "language",
+        "ui",
+        "_resolved",
+        "__weakref__",
+    )
+
+    def __init__(self, digest):
+        self.digest = digest
+        self.definitions = None
+        self.schemas = None
+        self.type_tags = None
+        self.language = None
+        self.ui = None
+        self._resolved = {}
+
+    def set_definitions(self, definitions):
+        """Freeze the definitions (with mixins applied) and compile them"""
+        definitions = {name: freeze(value) for name, value in definitions.items()}
+        self.definitions = MappingProxyType(definitions)
+        self.schemas = MappingProxyType(
+            {
+                name: compile_schema(definitions, name)
+                for name, value in definitions.items()
+                if isinstance(value, dict) and not name.startswith("_")
+            }
+        )
+        self.type_tags = MappingProxyType(
+            {
+                name: frozenset((value or {}).get("_tags", []))
+                for name, value in definitions.items()
+            }
+        )
+
+    def set_language(self, language, ui):
+        self.language = MappingProxyType(
+            {name: freeze(value) for name, value in language.items()}
+        )
+        self.ui = MappingProxyType(dict(ui))
+
+    def set_ui(self, ui):
+        self.ui = MappingProxyType(dict(ui))
+
+    def provides(self, obj_type, definition, language):
+        """True if that definition and language are the shared ones"""
+        return (
+            self.definitions is not None
+            and self.language is not None
+            and self.definitions.get(obj_type) is definition
+            and self.language.get(obj_type) is language
+        )
+
+    def resolve(self, resolver, obj_type, ui):
+        """
+        Return the layout of a type resolved once for all the resolvers of the
+        same class. The ui content is part of the key as sessions can load
+        their own layouts.
+        """
+        key = (type(resolver), obj_type, ui)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            resolved = resolver.resolve(
+                self.definitions[obj_type], self.language[obj_type], ui
+            )
+            self._resolved[key] = resolved
+        return resolved
+
+
+class SharedModels:
+    """
+    Process-wide registry of SharedModel addressed by the hash of their
+    content. Entries only live as long as a session references them.
+    """
+
+    def __init__(self):
+        self._models = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, digest):
+        """Return the SharedModel of a content hash, creating it if needed"""
+        with self._lock:
+            shared = self._models.get(digest)
+            if shared is None:
+                shared = SharedModel(digest)
+                self._models[digest] = shared
+            return shared
+
+
+SHARED_MODELS = SharedModels()
+
+
+# -----------------------------------------------------------------------------
+# Model directory
+# -----------------------------------------------------------------------------
+
+_HEADER_KEYS = ("_tags", "_mixins")
+
+
+def scan_types(yaml_content):
+    """
+    List the types defined by a YAML model along with their _tags and _mixins
+    without parsing the full content. Only the top level keys and those two
+    type attributes are looked at.
+    """
+    headers = {}
+    current = None
+    snippet = None
+    snippet_indent = 0
+
+    def flush():
+        if snippet:
+            headers[current].update(parse_yaml(textwrap.dedent("\n".join(snippet))))
+
+    for line in yaml_content.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped[0] == "#":
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        if snippet is not None:
+            if indent > snippet_indent:
+                snippet.append(line)
+                continue
+            flush()
+            snippet = None
+
+        if indent == 0:
+            if stripped.startswith(("---", "...")):
+                continue
+            current = stripped.split(":")[0].strip().strip("'\"")
+            headers[current] = {}
+        elif current is not None and stripped.split(":")[0] in _HEADER_KEYS:
+            snippet = [line]
+            snippet_indent = indent
+
+    flush()
+    return headers
+
+
+class ModelFile:
+    """YAML file of a model directory which only get parsed when needed"""
+
+    def __init__(self, path, cache=None):
+        self.path = Path(path)
+        self.headers = scan_types(self.path.read_text(encoding="UTF-8"))
+        self.language = None
+        self._cache = cache
+
+    @property
+    def types(self):
+        return list(self.headers)
+
+    @property
+    def loaded(self):
+        return self.language is not None
+
+    def load(self):
+        """Parse the file and return its definition"""
+        model = read_model(self.path, cache_dir=self._cache)
+        definition = model.definition if model is not None else {}
+
+        # Keep the language away from the mixins applied by the ProxyManager
+        self.language = {
+            _type: dict(lang) if isinstance(lang, dict) else lang
+            for _type, lang in definition.items()
+        }
+        return definition
+
+
+class ModelRegistry:
+    """
+    Index of the types defined by the YAML files of some model directories
+    (see ProxyManager.register_models). Files are only parsed the first time
+    one of their types, or a type using them as mixin, is needed.
+    """
+
+    def __init__(self):
+        self._files = {}  # type => ModelFile
+        self._pending = {}  # type => ModelFile not loaded yet
+
+    def __contains__(self, obj_type):
+        """True if that type is registered but not loaded yet"""
+        return obj_type in self._pending
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add_directory(self, directory, pattern="*.yaml", cache_dir=None):
+        """Index the types of the files matching pattern and return them"""
+        cache = cache_dir
+        if cache is not None and not isinstance(cache, ModelCache):
+            cache = ModelCache(cache)
+
+        types = []
+        for path in sorted(Path(directory).glob(pattern)):
+            model_file = ModelFile(path, cache)
+            for obj_type in model_file.types:
+                if obj_type in self._files:
+                    logger.warning(
+                        "%s defined in %s and %s",
+                        obj_type,
+                        self._files[obj_type].path,
+                        path,
+                    )
+                self._files[obj_type] = model_file
+                self._pending[obj_type] = model_file
+                types.append(obj_type)
+
+        return types
+
+    def file_of(self, obj_type):
+        """Return the ModelFile defining a type or None"""
+        return self._files.get(obj_type)
+
+    def pending_types(self):
+        return list(self._pending)
+
+    def collect(self, obj_types):
+        """
+        Return the files to load for those types along with the files of
+        their mixins (transitively) and flag them as loaded.
+        """
+        files = []
+        stack = [_type for _type in obj_types if _type in self._pending]
+        while stack:
+            model_file = self._pending.get(stack.pop())
+            if model_file is None or model_file in files:
+                continue
+            files.append(model_file)
+            for header in model_file.headers.values():
+                stack.extend(header.get("_mixins") or ())
+
+        for model_file in files:
+            for obj_type in model_file.types:
+                if self._pending.get(obj_type) is model_file:
+                    del self._pending[obj_type]
+
+        return files
+
+    def type_tags(self, definitions):
+        """Return the tags of the pending types like once mixed-in"""
+        headers = {_type: f.headers[_type] for _type, f in self._pending.items()}
+        lookup = ChainMap(definitions, headers)
+        result = {}
+        for obj_type, header in headers.items():
+            tags = header.get("_tags") or []
+            for mixin in resolve_mixins(lookup, obj_type):
+                tags = (lookup.get(mixin) or {}).get("_tags", tags)
+            result[obj_type] = frozenset(tags or [])
+        return result
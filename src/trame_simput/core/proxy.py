@@ -1,8 +1,9 @@
 import logging
-import yaml
+import weakref
 import json
-from pathlib import Path
-from . import mapping, domains, utils
+from contextlib import contextmanager
+from . import arrays, binary, branches, mapping, domains, history, models, query, utils
+from .schema import ProxySchema, compile_schema, resolve_mixins
 
 
 logger = logging.getLogger("simput.core.proxy")
@@ -20,12 +21,43 @@ class Proxy:
     To reset uncommitted changes, just call reset().
     Proxy properties can be access with the . and [] notation.
     Proxy have states that are easily serializable.
+
+    To keep the memory footprint low when dealing with many proxies,
+    property values are stored in fixed-size arrays following the compiled
+    schema of the proxy type and the internal containers are only allocated
+    when needed.
     """
 
+    __slots__ = (
+        "_id",
+        "_name",
+        "_mtime",
+        "_proxy_manager",
+        "_type",
+        "_schema",
+        "_values",
+        "_pushed_values",
+        "_dirty_properties",
+        "_listeners",
+        "_tags",
+        "_object_adapter",
+        "_domains",
+        "_domain_deps",
+        "_pending_domains",
+        "_domains_mtime",
+        "_domains_output",
+        "_property_mtime",
+        "_property_mtimes",
+        "_object",
+        "_own",
+        "__dict__",
+        "__weakref__",
+    )
     __id_generator = utils.create_id_generator()
     __api = set(
         [
             "definition",
+            "schema",
             "id",
             "type",
             "object",
@@ -44,6 +76,7 @@ class Proxy:
             "off",
             "state",
             "remap_ids",
+            "dispose",
         ]
     )
 
@@ -57,21 +90,34 @@ class Proxy:
         _tags=[],
         _object_adapter=None,
         skip_object_init=False,
+        _batch=False,
+        _state=None,
         **kwargs,
     ):
-        self._id = _proxy_id or next(Proxy.__id_generator)
+        self._schema = __proxy_manager.get_schema(__type)
+        if not _proxy_id:
+            _proxy_id = Proxy._next_id(__proxy_manager)
+        self._id = _proxy_id
         self._name = _name or __type
         self._mtime = __proxy_manager.mtime
         self._proxy_manager = __proxy_manager
         self._type = __type
-        self._pushed_properties = {}
-        self._properties = {}
-        self._dirty_properties = set()
-        self._listeners = set()
+        self._values = [None] * len(self._schema)
+        self._pushed_values = None
+        self._dirty_properties = None
+        self._listeners = None
         self._tags = set(_tags)
-        self._tags.update(self.definition.get("_tags", []))
+        self._tags.update(self._schema.tags)
+        if not self._tags:
+            self._tags = None
         self._object_adapter = _object_adapter
-        self._domains = {}
+        self._domains = None
+        self._domain_deps = None
+        self._pending_domains = None
+        self._domains_mtime = 0
+        self._domains_output = None
+        self._property_mtime = 0
+        self._property_mtimes = None
 
         if self._object_adapter is None:
             self._object_adapter = mapping.get_default_object_adapter()
@@ -83,41 +129,50 @@ class Proxy:
             self._object = __object
 
         # proxy id that we created and therefore that we should manage
-        self._own = set()
+        self._own = None
 
         # Handle registration
+        if self._proxy_manager._snapshots:
+            self._proxy_manager._preserve(self._id, None)
         self._proxy_manager._id_map[self._id] = self
-        for tag in self._tags:
+        self._proxy_manager._type_map.setdefault(__type, {})[self._id] = self
+        for tag in self._tags or ():
             self._proxy_manager._tag_map.setdefault(tag, set()).add(self._id)
 
         # handle initial
-        for _prop_name, _prop_def in self.definition.items():
-            if _prop_name.startswith("_"):
-                continue
+        if _state is not None:
+            self._init_state(_state)
+        elif _batch:
+            self._init_batch(kwargs)
+        else:
+            self._init_properties(kwargs)
 
-            _size = _prop_def.get("size", None)
-            _positive_size = _size is not None and isinstance(_size, int) and _size > 0
-            _init_def = _prop_def.get("initial", None)
-            _is_proxy = _prop_def.get("type", None) == "proxy"
-            _proxy_type = _prop_def.get("proxyType", None)
-            if _prop_name in kwargs:
-                self.set_property(_prop_name, kwargs[_prop_name])
-            elif isinstance(_init_def, dict):
-                logger.error("Don't know how to deal with domain yet: %s", _init_def)
-            elif _positive_size and _is_proxy and _proxy_type is not None:
-                _init_def = [
-                    self._proxy_manager.create(_proxy_type).id for _ in range(_size)
-                ]
-                self.set_property(_prop_name, _init_def)
-            else:
-                self.set_property(_prop_name, _init_def)
+        # handle domains (a restored state is already consistent)
+        self._create_domains(self._schema.names if _state is None else ())
 
-        # handle domains
-        for _prop_name, _prop_def in self.definition.items():
-            if _prop_name.startswith("_"):
-                continue
-            _prop_domains = self._domains.setdefault(_prop_name, {})
-            for domain_def in _prop_def.get("domains", []):
+        # May need several pass
+        while _state is None and self.domains_apply():
+            pass
+
+        # All domains have been evaluated
+        self._pending_domains = None
+        self._domain_deps = None
+
+        # Created: the per property stamps only get allocated on later changes
+        self._property_mtime = 1
+
+        self._object = __object
+
+    def _create_domains(self, evaluated_names):
+        """
+        Internal helper instantiating the domains declared by the schema.
+        Only the domains of the evaluated properties compute a default value,
+        the others keep the current one.
+        """
+        _schema = self._schema
+        for _prop_name, _domain_defs in zip(_schema.names, _schema.domains):
+            _prop_domains = {}
+            for domain_def in _domain_defs:
                 _type = domain_def.get("type")
                 _name = domain_def.get("name", _type)
                 _prop_domain = domains.create_property_domain(
@@ -141,23 +196,272 @@ class Proxy:
                     _prop_domains[f"{_name}_{count}"] = _prop_domain
 
                 # Try default set
-                _prop_domain.set_value()
+                if _prop_name in evaluated_names:
+                    _prop_domain.set_value()
+                else:
+                    _prop_domain.disable_set_value()
+
+            if _prop_domains:
+                if self._domains is None:
+                    self._domains = {}
+                self._domains[_prop_name] = _prop_domains
+
+    @staticmethod
+    def _next_id(proxy_manager):
+        """Internal helper returning an unused proxy id"""
+        _proxy_id = next(Proxy.__id_generator)
+        # Skip the ids kept when restoring a saved state
+        while _proxy_id in proxy_manager._id_map:
+            _proxy_id = next(Proxy.__id_generator)
+        return _proxy_id
+
+    def _init_properties(self, values):
+        """Internal helper to set the initial values of all the properties"""
+        self._check_values(values)
+        _schema = self._schema
+        for _idx, _prop_name in enumerate(_schema.names):
+            _size = _schema.sizes[_idx]
+            _positive_size = _size is not None and isinstance(_size, int) and _size > 0
+            _init_def = _schema.initials[_idx]
+            _proxy_type = _schema.proxy_types[_idx]
+            if _prop_name in values:
+                self.set_property(_prop_name, values[_prop_name])
+            elif isinstance(_init_def, dict):
+                logger.error("Don't know how to deal with domain yet: %s", _init_def)
+            elif _positive_size and _schema.is_proxy[_idx] and _proxy_type is not None:
+                _init_def = [
+                    self._proxy_manager.create(_proxy_type).id for _ in range(_size)
+                ]
+                self.set_property(_prop_name, _init_def)
+            else:
+                self.set_property(_prop_name, _init_def)
+
+    def _init_batch(self, values):
+        """
+        Internal helper equivalent to _init_properties() but which directly
+        fill the value slots of a freshly created proxy rather than going
+        through set_property() for each property.
+        """
+        self._check_values(values)
+        _schema = self._schema
+        _values = self._values
+        _dirty = set()
+        for _idx, _prop_name in enumerate(_schema.names):
+            _size = _schema.sizes[_idx]
+            _positive_size = _size is not None and isinstance(_size, int) and _size > 0
+            _init_def = _schema.initials[_idx]
+            _proxy_type = _schema.proxy_types[_idx]
+            if _prop_name in values:
+                _value = values[_prop_name]
+                if _value is not None and _schema.is_proxy[_idx]:
+                    if isinstance(_value, list):
+                        if len(_value) > 0 and not isinstance(_value[0], str):
+                            _value = [val.id for val in _value]
+                    elif not isinstance(_value, str):
+                        _value = _value.id
+                elif _value is not None and _schema.array_types[_idx] is not None:
+                    _value = arrays.to_typed_array(_value, _schema.array_types[_idx])
+            elif isinstance(_init_def, dict):
+                logger.error("Don't know how to deal with domain yet: %s", _init_def)
+                _value = None
+            elif _positive_size and _schema.is_proxy[_idx] and _proxy_type is not None:
+                _value = [
+                    proxy.id
+                    for proxy in self._proxy_manager.create_many(_proxy_type, _size)
+                ]
+            else:
+                _value = _init_def
+
+            _values[_idx] = _value
+            if _value is not None:
+                _dirty.add(_prop_name)
+
+        self._register_values(_dirty)
+
+    def _check_values(self, values):
+        """Internal helper reporting the initial values without definition"""
+        for _prop_name in values:
+            if _prop_name not in self._schema.index:
+                logger.warning("No definition found for '%s'", _prop_name)
+
+    def _init_state(self, state):
+        """
+        Internal helper to directly fill the value slots of a freshly
+        created proxy from an exported state (see ProxyManager.load).
+        """
+        _schema = self._schema
+        _values = self._values
+        _properties = state.get("properties", {})
+        _dirty = set()
+        for _idx, _prop_name in enumerate(_schema.names):
+            if _prop_name in _properties:
+                _value = _properties[_prop_name]
+                if _value is not None and _schema.array_types[_idx] is not None:
+                    _value = arrays.to_typed_array(_value, _schema.array_types[_idx])
+            elif _schema.is_proxy[_idx]:
+                _value = None
+            else:
+                _value = _schema.initials[_idx]
+
+            _values[_idx] = _value
+            if _value is not None:
+                _dirty.add(_prop_name)
+
+        self._own = set(state.get("own", ())) or None
+        self._register_values(_dirty)
+
+    def _migrate(self, schema):
+        """
+        Internal helper moving a live proxy to the new schema of its redefined
+        type. Values are remapped by property name, added properties get their
+        initial value and the references/indexes of removed ones are released.
+        """
+        _old = self._schema
+        if schema is _old:
+            return
+
+        self._preserve()
+        _pxm = self._proxy_manager
+        _values = self._values
+        _pushed = self._pushed_values
+        for _idx, _prop_name in enumerate(_old.names):
+            _new_idx = schema.index.get(_prop_name)
+            _value = _values[_idx]
+            if _new_idx is None and _value is not None and _old.is_proxy[_idx]:
+                _pxm._update_references(self._id, _prop_name, _value, None)
+            if _old.indexed[_idx] and (
+                _new_idx is None or not schema.indexed[_new_idx]
+            ):
+                self._reindex(_idx, _value, None)
+            if _new_idx is None:
+                if self._dirty_properties:
+                    self._dirty_properties.discard(_prop_name)
+                if self._property_mtimes:
+                    self._property_mtimes.pop(_prop_name, None)
+
+        new_values = [None] * len(schema)
+        new_pushed = None if _pushed is None else [None] * len(schema)
+        added = []
+        for _idx, _prop_name in enumerate(schema.names):
+            _old_idx = _old.index.get(_prop_name)
+            if _old_idx is None:
+                if not schema.is_proxy[_idx]:
+                    new_values[_idx] = schema.initials[_idx]
+                if new_values[_idx] is not None:
+                    added.append(_prop_name)
+                continue
+
+            _value = _values[_old_idx]
+            _dtype = schema.array_types[_idx]
+            if _value is not None and _dtype != _old.array_types[_old_idx]:
+                _value = (
+                    _value if _dtype is None else arrays.to_typed_array(_value, _dtype)
+                )
+            new_values[_idx] = _value
+            if new_pushed is not None:
+                new_pushed[_idx] = _pushed[_old_idx]
+
+        self._schema = schema
+        self._values = new_values
+        self._pushed_values = new_pushed
+        for _idx, _prop_name in enumerate(schema.names):
+            # (existing values got indexed when the index was declared)
+            if schema.indexed[_idx] and _prop_name not in _old.index:
+                self._reindex(_idx, None, new_values[_idx])
+
+        previous_tags = set(self._tags or ())
+        tags = previous_tags.difference(_old.tags).union(schema.tags)
+        if tags != previous_tags:
+            self._tags = tags or None
+            _pxm._update_tag_map(self._id, previous_tags, tags)
+            self._touch("_tags")
+
+        if added:
+            if self._dirty_properties is None:
+                self._dirty_properties = set()
+            self._dirty_properties.update(added)
+            self._touch(*added)
+            _pxm.dirty_proxy(self._id)
+
+        # Domains follow the new definitions, only the added properties
+        # compute a default value
+        self._domains = None
+        self._domain_deps = None
+        self._create_domains(added)
+        while added and self.domains_apply(*added):
+            pass
+        self._domains_output = None
+        self._domains_mtime += 1
+
+        if self._object and added:
+            self._update_object(*added)
+
+    def _init_domains(self):
+        """
+        Internal helper evaluating the domains of a proxy built from a state
+        which was never checked against them (see ProxyManagerBranch) like
+        they are for a newly created proxy.
+        """
+        for prop_domains in (self._domains or {}).values():
+            for domain in prop_domains.values():
+                if domain._need_set:
+                    domain.enable_set_value()
 
-        # May need several pass
         while self.domains_apply():
             pass
+        self._pending_domains = None
+
+    def _register_values(self, _dirty):
+        """Internal helper registering the initial values of a proxy"""
+        _schema = self._schema
+        _values = self._values
+        for _idx, _value in enumerate(_values):
+            if _value is None:
+                continue
+            if _schema.is_proxy[_idx]:
+                self._proxy_manager._update_references(
+                    self._id, _schema.names[_idx], None, _value
+                )
+            if _schema.indexed[_idx]:
+                self._reindex(_idx, None, _value)
 
-        self._object = __object
+        if _dirty:
+            self._dirty_properties = _dirty
+            self._proxy_manager.dirty_proxy(self._id)
+
+        if self._object:
+            self._update_object(*_schema.names)
 
     def __del__(self):
-        if self._object_adapter:
-            self._object_adapter.before_delete(self)
+        self.dispose()
         logger.info("Proxy deleted %s[%s]", self.type, self.id)
 
+    def dispose(self):
+        """
+        Release the concrete object and the domains of that proxy.
+        The object adapter before_delete() is only called once, either by
+        ProxyManager.delete() or when the proxy get garbage collected.
+        """
+        adapter = self._object_adapter
+        if adapter:
+            self._object_adapter = None
+            adapter.before_delete(self)
+
+        self._object = None
+        self._domains = None
+        self._domain_deps = None
+        self._domains_output = None
+        self._listeners = None
+
     @property
     def definition(self):
         """Return Proxy definition"""
-        return self._proxy_manager.get_definition(self._type)
+        return self._schema.definition
+
+    @property
+    def schema(self) -> ProxySchema:
+        """Return the compiled definition used by that proxy"""
+        return self._schema
 
     @property
     def id(self):
@@ -191,26 +495,39 @@ class Proxy:
     @property
     def edited_property_names(self):
         """Return the list of properties that needs to be pushed"""
+        if self._dirty_properties is None:
+            return set()
         return self._dirty_properties
 
     @property
     def tags(self):
         """Return the list of tags of that proxy"""
+        if self._tags is None:
+            self._tags = set()
         return self._tags
 
     @tags.setter
     def tags(self, value):
         """Update proxy tag"""
+        self._preserve()
+        previous_tags = self._tags or set()
         self._tags = set(value)
+        self._proxy_manager._update_tag_map(self._id, previous_tags, self._tags)
+        self._touch("_tags")
 
     @property
     def own(self):
         """List of proxy ids we created"""
+        if self._own is None:
+            self._own = set()
         return self._own
 
     @own.setter
     def own(self, ids):
         """Update list of proxy we own"""
+        self._preserve()
+        if self._own is None:
+            self._own = set()
         if isinstance(ids, str):
             # single id
             self._own.add(ids)
@@ -218,63 +535,185 @@ class Proxy:
             self._own.add(ids.id)
         else:
             self._own.update(ids)
+        self._touch("_own")
+
+    @property
+    def property_mtime(self):
+        """Return the modification stamp of the latest change of that proxy state"""
+        return self._property_mtime
+
+    def _preserve(self):
+        """
+        Internal helper handing the current state to the live snapshots
+        before it get modified (see ProxyManager.snapshot)
+        """
+        if self._proxy_manager._snapshots:
+            self._proxy_manager._preserve(self._id, self)
+
+    def _touch(self, *names):
+        """
+        Internal helper to record a new modification stamp for the given
+        property names (or '_tags', '_own').
+        Nothing is recorded while the proxy is being created, a missing
+        stamp stands for the creation one (see state_delta).
+        """
+        if not self._property_mtime:
+            return
+        self._property_mtime += 1
+        if self._property_mtimes is None:
+            self._property_mtimes = {}
+        for name in names:
+            self._property_mtimes[name] = self._property_mtime
 
     def set_property(self, name, value):
         """Update a property on that proxy"""
+        change_detected = self._assign(name, value)
+        if change_detected is None:
+            return False
+
+        if self._object:
+            self._update_object(name)
+
+        self._emit(
+            "update",
+            modified=change_detected,
+            property_name=name,
+            properties_dirty=list(self._dirty_properties or ()),
+        )
+
+        return change_detected
+
+    def set_properties(self, values):
+        """
+        Update several properties on that proxy at once with a single adapter
+        update and a single update event.
+        Return the list of property names that got modified.
+        """
+        names = []
+        modified = []
+        for name, value in values.items():
+            change_detected = self._assign(name, value)
+            if change_detected is None:
+                continue
+            names.append(name)
+            if change_detected:
+                modified.append(name)
+
+        if not names:
+            return modified
+
+        if self._object:
+            self._update_object(*names)
+
+        self._emit(
+            "update",
+            modified=len(modified) > 0,
+            properties_change=names,
+            properties_dirty=list(self._dirty_properties or ()),
+        )
+
+        return modified
+
+    def _assign(self, name, value):
+        """
+        Internal helper storing a property value and tracking its change.
+        Return whether the proxy got modified or None for unknown property.
+        """
         # convert any invalid indirect value (proxy)
-        definition = self.definition.get(name, None)
-        if definition is None:
+        idx = self._schema.index.get(name)
+        if idx is None:
             logger.warn("No definition found for '%s'", name)
-            return False
-        prop_type = definition.get("type", "string")
+            return None
         safe_value = value
         if value is not None:
-            if prop_type == "proxy":
+            if self._schema.is_proxy[idx]:
                 if isinstance(value, list):
                     if len(value) > 0 and not isinstance(value[0], str):
                         safe_value = [val.id for val in value]
                 elif not isinstance(value, str):
                     safe_value = value.id
+            elif self._schema.array_types[idx] is not None:
+                safe_value = arrays.to_typed_array(value, self._schema.array_types[idx])
 
         # check if change
         change_detected = False
-        prev_value = self._properties.get(name, None)
-        saved_value = self._pushed_properties.get(name, None)
-        if utils.is_equal(safe_value, saved_value):
-            self._dirty_properties.discard(name)
-        elif not utils.is_equal(safe_value, prev_value):
+        value_changed = False
+        tolerance = self._schema.tolerances[idx]
+        prev_value = self._values[idx]
+        saved_value = None
+        if self._pushed_values is not None:
+            saved_value = self._pushed_values[idx]
+        if utils.is_equal(safe_value, saved_value, tolerance):
+            if tolerance:
+                # keep the committed value rather than a jittered one
+                safe_value = saved_value
+            if self._dirty_properties and name in self._dirty_properties:
+                # back to its committed value
+                self._dirty_properties.discard(name)
+                value_changed = True
+        elif prev_value is saved_value or not utils.is_equal(
+            safe_value, prev_value, tolerance
+        ):
+            # (no need to compare twice against the same value)
+            if self._dirty_properties is None:
+                self._dirty_properties = set()
             self._dirty_properties.add(name)
             change_detected = True
-        self._properties[name] = safe_value
+            value_changed = True
+        elif tolerance:
+            safe_value = prev_value
+        if safe_value is not prev_value and self._proxy_manager._snapshots:
+            self._preserve()
+        self._values[idx] = safe_value
+
+        if safe_value is not prev_value:
+            if self._schema.is_proxy[idx]:
+                self._proxy_manager._update_references(
+                    self._id, name, prev_value, safe_value
+                )
+            if self._schema.indexed[idx]:
+                self._reindex(idx, prev_value, safe_value)
+
+        if value_changed:
+            self._touch(name)
+            if self._domains is not None:
+                self.domains_invalidate(name)
+            if self._proxy_manager._history is not None:
+                self._proxy_manager._history.record(
+                    self._id, name, prev_value, safe_value
+                )
 
         if change_detected:
             self._proxy_manager.dirty_proxy(self._id)
-
-        if self._object:
-            self._object_adapter.update(self, name)
-
-        self._emit(
-            "update",
-            modified=change_detected,
-            property_name=name,
-            properties_dirty=list(self._dirty_properties),
-        )
+            if self._domains is not None:
+                if self._pending_domains is None:
+                    self._pending_domains = set()
+                self._pending_domains.add(name)
 
         return change_detected
 
+    def _reindex(self, idx, previous_value, value):
+        """Internal helper to keep the secondary index of a property in sync"""
+        index = self._proxy_manager._indexes.get((self._type, self._schema.names[idx]))
+        if index is not None:
+            index.update(self._id, previous_value, value)
+
     def get_property(self, name, default=None):
         """Return a property value"""
-        value = self._properties.get(name, default)
-        if "proxy" == self.definition.get(name, {}).get("type"):
+        idx = self._schema.index.get(name)
+        if idx is None:
+            return default
+        value = self._values[idx]
+        if self._schema.is_proxy[idx]:
             if isinstance(value, list):
                 return [self._proxy_manager.get(proxy_id) for proxy_id in value]
-            return self._proxy_manager.get(self._properties.get(name))
+            return self._proxy_manager.get(value)
 
         return value
 
     def list_property_names(self):
         """Return the list of property names"""
-        return [name for name in self.definition if not name.startswith("_")]
+        return list(self._schema.names)
 
     def commit(self):
         """Flush modified properties"""
@@ -282,15 +721,21 @@ class Proxy:
         if self._dirty_properties:
             properties_dirty = list(self._dirty_properties)
             if self._object:
+                self._flush_object_updates()
                 self._object_adapter.commit(self)
 
-            self._pushed_properties.update(self._properties)
-            self._dirty_properties.clear()
+            self._pushed_values = list(self._values)
+            self._dirty_properties = None
+            self._proxy_manager._life_cycle(
+                "proxy_commit", proxy_id=self._id, properties_dirty=properties_dirty
+            )
 
-            for _sub_id in self.own:
+            for _sub_id in self._own or ():
                 self._proxy_manager.get(_sub_id).commit()
 
             self._emit("commit", properties_dirty=properties_dirty)
+            if self._proxy_manager._history is not None:
+                self._proxy_manager._history.seal()
             return True
         return False
 
@@ -299,13 +744,36 @@ class Proxy:
         self._proxy_manager.clean_proxy_data(self._id)
         if self._dirty_properties:
             properties_dirty = list(self._dirty_properties)
-            self._dirty_properties.clear()
-            self._properties.update(self._pushed_properties)
+            self._dirty_properties = None
+            history = self._proxy_manager._history
+            if self._pushed_values is not None:
+                self._preserve()
+                for name in properties_dirty:
+                    idx = self._schema.index[name]
+                    if history is not None:
+                        history.record(
+                            self._id, name, self._values[idx], self._pushed_values[idx]
+                        )
+                    if self._schema.is_proxy[idx]:
+                        self._proxy_manager._update_references(
+                            self._id, name, self._values[idx], self._pushed_values[idx]
+                        )
+                    if self._schema.indexed[idx]:
+                        self._reindex(idx, self._values[idx], self._pushed_values[idx])
+                self._values[:] = self._pushed_values
+                self._touch(*properties_dirty)
+                self.domains_invalidate(*properties_dirty)
 
             if self._object:
+                self._flush_object_updates()
                 self._object_adapter.reset(self, properties_dirty)
 
+            self._proxy_manager._life_cycle(
+                "proxy_reset", proxy_id=self._id, properties_dirty=properties_dirty
+            )
             self._emit("reset", properties_dirty=properties_dirty)
+            if history is not None:
+                history.seal()
             return True
 
     def fetch(self):
@@ -319,13 +787,38 @@ class Proxy:
         => topic='commit' | properties_dirty=[]
         => topic='update' | modified=bool, properties_dirty=[], properties_change=[]
         """
+        if self._listeners is None:
+            self._listeners = set()
         self._listeners.add(fn)
 
     def off(self, fn):
         """Unegister listener"""
-        self._listeners.discard(fn)
+        if self._listeners is not None:
+            self._listeners.discard(fn)
+
+    def _update_object(self, *property_names):
+        """Forward property changes to the adapter (deferred in transaction)"""
+        transaction = self._proxy_manager._transaction
+        if transaction is not None:
+            transaction.defer_object_update(self, property_names)
+        else:
+            self._object_adapter.update(self, *property_names)
+
+    def _flush_object_updates(self):
+        """Forward the deferred property changes before a commit/reset"""
+        transaction = self._proxy_manager._transaction
+        if transaction is not None:
+            property_names = transaction.pop_object_updates(self)
+            if property_names:
+                self._object_adapter.update(self, *property_names)
 
     def _emit(self, topic, *args, **kwargs):
+        if not self._listeners:
+            return
+        transaction = self._proxy_manager._transaction
+        if transaction is not None and not args:
+            transaction.defer_proxy_event(self, topic, kwargs)
+            return
         for fn in self._listeners:
             try:
                 fn(topic, *args, **kwargs)
@@ -335,7 +828,7 @@ class Proxy:
     def __getitem__(self, name):
         """value = proxy[prop_name]"""
 
-        if self._properties and name in self._properties:
+        if self._schema and name in self._schema.index:
             return self.get_property(name)
 
         logger.error("Proxy[%s] not found", name)
@@ -344,11 +837,11 @@ class Proxy:
 
     def __setitem__(self, name, value):
         """proxy[prop_name] = value"""
-        if name in self._properties and self.set_property(name, value):
+        if name in self._schema.index and self.set_property(name, value):
             self._emit(
                 "update",
                 modified=True,
-                properties_dirty=list(self._dirty_properties),
+                properties_dirty=list(self._dirty_properties or ()),
                 properties_change=[name],
             )
         else:
@@ -369,8 +862,9 @@ class Proxy:
         """proxy.prop_name = value"""
         if name.startswith("_"):
             super().__setattr__(name, value)
+            return
 
-        if self._properties and name in self._properties:
+        if self._schema and name in self._schema.index:
             self.__setitem__(name, value)
         else:
             super().__setattr__(name, value)
@@ -378,55 +872,88 @@ class Proxy:
     @property
     def state(self):
         """Return proxy state that is easily serializable"""
-        _properties = {}
-        _obj_def = self.definition
-
-        for prop_name, prop_def in _obj_def.items():
-            if prop_name.startswith("_"):
-                continue
-
-            _properties[prop_name] = self._properties.get(prop_name, None)
-
         return {
             "id": self._id,
             "type": self._type,
             "name": self._name,
-            "tags": list(self._tags),
+            "tags": list(self._tags or ()),
             "mtime": self._mtime,
-            "own": list(self._own),
-            "properties": _properties,
+            "own": list(self._own or ()),
+            "properties": dict(zip(self._schema.names, self._values)),
         }
 
+    def state_delta(self, since_mtime):
+        """
+        Return the part of the proxy state that changed after the provided
+        modification stamp (see property_mtime).
+        """
+        # Missing stamps mean unchanged since the creation (mtime 1)
+        mtimes = self._property_mtimes or {}
+        delta = {
+            "id": self._id,
+            "type": self._type,
+            "name": self._name,
+            "mtime": self._mtime,
+            "properties": {
+                name: self._values[idx]
+                for idx, name in enumerate(self._schema.names)
+                if mtimes.get(name, 1) > since_mtime
+            },
+        }
+        if mtimes.get("_tags", 1) > since_mtime:
+            delta["tags"] = list(self._tags or ())
+        if mtimes.get("_own", 1) > since_mtime:
+            delta["own"] = list(self._own or ())
+
+        return delta
+
     @state.setter
     def state(self, value):
         """Use to rebuild a proxy state from an exported state"""
-        self._own = set(value.get("own", []))
-        self._tags.update(value.get("tags", []))
+        self._preserve()
+        self._own = set(value.get("own", [])) or None
+        previous_tags = set(self._tags or ())
+        self.tags.update(value.get("tags", []))
+        self._proxy_manager._update_tag_map(self._id, previous_tags, self._tags)
+        self._touch("_tags", "_own")
         for prop_name, prop_value in value.get("properties", {}).items():
             self.set_property(prop_name, prop_value)
 
-        for tag in self._tags:
-            self._proxy_manager._tag_map.setdefault(tag, set()).add(self._id)
-
     def remap_ids(self, id_map):
         """Use to remap id when reloading an exported state"""
+        self._preserve()
         # Update proxy dependency
-        _new_own = set()
-        for old_id in self._own:
-            _new_own.add(id_map[old_id])
-        self._own = _new_own
-
-        # Update proxy props
-        for prop_name, prop_def in self.definition.items():
-            if prop_name.startswith("_"):
-                continue
-            if prop_def.get("type", "") == "proxy":
-                self._properties[prop_name] = id_map[self._properties[prop_name]]
+        if self._own:
+            self._own = set(id_map[old_id] for old_id in self._own if old_id in id_map)
+
+        # Update proxy props (ids missing from the map are dangling references)
+        remapped = ["_own"]
+        for idx, is_proxy in enumerate(self._schema.is_proxy):
+            if is_proxy:
+                previous_value = self._values[idx]
+                if isinstance(previous_value, list):
+                    self._values[idx] = [
+                        id_map[v] for v in previous_value if v in id_map
+                    ]
+                else:
+                    self._values[idx] = id_map.get(previous_value)
+                remapped.append(self._schema.names[idx])
+                self._proxy_manager._update_references(
+                    self._id, self._schema.names[idx], previous_value, self._values[idx]
+                )
+                if self._schema.indexed[idx]:
+                    self._reindex(idx, previous_value, self._values[idx])
+
+        self._touch(*remapped)
+
+        self.domains_invalidate()
 
     # domain api --------------------------------------------------------------
 
     def get_property_domains(self, property_name):
         """Helper to get the map of domains linked to a property"""
+        if self._domains is None:
+            return {}
         return self._domains.get(property_name, {})
 
     def domains_apply(self, *property_names):
@@ -436,6 +963,8 @@ class Proxy:
         """
         change_count = 0
         selection = self._domains
+        if selection is None:
+            return change_count
 
         # Filter execution scope
         if property_names:
@@ -451,6 +980,64 @@ class Proxy:
 
         return change_count
 
+    def _domain_dependencies(self):
+        """
+        Internal helper returning the reverse index of the domains
+        (property name => [domains]) that depend on a given property.
+        """
+        if self._domain_deps is None:
+            self._domain_deps = {}
+            for prop_domains in (self._domains or {}).values():
+                for domain in prop_domains.values():
+                    for name in domain._dependent_properties:
+                        self._domain_deps.setdefault(name, []).append(domain)
+
+        return self._domain_deps
+
+    def domains_invalidate(self, *property_names):
+        """
+        Flag as outdated the cached evaluation of the domains depending on
+        the provided properties or all of them if no name is provided.
+        """
+        if self._domains is None:
+            return
+
+        if not property_names:
+            for prop_domains in self._domains.values():
+                for domain in prop_domains.values():
+                    domain.invalidate()
+            return
+
+        dependencies = self._domain_dependencies()
+        for name in property_names:
+            for domain in dependencies.get(name, ()):
+                domain.invalidate()
+
+    def domains_apply_pending(self):
+        """
+        Only evaluate the domains depending on the properties that changed
+        since the last evaluation and keep going with the properties that
+        those domains may have updated.
+        Return the number of properties that have been updated.
+        """
+        change_count = 0
+        dependencies = self._domain_dependencies()
+        while self._pending_domains:
+            property_names = self._pending_domains
+            self._pending_domains = None
+
+            # Evaluate each dependent domain once per pass
+            selection = {}
+            for name in property_names:
+                for domain in dependencies.get(name, ()):
+                    selection[id(domain)] = domain
+
+            for domain in selection.values():
+                if domain.set_value():
+                    change_count += 1
+
+        return change_count
+
     @property
     def domains_state(self):
         """
@@ -458,6 +1045,7 @@ class Proxy:
         This include for each property and each domain a `valid` and `available`
         property.
         Also at the property level a list of `hints`.
+        Only the domains that have been invalidated get re-evaluated.
 
         ```
         state = {
@@ -483,15 +1071,23 @@ class Proxy:
         }
         ```
         """
+        if self._domains is None:
+            return {}
+
+        self._update_domains_state()
+        if self._domains_output is not None:
+            return self._domains_output
+
         output = {}
         for prop_name, prop_domains in self._domains.items():
             prop_info = {}
             hints = []
 
             for domain_name, domain_inst in prop_domains.items():
-                available = domain_inst.available()
-                valid = domain_inst.valid()
-                hints += domain_inst.hints()
+                domain_state = domain_inst.state
+                available = domain_state["available"]
+                valid = domain_state["valid"]
+                hints += domain_state["hints"]
                 if available or not valid:
                     prop_info[domain_name] = {"available": available, "valid": valid}
 
@@ -499,12 +1095,142 @@ class Proxy:
                 prop_info["hints"] = hints
                 output[prop_name] = prop_info
 
+        self._domains_output = output
         return output
 
+    @property
+    def domains_mtime(self):
+        """
+        Return a counter that get incremented each time the evaluation of the
+        domains differs from the previous one. This provide a cheap way to
+        know if domains_state has changed.
+        """
+        self._update_domains_state()
+        return self._domains_mtime
+
+    def _update_domains_state(self):
+        """Internal helper to re-evaluate outdated domains"""
+        if self._domains is None:
+            return
+
+        change_detected = False
+        for prop_domains in self._domains.values():
+            for domain in prop_domains.values():
+                if domain.update_state():
+                    change_detected = True
+
+        if change_detected:
+            self._domains_mtime += 1
+            self._domains_output = None
+
+
+# -----------------------------------------------------------------------------
+# Transaction
+# -----------------------------------------------------------------------------
+
+
+class Transaction:
+    """
+    Keep track of the work deferred while a ProxyManager.transaction() is
+    active so it can be flushed once when the transaction exits:
+    - adapter updates are merged into a single update(proxy, *names) per proxy
+    - proxy events are merged into a single event per topic and proxy
+    - manager events are merged into a single event per topic with all ids
+
+    After the exit, domains_ids and data_ids capture the proxies for which
+    the domains got evaluated and the ones for which they changed values.
+    """
+
+    def __init__(self, proxy_manager, apply_domains=True):
+        self._proxy_manager = proxy_manager
+        self._apply_domains = apply_domains
+        self._object_updates = {}
+        self._proxy_events = {}
+        self._events = {}
+        self.domains_ids = set()
+        self.data_ids = set()
+
+    def defer_object_update(self, proxy, property_names):
+        names = self._object_updates.setdefault(proxy, {})
+        for name in property_names:
+            names[name] = True
+
+    def pop_object_updates(self, proxy):
+        return list(self._object_updates.pop(proxy, ()))
+
+    def defer_proxy_event(self, proxy, topic, kwargs):
+        event = self._proxy_events.setdefault(proxy, {}).setdefault(topic, {})
+        if topic == "update":
+            event["modified"] = event.get("modified") or kwargs.get("modified", False)
+            names = event.setdefault("properties_change", {})
+            if "property_name" in kwargs:
+                event["property_name"] = kwargs["property_name"]
+                names[kwargs["property_name"]] = True
+            for name in kwargs.get("properties_change", ()):
+                names[name] = True
+        elif topic in ("commit", "reset"):
+            names = event.setdefault("properties_dirty", {})
+            for name in kwargs.get("properties_dirty", ()):
+                names[name] = True
+        else:
+            event.update(kwargs)
+
+    def defer_event(self, topic, kwargs):
+        event = self._events.setdefault(topic, {})
+        for key, value in kwargs.items():
+            if key == "ids":
+                ids = event.setdefault("ids", {})
+                for _id in value:
+                    ids[_id] = True
+            else:
+                event[key] = value
+
+    def flush(self):
+        """Run the deferred work (transaction needs to be closed)"""
+        pxm = self._proxy_manager
+
+        # Adapter updates (proxies may have been deleted in the meantime)
+        for proxy, names in self._object_updates.items():
+            if proxy._object and pxm.get(proxy.id) is proxy:
+                proxy._object_adapter.update(proxy, *names)
+
+        # Proxy events
+        for proxy, events in self._proxy_events.items():
+            for topic, event in events.items():
+                if topic == "update":
+                    event["properties_change"] = list(event["properties_change"])
+                    event["properties_dirty"] = list(proxy._dirty_properties or ())
+                elif "properties_dirty" in event:
+                    event["properties_dirty"] = list(event["properties_dirty"])
+                proxy._emit(topic, **event)
+
+        # Manager events
+        if self.data_ids:
+            self.defer_event("changed", {"ids": self.data_ids})
+        for topic, event in self._events.items():
+            if "ids" in event:
+                event["ids"] = list(event["ids"])
+            pxm._emit(topic, **event)
+
+        self._object_updates = {}
+        self._proxy_events = {}
+        self._events = {}
+
 
 # -----------------------------------------------------------------------------
 # ProxyManager
 # -----------------------------------------------------------------------------
+
+
+def _referenced_ids(value):
+    """Return the set of proxy ids held by a proxy property value"""
+    if value is None:
+        return set()
+    if isinstance(value, (list, tuple)):
+        return set(v for v in value if v is not None)
+    return set([value])
+
+
 class ProxyManager:
     """
     A ProxyManager needs to load some definitions in order to be able to create
@@ -529,10 +1255,20 @@ class ProxyManager:
         self._obj_adapter = object_adapter
 
         self._model_definition = {}
+        self._schemas = {}
         self._id_map = {}
         self._tag_map = {}
+        self._type_map = {}
+        self._type_tags = {}
+        self._indexes = {}
+        self._referrers = {}
         self.dirty_proxy_data = set()
         self.dirty_proxy_domains = set()
+        self._registry = models.ModelRegistry()
+        self._shared_models = []
+        self._transaction = None
+        self._history = None
+        self._snapshots = weakref.WeakSet()
 
     @property
     def id(self):
@@ -560,10 +1296,11 @@ class ProxyManager:
             if name.startswith("_"):
                 continue
             object_definition = self._model_definition.get(name, {})
-            mixins = object_definition.get("_mixins", [])
-            for mixin_name in mixins:
+            for mixin_name in resolve_mixins(self._model_definition, name):
                 mixin = self._model_definition.get(mixin_name, {})
-                object_definition.update(mixin)
+                object_definition.update(
+                    {k: v for k, v in mixin.items() if k != "_mixins"}
+                )
 
     # -------------------------------------------------------------------------
     # Event handling
@@ -572,7 +1309,9 @@ class ProxyManager:
     def _life_cycle(self, cycle, **kwargs):
         """Call lyfe cycle listeners"""
         for listener in self._life_cycle_listeners:
-            getattr(listener, cycle)(**kwargs)
+            fn = getattr(listener, cycle, None)
+            if fn is not None:
+                fn(**kwargs)
 
     def add_life_cycle_listener(self, listener):
         """Register life cycle listener"""
@@ -585,9 +1324,129 @@ class ProxyManager:
         self._life_cycle_listeners.discard(listener)
 
     def _emit(self, topic, **kwargs):
+        if self._transaction is not None:
+            self._transaction.defer_event(topic, kwargs)
+            return
         for listener in self._listeners:
             listener(topic, **kwargs)
 
+    @contextmanager
+    def transaction(self, apply_domains=True):
+        """
+        Context manager deferring listener events, adapter updates and the
+        domains evaluation until its exit where they get executed once.
+        Nested transactions are merged into the outer one.
+        If the body raises, the domains are not evaluated but the deferred
+        work of the values already assigned is still flushed before the
+        exception propagates, so objects and listeners stay in sync.
+
+        with pxm.transaction() as tx:
+            for proxy in proxies:
+                proxy.set_property("Radius", 0.5)
+
+        print(tx.data_ids)  # proxies updated by their domains
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        transaction = Transaction(self, apply_domains)
+        self._transaction = transaction
+        try:
+            with self._history_step():
+                yield transaction
+                if transaction._apply_domains:
+                    # Domains can edit properties, keep deferring their work
+                    domains_ids, data_ids = self.apply_domains()
+                    transaction.domains_ids.update(domains_ids)
+                    transaction.data_ids.update(data_ids)
+        finally:
+            self._transaction = None
+            transaction.flush()
+
+    # -------------------------------------------------------------------------
+    # Undo / Redo
+    # -------------------------------------------------------------------------
+
+    @property
+    def history(self):
+        """Undo/redo history or None when not enabled (see enable_history)"""
+        return self._history
+
+    def enable_history(self, memory_budget=None):
+        """
+        Start recording the changes made to the proxies so they can be
+        undone/redone. The oldest changes get dropped once the estimated
+        memory used by the history exceed memory_budget (in bytes).
+        """
+        if memory_budget is None:
+            memory_budget = history.DEFAULT_MEMORY_BUDGET
+        if self._history is None:
+            self._history = history.History(self, memory_budget)
+        else:
+            self._history.memory_budget = memory_budget
+        return self._history
+
+    def disable_history(self):
+        """Stop recording changes and release the history"""
+        self._history = None
+
+    @contextmanager
+    def _history_paused(self, changes_only=False):
+        """Internal helper to not record the changes made within that block"""
+        _history = self._history
+        if _history is None:
+            yield
+            return
+
+        _history.pause(changes_only)
+        try:
+            yield
+        finally:
+            _history.resume(changes_only)
+
+    @contextmanager
+    def _history_step(self):
+        """Internal helper grouping the changes of an operation in one step"""
+        _history = self._history
+        if _history is None:
+            yield
+            return
+
+        _history.begin()
+        try:
+            yield
+        finally:
+            _history.end()
+
+    # -------------------------------------------------------------------------
+    # Snapshots / Branches
+    # -------------------------------------------------------------------------
+
+    def snapshot(self):
+        """
+        Return a read-only view of the proxies as they are now which shares
+        their state with the live one (see core/branches.py). Proxies only get
+        copied into the snapshot before being modified or deleted.
+        """
+        return branches.ProxyManagerSnapshot(self)
+
+    def branch(self):
+        """
+        Return a writable copy of the proxies which only copies the proxies
+        it modifies and which can be diffed and merged back.
+        """
+        return branches.ProxyManagerBranch(self.snapshot())
+
+    def _preserve(self, proxy_id, proxy):
+        """Internal helper saving a proxy state (None if new) into the snapshots"""
+        for snapshot in self._snapshots:
+            snapshot._preserve(proxy_id, proxy)
+
+    def _new_proxy_id(self):
+        """Internal helper reserving an id for a proxy to be created later"""
+        return Proxy._next_id(self)
+
     def on(self, fn_callback):
         """
         Register callback when something is changing in ProxyManager.
@@ -611,37 +1470,202 @@ class ProxyManager:
     # Definition handling
     # -------------------------------------------------------------------------
 
-    def load_model(self, yaml_file=None, yaml_content=None):
-        """Load Data Model from YAML definition"""
-        if yaml_file:
-            path = Path(yaml_file)
-            if path.exists():
-                yaml_content = path.read_text(encoding="UTF-8")
+    def load_model(
+        self,
+        yaml_file=None,
+        yaml_content=None,
+        cache_dir=None,
+        model=None,
+        shared=False,
+    ):
+        """
+        Load Data Model from YAML definition.
+        With a cache_dir, the parsed and compiled model get stored on disk
+        and reused the next time the same content is loaded into an empty
+        ProxyManager (see core/models.py). An already parsed models.Model
+        can also be provided.
+        With shared=True, the compiled definitions and schemas are taken from
+        (or published to) the process-wide models.SHARED_MODELS so all the
+        sessions loading the same content into an empty ProxyManager reference
+        a single copy of them.
+        """
+        if model is None:
+            model = models.read_model(yaml_file, yaml_content, cache_dir)
+        if model is None:
+            return False
+
+        pristine = not self._model_definition
+        shared_model = None
+        if shared and pristine:
+            shared_model = models.SHARED_MODELS.get(model.digest)
 
-        if yaml_content:
-            add_on_dict = yaml.safe_load(yaml_content)
+        if shared_model is not None and shared_model.definitions is not None:
+            self._life_cycle("before_load_model", definition=shared_model.definitions)
+            self._use_shared_model(shared_model)
+            self._life_cycle("after_load_model", definition=model.content)
+            return True
+
+        compiled = model.compiled() if pristine else None
+        if compiled is not None:
+            add_on_dict = compiled["definitions"]
+            self._life_cycle("before_load_model", definition=add_on_dict)
+            self._model_definition.update(add_on_dict)
+            self._schemas = {}
+            for obj_type, schema in compiled["schemas"].items():
+                self._register_schema(obj_type, schema)
+        else:
+            add_on_dict = model.definition
             self._life_cycle("before_load_model", definition=add_on_dict)
             self._model_definition.update(add_on_dict)
             self._apply_mixin(*add_on_dict.keys())
-            self._life_cycle("after_load_model", definition=yaml_content)
-            return True
-
-        return False
+            self._invalidate_schemas(add_on_dict.keys())
+            if pristine and model.cached:
+                # Compile everything once so warm starts can skip it
+                for obj_type, definition in self._model_definition.items():
+                    if isinstance(definition, dict) and not obj_type.startswith("_"):
+                        self.get_schema(obj_type)
+                model.save_compiled(self._model_definition, self._schemas)
+
+        if shared_model is not None:
+            # Publish a frozen copy and use it like the other sessions
+            shared_model.set_definitions(self._model_definition)
+            self._model_definition.clear()
+            self._schemas = {}
+            self._use_shared_model(shared_model)
+        else:
+            self._update_type_tags()
+        self._life_cycle("after_load_model", definition=model.content)
+        return True
+
+    def _use_shared_model(self, shared_model):
+        """Internal helper referencing the content of a SharedModel"""
+        self._shared_models.append(shared_model)
+        self._model_definition.update(shared_model.definitions)
+        for obj_type, schema in shared_model.schemas.items():
+            self._register_schema(obj_type, schema)
+        self._type_tags = dict(shared_model.type_tags)
+        if self._registry:
+            self._type_tags.update(self._registry.type_tags(shared_model.definitions))
+
+    def register_models(self, directory, pattern="*.yaml", cache_dir=None):
+        """
+        Index the types defined by the YAML files of a directory without
+        loading them. The definitions of a file (and of the files providing
+        their mixins) only get loaded the first time one of its types is
+        needed (create, get_definition, get_schema...).
+        Return the list of registered types.
+        """
+        types = self._registry.add_directory(directory, pattern, cache_dir)
+        self._update_type_tags()
+        return types
+
+    def _require(self, *obj_types):
+        """Internal helper loading the registered definitions of some types"""
+        model_files = self._registry.collect(obj_types)
+        if not model_files:
+            return
+
+        add_on_dict = {}
+        for model_file in model_files:
+            add_on_dict.update(model_file.load())
+
+        self._life_cycle("before_load_model", definition=add_on_dict)
+        self._model_definition.update(add_on_dict)
+        self._apply_mixin(*add_on_dict.keys())
+        self._invalidate_schemas(add_on_dict.keys())
+        self._update_type_tags()
+        self._life_cycle(
+            "after_load_model",
+            definition=[str(model_file.path) for model_file in model_files],
+        )
 
     def get_definition(self, obj_type):
         """Return a loaded definition for a given object_type"""
+        if obj_type in self._registry:
+            self._require(obj_type)
         return self._model_definition.get(obj_type)
 
+    def get_schema(self, obj_type) -> ProxySchema:
+        """
+        Return the compiled definition shared by all the proxies of a given type.
+        Schemas are compiled lazily and invalidated when definitions get loaded.
+        """
+        schema = self._schemas.get(obj_type)
+        if schema is None:
+            if obj_type in self._registry:
+                self._require(obj_type)
+            schema = compile_schema(self._model_definition, obj_type)
+            self._register_schema(obj_type, schema)
+        return schema
+
+    def _invalidate_schemas(self, obj_types):
+        """
+        Internal helper dropping the schemas of some (re)defined types and of
+        the types using them as mixin. The others, possibly shared with other
+        sessions, are kept. The live proxies of the dropped types get migrated
+        to their new schema.
+        """
+        obj_types = set(obj_types)
+        dropped = []
+        for obj_type, schema in list(self._schemas.items()):
+            if obj_type in obj_types or obj_types.intersection(schema.mixins):
+                del self._schemas[obj_type]
+                dropped.append(obj_type)
+
+        # Live proxies move to the new definition of their type
+        migrated_ids = []
+        for obj_type in dropped:
+            proxies = list(self._type_map.get(obj_type, {}).values())
+            schema = self.get_schema(obj_type) if proxies else None
+            indexed = set()
+            if schema is not None:
+                indexed.update(n for n, i in zip(schema.names, schema.indexed) if i)
+            for key in [key for key in self._indexes if key[0] == obj_type]:
+                if key[1] not in indexed:
+                    del self._indexes[key]
+            for proxy in proxies:
+                proxy._migrate(schema)
+                migrated_ids.append(proxy.id)
+
+        if migrated_ids:
+            self._emit("changed", ids=migrated_ids)
+
+    def _register_schema(self, obj_type, schema):
+        """Internal helper registering a compiled definition"""
+        self._schemas[obj_type] = schema
+
+        # secondary indexes declared with `index: true`
+        for name, indexed, size in zip(schema.names, schema.indexed, schema.sizes):
+            if indexed and (obj_type, name) not in self._indexes:
+                index = query.PropertyIndex(multi=size not in (None, 1))
+                self._indexes[(obj_type, name)] = index
+
+                # fill it with the proxies which already exist
+                for proxy in self._type_map.get(obj_type, {}).values():
+                    idx = proxy._schema.index.get(name)
+                    if idx is not None:
+                        index.add(proxy._id, proxy._values[idx])
+
+    def _update_type_tags(self):
+        """Internal helper to index the tags of each type definition"""
+        self._type_tags = {
+            type_name: frozenset((definition or {}).get("_tags", []))
+            for type_name, definition in self._model_definition.items()
+        }
+        if self._registry:
+            self._type_tags.update(self._registry.type_tags(self._model_definition))
+
     def types(self, *with_tags):
         """List proxy_types from definition that has the set of provided tags"""
-        result = []
-        tag_filter = set(with_tags)
-        for type_name in self._model_definition.keys():
-            has_tag = set(self._model_definition[type_name].get("_tags", []))
-            if tag_filter.issubset(has_tag):
-                result.append(type_name)
+        if not with_tags:
+            return list(self._type_tags)
 
-        return result
+        tag_filter = set(with_tags)
+        return [
+            type_name
+            for type_name, type_tags in self._type_tags.items()
+            if tag_filter.issubset(type_tags)
+        ]
 
     # -------------------------------------------------------------------------
     # Proxy management
@@ -657,93 +1681,274 @@ class ProxyManager:
         """
 
         # Can't create object if no definition available
+        if proxy_type in self._registry:
+            self._require(proxy_type)
         if proxy_type not in self._model_definition:
             raise ValueError(
                 f"Object of type: {proxy_type} was not found in our loaded model"
                 "definitions"
             )
 
-        self._life_cycle(
-            "proxy_create_before", proxy_type=proxy_type, initial_values=initial_values
-        )
+        with self._history_step():
+            self._life_cycle(
+                "proxy_create_before",
+                proxy_type=proxy_type,
+                initial_values=initial_values,
+            )
 
-        if existing_obj is not None:
-            obj = existing_obj
-        else:
-            obj = self._obj_factory.create(proxy_type) if self._obj_factory else None
-
-        proxy = Proxy(
-            self,
-            proxy_type,
-            obj,
-            skip_object_init=existing_obj is not None,
-            **{
-                "_proxy_id": proxy_id,
-                "_object_adapter": self._obj_adapter,
-                **initial_values,
-            },
-        )
-        self._life_cycle(
-            "proxy_create_before_commit",
-            proxy_type=proxy_type,
-            initial_values=initial_values,
-            proxy=proxy,
-        )
+            if existing_obj is not None:
+                obj = existing_obj
+            else:
+                obj = (
+                    self._obj_factory.create(proxy_type) if self._obj_factory else None
+                )
 
-        if existing_obj is not None:
-            proxy.fetch()
-        else:
-            proxy.commit()
+            # The initial values are not undoable changes
+            with self._history_paused(changes_only=True):
+                proxy = Proxy(
+                    self,
+                    proxy_type,
+                    obj,
+                    skip_object_init=existing_obj is not None,
+                    **{
+                        "_proxy_id": proxy_id,
+                        "_object_adapter": self._obj_adapter,
+                        **initial_values,
+                    },
+                )
+                self._life_cycle(
+                    "proxy_create_before_commit",
+                    proxy_type=proxy_type,
+                    initial_values=initial_values,
+                    proxy=proxy,
+                )
 
-        self._life_cycle(
-            "proxy_create_after_commit",
-            proxy_type=proxy_type,
-            initial_values=initial_values,
-            proxy=proxy,
-        )
+                if existing_obj is not None:
+                    proxy.fetch()
+                else:
+                    proxy.commit()
+
+            self._life_cycle(
+                "proxy_create_after_commit",
+                proxy_type=proxy_type,
+                initial_values=initial_values,
+                proxy=proxy,
+            )
+
+            if self._history is not None:
+                self._history.created([proxy.id])
 
         self._emit("created", ids=[proxy.id])
 
         return proxy
 
+    def create_many(self, proxy_type, initial_values=1):
+        """
+        Create several instances of a proxy using a proxy_type.
+        initial_values can either be the number of proxies to create or a list
+        of dict providing the property values to pre-initialize for each proxy.
+
+        Compared to calling create() in a loop, the life cycle listeners
+        and the 'created' event are only triggered once for the whole batch.
+        """
+
+        # Can't create object if no definition available
+        if proxy_type in self._registry:
+            self._require(proxy_type)
+        if proxy_type not in self._model_definition:
+            raise ValueError(
+                f"Object of type: {proxy_type} was not found in our loaded model"
+                "definitions"
+            )
+
+        if isinstance(initial_values, int):
+            initial_values = [{}] * initial_values
+        else:
+            initial_values = list(initial_values)
+
+        with self._history_step():
+            self._life_cycle(
+                "proxies_create_before",
+                proxy_type=proxy_type,
+                initial_values=initial_values,
+            )
+
+            proxies = []
+            with self._history_paused(changes_only=True):
+                for values in initial_values:
+                    obj = (
+                        self._obj_factory.create(proxy_type)
+                        if self._obj_factory
+                        else None
+                    )
+                    proxies.append(
+                        Proxy(
+                            self,
+                            proxy_type,
+                            obj,
+                            _batch=True,
+                            _object_adapter=self._obj_adapter,
+                            **values,
+                        )
+                    )
+
+                self._life_cycle(
+                    "proxies_create_before_commit",
+                    proxy_type=proxy_type,
+                    initial_values=initial_values,
+                    proxies=proxies,
+                )
+
+                for proxy in proxies:
+                    proxy.commit()
+
+            self._life_cycle(
+                "proxies_create_after_commit",
+                proxy_type=proxy_type,
+                initial_values=initial_values,
+                proxies=proxies,
+            )
+
+            if self._history is not None:
+                self._history.created([proxy.id for proxy in proxies])
+
+        if proxies:
+            self._emit("created", ids=[proxy.id for proxy in proxies])
+
+        return proxies
+
     def delete(self, proxy_id, trigger_modified=True):
         """
-        Delete object along with its dependency that it is owner of
+        Delete object along with its dependency that it is owner of.
+        Properties of other proxies referencing a deleted proxy get cleared
+        (None or removed from the list) and a 'changed' event is emitted for them.
         """
-        self._life_cycle(
-            "proxy_delete_before", proxy_id=proxy_id, trigger_modified=trigger_modified
-        )
-        before_delete = set(self._id_map.keys())
-        # Delete ourself
-        proxy_to_delete: Proxy = self._id_map[proxy_id]
-        self.clean_proxy_domains(proxy_to_delete.id)
-        del self._id_map[proxy_id]
+        if proxy_id not in self._id_map:
+            raise KeyError(proxy_id)
 
-        for tag in proxy_to_delete.tags:
-            self._tag_map.get(tag).discard(proxy_id)
+        with self._history_step():
+            self._delete([proxy_id], trigger_modified, False)
 
-        self._life_cycle(
-            "proxy_delete_after_self",
-            proxy_id=proxy_id,
-            trigger_modified=trigger_modified,
-            proxy=proxy_to_delete,
-        )
+    def delete_many(self, proxy_ids, trigger_modified=True):
+        """
+        Delete several objects along with the dependencies they are owner of.
+        Unknown ids are ignored and the cost only depends on the number of
+        deleted proxies. Compared to calling delete() in a loop, the life cycle
+        listeners and the 'deleted' event are only triggered once for the
+        whole batch.
+        """
+        with self._history_step():
+            return self._delete(proxy_ids, trigger_modified, True)
+
+    def _delete(self, proxy_ids, trigger_modified, batch):
+        """Internal helper shared by delete() and delete_many()"""
+        # Collect the proxies to delete along with the ones they own
+        proxies = {}
+        stack = list(proxy_ids)
+        while stack:
+            _id = stack.pop()
+            if _id in proxies:
+                continue
+            proxy = self._id_map.get(_id)
+            if proxy is None:
+                continue
+            proxies[_id] = proxy
+            stack.extend(proxy._own or ())
 
-        # Delete objects that we own
-        for _id in proxy_to_delete.own:
-            self.delete(_id, False)
+        if not proxies:
+            return []
 
-        self._life_cycle(
-            "proxy_delete_after_own",
-            proxy_id=proxy_id,
-            trigger_modified=trigger_modified,
-            proxy=proxy_to_delete,
-        )
+        if self._history is not None:
+            self._history.deleted(proxies.values())
+
+        deleted_ids = list(proxies)
+        if batch:
+            self._life_cycle(
+                "proxies_delete_before",
+                proxy_ids=deleted_ids,
+                trigger_modified=trigger_modified,
+            )
+        else:
+            for _id in deleted_ids:
+                self._life_cycle(
+                    "proxy_delete_before",
+                    proxy_id=_id,
+                    trigger_modified=trigger_modified and _id == proxy_ids[0],
+                )
+
+        if self._snapshots:
+            for _id, proxy in proxies.items():
+                self._preserve(_id, proxy)
+
+        # Unregister them from the maps and indexes
+        for _id, proxy in proxies.items():
+            self.clean_proxy_domains(_id)
+            del self._id_map[_id]
+            self._type_map[proxy._type].pop(_id, None)
+
+            for tag in proxy._tags or ():
+                self._tag_map.get(tag).discard(_id)
+
+            _schema = proxy._schema
+            for idx, indexed in enumerate(_schema.indexed):
+                if indexed:
+                    proxy._reindex(idx, proxy._values[idx], None)
+
+            # Forget the references we hold
+            for idx, is_proxy in enumerate(_schema.is_proxy):
+                if is_proxy:
+                    self._update_references(
+                        _id, _schema.names[idx], proxy._values[idx], None
+                    )
+
+        if batch:
+            self._life_cycle(
+                "proxies_delete_after_self",
+                proxy_ids=deleted_ids,
+                trigger_modified=trigger_modified,
+                proxies=list(proxies.values()),
+            )
+        else:
+            for _id, proxy in proxies.items():
+                self._life_cycle(
+                    "proxy_delete_after_self",
+                    proxy_id=_id,
+                    trigger_modified=trigger_modified and _id == proxy_ids[0],
+                    proxy=proxy,
+                )
+
+        # Clear dangling references to the deleted proxies
+        changed_ids = []
+        for _id in deleted_ids:
+            changed_ids.extend(self._clear_references(_id))
+        if changed_ids:
+            self._emit("changed", ids=list(dict.fromkeys(changed_ids)))
+
+        # Release objects and domains now rather than when garbage collected
+        for proxy in proxies.values():
+            proxy.dispose()
+
+        if batch:
+            self._life_cycle(
+                "proxies_delete_after_own",
+                proxy_ids=deleted_ids,
+                trigger_modified=trigger_modified,
+                proxies=list(proxies.values()),
+            )
+        else:
+            for _id, proxy in reversed(proxies.items()):
+                self._life_cycle(
+                    "proxy_delete_after_own",
+                    proxy_id=_id,
+                    trigger_modified=trigger_modified and _id == proxy_ids[0],
+                    proxy=proxy,
+                )
 
         if trigger_modified:
-            after_delete = set(self._id_map.keys())
             self.modified()
-            self._emit("deleted", ids=list(before_delete.difference(after_delete)))
+            self._emit("deleted", ids=deleted_ids)
+
+        return deleted_ids
 
     def get(self, proxy_id: str) -> Proxy:
         """
@@ -751,6 +1956,56 @@ class ProxyManager:
         """
         return self._id_map.get(proxy_id, None)
 
+    def referrers(self, proxy_id):
+        """
+        Return the proxies referencing a given proxy through their proxy
+        properties as a map {referrer_id: [property_names]}
+        """
+        return {
+            referrer_id: sorted(names)
+            for referrer_id, names in self._referrers.get(proxy_id, {}).items()
+        }
+
+    def _update_references(self, referrer_id, name, previous_value, value):
+        """Internal helper to keep the reverse reference index in sync"""
+        previous_ids = _referenced_ids(previous_value)
+        ids = _referenced_ids(value)
+        for target_id in previous_ids.difference(ids):
+            target_refs = self._referrers.get(target_id)
+            if target_refs is None or referrer_id not in target_refs:
+                continue
+            names = target_refs[referrer_id]
+            names.discard(name)
+            if not names:
+                del target_refs[referrer_id]
+                if not target_refs:
+                    del self._referrers[target_id]
+        for target_id in ids.difference(previous_ids):
+            target_refs = self._referrers.setdefault(target_id, {})
+            target_refs.setdefault(referrer_id, set()).add(name)
+
+    def _clear_references(self, proxy_id):
+        """
+        Remove any reference to a given proxy from the properties of the
+        proxies referencing it. Return the list of modified proxy ids.
+        """
+        changed_ids = []
+        for referrer_id, names in self._referrers.pop(proxy_id, {}).items():
+            referrer = self._id_map.get(referrer_id)
+            if referrer is None:
+                continue
+            values = {}
+            for name in names:
+                value = referrer._values[referrer._schema.index[name]]
+                if isinstance(value, list):
+                    values[name] = [v for v in value if v != proxy_id]
+                else:
+                    values[name] = None
+            referrer.set_properties(values)
+            changed_ids.append(referrer_id)
+
+        return changed_ids
+
     def update(self, change_set):
         """
         changeSet = [
@@ -758,61 +2013,120 @@ class ProxyManager:
             ...
         ]
         """
-        self._life_cycle("proxy_update_before", change_set=change_set)
-        dirty_ids = set()
-        dirty_proxies_to_commit = set()
-        for change in change_set:
-            _id = change["id"]
-            _name = change["name"]
-            _value = change["value"]
-            dirty_ids.add(_id)
-            proxy: Proxy = self.get(_id)
-            if "auto_commit" in proxy.tags:
-                dirty_proxies_to_commit.add(proxy)
-            proxy.set_property(_name, _value)
-
-        # commit changes for proxy tagged as auto_commit
-        for proxy in dirty_proxies_to_commit:
-            proxy.commit()
-            self._emit("commit", ids=[proxy.id])
+        with self._history_step():
+            self._life_cycle("proxy_update_before", change_set=change_set)
+
+            # group changes per proxy
+            changes_per_proxy = {}
+            for change in change_set:
+                _values = changes_per_proxy.setdefault(change["id"], {})
+                _values[change["name"]] = change["value"]
+
+            dirty_ids = set()
+            unknown_ids = []
+            dirty_proxies_to_commit = []
+            for _id, _values in changes_per_proxy.items():
+                proxy: Proxy = self._id_map.get(_id)
+                if proxy is None:
+                    unknown_ids.append(_id)
+                    continue
+                dirty_ids.add(_id)
+                if proxy._tags and "auto_commit" in proxy._tags:
+                    dirty_proxies_to_commit.append(proxy)
+                proxy.set_properties(_values)
+
+            if unknown_ids:
+                logger.warning(
+                    "Skipping changes for %s unknown proxies: %s",
+                    len(unknown_ids),
+                    unknown_ids,
+                )
 
-        self._life_cycle(
-            "proxy_update_after", change_set=change_set, dirty_ids=dirty_ids
-        )
-        self._emit("changed", ids=list(dirty_ids))
+            # commit changes for proxy tagged as auto_commit
+            if dirty_proxies_to_commit:
+                for proxy in dirty_proxies_to_commit:
+                    proxy.commit()
+                self._emit(
+                    "commit", ids=[proxy.id for proxy in dirty_proxies_to_commit]
+                )
+
+            self._life_cycle(
+                "proxy_update_after", change_set=change_set, dirty_ids=dirty_ids
+            )
+            self._emit("changed", ids=list(dirty_ids))
 
     def get_instances_of_type(self, proxy_type):
         """
         Return all the instances of the given type
         """
-        result = []
-        for proxy in self._id_map.values():
-            if proxy.type == proxy_type:
-                result.append(proxy)
-
-        return result
+        return list(self._type_map.get(proxy_type, {}).values())
 
     def tags(self, *args):
         """List all instances containing all the listed tags"""
-        selected_ids = set(self._id_map.keys())
+        if not args:
+            return list(self._id_map.values())
+
+        tag_sets = []
         for tag in args:
-            if tag in self._tag_map:
-                selected_ids &= self._tag_map[tag]
-            else:
+            tag_ids = self._tag_map.get(tag)
+            if not tag_ids:
                 return []
+            tag_sets.append(tag_ids)
+
+        # intersect smallest first
+        tag_sets.sort(key=len)
+        selected_ids = set(tag_sets[0])
+        for tag_ids in tag_sets[1:]:
+            selected_ids &= tag_ids
+            if not selected_ids:
+                return []
+
+        return [self._id_map[obj_id] for obj_id in selected_ids]
 
-        result = []
-        for obj_id in selected_ids:
-            result.append(self._id_map[obj_id])
+    def query(self, type=None, tags=None, where=None):
+        """
+        Return a lazy iterator over the proxies matching the given type, tags
+        and property conditions. The most selective source among the type,
+        the tags and the secondary property indexes (`index: true`) is used
+        to find the candidates which then get filtered while iterating.
+        Invalid conditions raise a ValueError right away.
+        Use list() on the result before editing the matching proxies.
+
+        pxm.query(type="Material", where={"Density": {">": 5}})
+        pxm.query(tags=["Source"], where={"Input": proxy})
+        """
+        return query.execute(self, type, tags, where)
 
-        return result
+    def _update_tag_map(self, proxy_id, previous_tags, tags):
+        """Internal helper to keep the tag index in sync with a proxy tags"""
+        for tag in previous_tags.difference(tags):
+            tag_ids = self._tag_map.get(tag)
+            if tag_ids is not None:
+                tag_ids.discard(proxy_id)
+        for tag in tags.difference(previous_tags):
+            self._tag_map.setdefault(tag, set()).add(proxy_id)
 
     # -------------------------------------------------------------------------
     # Import / Export
     # -------------------------------------------------------------------------
 
-    def save(self, file_output=None):
-        """Export state (definition+data) into a file"""
+    def save(self, file_output=None, streaming=False):
+        """
+        Export state (definition+data) into a file.
+
+        With streaming=True, the state is written as newline-delimited JSON
+        records (a header with the model and the number of proxies followed by
+        one record per proxy) without building the full state in memory.
+        Without file_output, an iterator over those lines is returned.
+        """
+        if streaming:
+            lines = self._save_lines(file_output)
+            if not file_output:
+                return lines
+            with open(file_output, "w") as outfile:
+                outfile.writelines(lines)
+            return
+
         self._life_cycle("export_before", file_output=file_output)
         data = {
             "model": self._model_definition,
@@ -821,46 +2135,157 @@ class ProxyManager:
         self._life_cycle("export_after", file_output=file_output, data=data)
         if file_output:
             with open(file_output, "w") as outfile:
-                json.dump(data, outfile)
+                json.dump(data, outfile, default=arrays.json_default)
         else:
-            return json.dumps(data)
+            return json.dumps(data, default=arrays.json_default)
 
-    def load(self, file_input=None, file_content=None):
-        """Load previously exported state from a file"""
+    def _save_lines(self, file_output):
+        """Internal generator of the records for the streaming format"""
+        self._life_cycle("export_before", file_output=file_output)
+        header = {"model": self._model_definition, "count": len(self._id_map)}
+        yield json.dumps(header, default=arrays.json_default) + "\n"
+        for proxy in list(self._id_map.values()):
+            yield json.dumps(proxy.state, default=arrays.json_default) + "\n"
+        self._life_cycle("export_after", file_output=file_output, data=header)
+
+    def load(
+        self,
+        file_input=None,
+        file_content=None,
+        progress=None,
+        restore=False,
+        keep_ids=False,
+    ):
+        """
+        Load previously exported state from a file.
+        Both formats produced by save() are supported. The streaming one is
+        consumed one record at a time so only the proxies being created are
+        kept in memory.
+        progress(count, total) get called after each loaded proxy.
+
+        With restore=True, proxies are directly built from their saved state
+        without going through create() (no default values, owned sub-proxies
+        or domain evaluation) and are only committed once. keep_ids=True
+        additionally reuses the saved ids when they are not already taken.
+        """
         self._life_cycle(
             "import_before", file_input=file_input, file_content=file_content
         )
         if file_input:
             with open(file_input) as json_file:
-                data = json.load(json_file)
-        else:
-            data = json.loads(file_content)
 
-        self._life_cycle(
-            "import_before_processing",
-            file_input=file_input,
-            file_content=file_content,
-            data=data,
+                def read_all():
+                    json_file.seek(0)
+                    return json.load(json_file)
+
+                return self._load_lines(
+                    json_file,
+                    read_all,
+                    file_input,
+                    file_content,
+                    progress,
+                    restore,
+                    keep_ids,
+                )
+
+        return self._load_lines(
+            utils.iter_lines(file_content),
+            lambda: json.loads(file_content),
+            file_input,
+            file_content,
+            progress,
+            restore,
+            keep_ids,
         )
 
-        self._model_definition.update(data["model"])
+    def _load_lines(
+        self, lines, read_all, file_input, file_content, progress, restore, keep_ids
+    ):
+        """Internal helper reading either the JSON or the streaming format"""
+        try:
+            data = json.loads(next(lines, "null"))
+        except json.JSONDecodeError:
+            data = None
+
+        streaming = isinstance(data, dict) and "count" in data
+        if not streaming and not (isinstance(data, dict) and "proxies" in data):
+            # Not on a single line (indented JSON)
+            data = read_all()
+
+        if streaming:
+            total = data["count"]
+            proxy_states = (json.loads(line) for line in lines if line.strip())
+        else:
+            total = len(data["proxies"])
+            proxy_states = data["proxies"]
+
+        return self._import_states(
+            data,
+            proxy_states,
+            total,
+            file_input,
+            file_content,
+            progress,
+            restore,
+            keep_ids,
+        )
 
-        # Create proxies
-        _id_remap = {}
-        _new_ids = []
-        for proxy_state in data["proxies"]:
-            _id = proxy_state["id"]
-            _type = proxy_state["type"]
-            _proxy = self.create(_type)
-            _id_remap[_id] = _proxy.id
-            _proxy.state = proxy_state
-            _new_ids.append(_proxy.id)
+    def _import_states(
+        self,
+        data,
+        proxy_states,
+        total,
+        file_input,
+        file_content,
+        progress,
+        restore,
+        keep_ids,
+    ):
+        """Internal helper creating the proxies of a loaded state"""
+        # Loading a state is not an undoable change
+        with self._history_paused():
+            self._life_cycle(
+                "import_before_processing",
+                file_input=file_input,
+                file_content=file_content,
+                data=data,
+            )
 
-        # Remap ids
-        for new_id in _new_ids:
-            _proxy = self.get(new_id)
-            _proxy.remap_ids(_id_remap)
-            _proxy.commit()
+            # Only replace the definitions which differ so the schemas of
+            # the others (possibly shared with other sessions) are kept
+            changed = {
+                obj_type: definition
+                for obj_type, definition in data["model"].items()
+                if self._model_definition.get(obj_type) != definition
+            }
+            if changed:
+                self._model_definition.update(changed)
+                self._invalidate_schemas(changed.keys())
+                self._update_type_tags()
+
+            if restore:
+                _id_remap, _new_ids = self._restore(
+                    proxy_states, keep_ids, total, progress
+                )
+            else:
+                # Create proxies
+                _id_remap = {}
+                _new_ids = []
+                for proxy_state in proxy_states:
+                    _id = proxy_state["id"]
+                    _type = proxy_state["type"]
+                    _proxy = self.create(_type)
+                    _id_remap[_id] = _proxy.id
+                    _proxy.state = proxy_state
+                    _new_ids.append(_proxy.id)
+                    if progress:
+                        progress(len(_new_ids), total)
+
+                # Remap ids
+                for new_id in _new_ids:
+                    _proxy = self.get(new_id)
+                    _proxy.remap_ids(_id_remap)
+                    _proxy.commit()
 
         self._life_cycle(
             "import_after",
@@ -874,27 +2299,97 @@ class ProxyManager:
 
         return _id_remap
 
+    def save_snapshot(self, file_output):
+        """
+        Export state (definition+data) into a compact binary file where the
+        property values are stored in columns per proxy type and the arrays
+        as raw buffers (see core/binary.py).
+        """
+        self._life_cycle("export_before", file_output=file_output)
+        header = binary.write_snapshot(self, file_output)
+        self._life_cycle("export_after", file_output=file_output, data=header)
+
+    def load_snapshot(self, file_input, keep_ids=False, progress=None, memory_map=True):
+        """
+        Load a state exported with save_snapshot(). Proxies are restored like
+        load(restore=True). With memory_map=True, the arrays directly use the
+        memory mapped file rather than being copied.
+        """
+        self._life_cycle("import_before", file_input=file_input, file_content=None)
+        snapshot = binary.read_snapshot(file_input, memory_map=memory_map)
+        return self._import_states(
+            snapshot.header,
+            snapshot.proxy_states(),
+            snapshot.count,
+            file_input,
+            None,
+            progress,
+            True,
+            keep_ids,
+        )
+
+    def _restore(self, proxy_states, keep_ids, total, progress):
+        """Internal helper building proxies straight from their saved state"""
+        _id_remap = {}
+        proxies = []
+        for proxy_state in proxy_states:
+            _id = proxy_state["id"]
+            _type = proxy_state["type"]
+            if _type not in self._model_definition:
+                raise ValueError(
+                    f"Object of type: {_type} was not found in our loaded model"
+                    "definitions"
+                )
+
+            obj = self._obj_factory.create(_type) if self._obj_factory else None
+            proxy = Proxy(
+                self,
+                _type,
+                obj,
+                _proxy_id=_id if keep_ids and _id not in self._id_map else None,
+                _name=proxy_state.get("name"),
+                _tags=proxy_state.get("tags", ()),
+                _object_adapter=self._obj_adapter,
+                _state=proxy_state,
+            )
+            _id_remap[_id] = proxy.id
+            proxies.append(proxy)
+            if progress:
+                progress(len(proxies), total)
+
+        # Only remap when some ids have changed
+        if any(old_id != new_id for old_id, new_id in _id_remap.items()):
+            for proxy in proxies:
+                proxy.remap_ids(_id_remap)
+
+        for proxy in proxies:
+            proxy.commit()
+
+        return _id_remap, [proxy.id for proxy in proxies]
+
     # -------------------------------------------------------------------------
     # Commit / Reset
     # -------------------------------------------------------------------------
 
     def commit_all(self):
         """Commit all dirty proxies"""
-        proxy_ids = list(self.dirty_proxy_data)
-        for _id in proxy_ids:
-            proxy = self.get(_id)
-            if proxy:
-                proxy.commit()
-        self._emit("commit", ids=proxy_ids)
+        with self._history_step():
+            proxy_ids = list(self.dirty_proxy_data)
+            for _id in proxy_ids:
+                proxy = self.get(_id)
+                if proxy:
+                    proxy.commit()
+            self._emit("commit", ids=proxy_ids)
 
     def reset_all(self):
         """Reset all dirty proxies"""
-        proxy_ids = list(self.dirty_proxy_data)
-        for _id in proxy_ids:
-            proxy = self.get(_id)
-            if proxy:
-                proxy.reset()
-        self._emit("reset", ids=proxy_ids)
+        with self._history_step():
+            proxy_ids = list(self.dirty_proxy_data)
+            for _id in proxy_ids:
+                proxy = self.get(_id)
+                if proxy:
+                    proxy.reset()
+            self._emit("reset", ids=proxy_ids)
 
     # -------------------------------------------------------------------------
     # Dirty / Clean management
@@ -925,3 +2420,40 @@ class ProxyManager:
         ids = list(self.dirty_proxy_domains)
         self.dirty_proxy_domains.clear()
         return ids
+
+    def apply_domains(self):
+        """
+        Evaluate the domains of the dirty proxies until no more property
+        change get detected.
+        Return a tuple with the set of evaluated proxy ids and the set of
+        proxy ids for which a domain updated some property values.
+        The values set by the domains are reported to the life cycle
+        listeners as a change set (see update).
+        """
+        all_ids = set()
+        data_ids = set()
+        change_set = [] if self._life_cycle_listeners else None
+        m_ids = self.list_and_clean_proxy_domains()
+        while m_ids:
+            all_ids.update(m_ids)
+            for _id in m_ids:
+                proxy = self.get(_id)
+                if proxy is None:
+                    continue
+                mtime = proxy._property_mtime
+                if proxy.domains_apply_pending():
+                    data_ids.add(_id)
+                    if change_set is not None:
+                        delta = proxy.state_delta(mtime)["properties"]
+                        change_set.extend(
+                            {"id": _id, "name": name, "value": value}
+                            for name, value in delta.items()
+                        )
+            m_ids = self.list_and_clean_proxy_domains()
+
+        if change_set:
+            self._life_cycle(
+                "proxy_domains_after", change_set=change_set, data_ids=data_ids
+            )
+
+        return all_ids, data_ids
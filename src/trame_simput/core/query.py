@@ -0,0 +1,285 @@
+import bisect
+import itertools
+import logging
+
+logger = logging.getLogger("simput.core.query")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# PropertyIndex
+# -----------------------------------------------------------------------------
+
+
+class PropertyIndex:
+    """
+    Secondary index over the values of a given property for a proxy type.
+
+    Values are kept in hash buckets (value => proxy ids) for equality lookups
+    along with the sorted list of the distinct values for range lookups.
+    For properties holding a list of values (size != 1) each item of the list
+    get indexed, which allow to find which proxies contain a given value.
+    """
+
+    def __init__(self, multi=False):
+        self.multi = multi
+        self._buckets = {}
+        self._keys = []
+        self._sortable = True
+
+    def _values(self, value):
+        if value is None:
+            return ()
+        if self.multi:
+            if isinstance(value, (list, tuple)):
+                return set(value)
+            return (value,)
+        return (value,)
+
+    def add(self, proxy_id, value):
+        """Register the value of a given proxy"""
+        for key in self._values(value):
+            try:
+                bucket = self._buckets.get(key)
+            except TypeError:
+                continue  # unhashable value
+
+            if bucket is None:
+                bucket = self._buckets[key] = set()
+                if self._sortable:
+                    try:
+                        bisect.insort(self._keys, key)
+                    except TypeError:
+                        logger.info("Values can not be sorted, disable ranges")
+                        self._sortable = False
+                        self._keys = []
+            bucket.add(proxy_id)
+
+    def remove(self, proxy_id, value):
+        """Unregister the value of a given proxy"""
+        for key in self._values(value):
+            try:
+                bucket = self._buckets.get(key)
+            except TypeError:
+                continue
+
+            if bucket is None:
+                continue
+            bucket.discard(proxy_id)
+            if not bucket:
+                del self._buckets[key]
+                if self._sortable:
+                    idx = bisect.bisect_left(self._keys, key)
+                    if idx < len(self._keys) and self._keys[idx] == key:
+                        del self._keys[idx]
+
+    def update(self, proxy_id, previous_value, value):
+        """Move a proxy from one value to another"""
+        self.remove(proxy_id, previous_value)
+        self.add(proxy_id, value)
+
+    def supports(self, op):
+        """Return True if that operator can be resolved with that index"""
+        if self.multi:
+            return op == "contains"
+        if op in ("==", "in"):
+            return True
+        return op in RANGE_OPS and self._sortable
+
+    def lookup(self, op, operand):
+        """Return the list of buckets (sets of ids) matching the condition"""
+        if op in ("==", "contains"):
+            try:
+                bucket = self._buckets.get(operand)
+            except TypeError:
+                bucket = None
+            return [bucket] if bucket else []
+
+        if op == "in":
+            result = []
+            for key in operand:
+                try:
+                    bucket = self._buckets.get(key)
+                except TypeError:
+                    continue
+                if bucket:
+                    result.append(bucket)
+            return result
+
+        # Range
+        try:
+            if op == ">":
+                keys = self._keys[bisect.bisect_right(self._keys, operand) :]
+            elif op == ">=":
+                keys = self._keys[bisect.bisect_left(self._keys, operand) :]
+            elif op == "<":
+                keys = self._keys[: bisect.bisect_left(self._keys, operand)]
+            else:
+                keys = self._keys[: bisect.bisect_right(self._keys, operand)]
+        except TypeError:
+            return []
+
+        return [self._buckets[key] for key in keys]
+
+
+# -----------------------------------------------------------------------------
+# Conditions
+# -----------------------------------------------------------------------------
+
+RANGE_OPS = ("<", "<=", ">", ">=")
+
+
+def _compare(op, value, operand):
+    try:
+        if op == "==":
+            return value == operand
+        if op == "!=":
+            return value != operand
+        if op == "<":
+            return value is not None and value < operand
+        if op == "<=":
+            return value is not None and value <= operand
+        if op == ">":
+            return value is not None and value > operand
+        if op == ">=":
+            return value is not None and value >= operand
+        if op == "in":
+            return value in operand
+        if op == "contains":
+            return value is not None and operand in value
+    except TypeError:
+        return False
+
+    raise ValueError(f"Invalid query operator '{op}'")
+
+
+def _as_operand(value):
+    # Allow proxies to be used in place of their id
+    if hasattr(value, "id") and hasattr(value, "type"):
+        return value.id
+    if isinstance(value, (list, tuple, set)):
+        return [_as_operand(v) for v in value]
+    return value
+
+
+def _unique(values):
+    """Remove the duplicated values of an `in` operand, keeping their order"""
+    try:
+        return list(dict.fromkeys(values))
+    except TypeError:  # unhashable values
+        result = []
+        for value in values:
+            if value not in result:
+                result.append(value)
+        return result
+
+
+def parse_where(where):
+    """
+    Convert a where definition into a list of (property_name, op, operand).
+
+    where = {
+        "Density": 5,                      # ==
+        "Name": {"!=": "steel"},
+        "Temperature": {">": 0, "<=": 100},
+        "Kind": {"in": ["a", "b"]},
+        "Inputs": {"contains": proxy},     # list property holding that value
+    }
+    """
+    conditions = []
+    for name, condition in (where or {}).items():
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op not in ("==", "!=", "in", "contains") + RANGE_OPS:
+                    raise ValueError(f"Invalid query operator '{op}' for {name}")
+                operand = _as_operand(operand)
+                if op == "in":
+                    operand = _unique(operand)
+                conditions.append((name, op, operand))
+        else:
+            conditions.append((name, "==", _as_operand(condition)))
+    return conditions
+
+
+# -----------------------------------------------------------------------------
+# Query execution
+# -----------------------------------------------------------------------------
+
+
+def plan(proxy_manager, proxy_type=None, tags=None, conditions=()):
+    """
+    Pick the most selective source of candidate ids for a query.
+    Return a tuple (description, candidates, remaining conditions) where
+    candidates is a list of sets of ids or None for a full scan.
+    """
+    sources = []
+
+    if proxy_type is not None:
+        ids = proxy_manager._type_map.get(proxy_type, {})
+        sources.append((len(ids), f"type({proxy_type})", [ids], None))
+
+    for tag in tags or ():
+        ids = proxy_manager._tag_map.get(tag, set())
+        sources.append((len(ids), f"tag({tag})", [ids], None))
+
+    if proxy_type is not None:
+        for condition in conditions:
+            name, op, operand = condition
+            index = proxy_manager._indexes.get((proxy_type, name))
+            if index is None or not index.supports(op):
+                continue
+            buckets = index.lookup(op, operand)
+            size = sum(len(bucket) for bucket in buckets)
+            sources.append((size, f"index({name} {op})", buckets, condition))
+
+    if not sources:
+        return "scan", None, list(conditions)
+
+    size, description, buckets, used = min(sources, key=lambda s: s[0])
+    logger.info("query plan: %s (%s candidates)", description, size)
+    return description, buckets, [c for c in conditions if c is not used]
+
+
+def execute(proxy_manager, proxy_type=None, tags=None, where=None):
+    """
+    Validate and plan the query right away (invalid conditions raise at the
+    call site) and return a lazy iterator over the matching proxies.
+    The candidates are read from the selected source while iterating, so the
+    proxies or the queried properties can't be edited until the iteration
+    is over (use list() on the result to do so).
+    """
+    conditions = parse_where(where)
+    tags = list(tags or ())
+    _, candidates, conditions = plan(proxy_manager, proxy_type, tags, conditions)
+
+    if candidates is None:
+        ids = proxy_manager._id_map
+    elif len(candidates) == 1:
+        ids = candidates[0]
+    else:
+        # buckets of an "in" or range lookup are disjoint
+        ids = itertools.chain.from_iterable(candidates)
+
+    return _filter(proxy_manager, ids, proxy_type, tags, conditions)
+
+
+def _filter(proxy_manager, ids, proxy_type, tags, conditions):
+    """Lazily yield the candidate proxies matching the remaining conditions"""
+    for _id in ids:
+        proxy = proxy_manager._id_map.get(_id)
+        if proxy is None:
+            continue
+        if proxy_type is not None and proxy._type != proxy_type:
+            continue
+        if tags and not (proxy._tags and proxy._tags.issuperset(tags)):
+            continue
+
+        schema = proxy._schema
+        matching = True
+        for name, op, operand in conditions:
+            idx = schema.index.get(name)
+            if idx is None or not _compare(op, proxy._values[idx], operand):
+                matching = False
+                break
+
+        if matching:
+            yield proxy
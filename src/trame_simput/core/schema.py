@@ -0,0 +1,159 @@
+import logging
+from types import MappingProxyType
+
+from . import arrays
+
+logger = logging.getLogger("simput.core.schema")
+logger.setLevel(logging.WARN)
+
+# -----------------------------------------------------------------------------
+# ProxySchema
+# -----------------------------------------------------------------------------
+
+
+class ProxySchema:
+    """
+    A ProxySchema is the compiled and immutable version of a proxy type
+    definition. It is computed once per type by the ProxyManager so the proxies
+    don't have to walk their raw definition on every property access.
+
+    Each public property gets a slot index and its attributes are stored in
+    tuples following that same order. The definition and index mappings are
+    read-only views, the property definitions they hold are shared with the
+    ProxyManager and must not be edited either.
+    """
+
+    __slots__ = (
+        "type",
+        "definition",
+        "names",
+        "index",
+        "types",
+        "sizes",
+        "initials",
+        "is_proxy",
+        "array_types",
+        "tolerances",
+        "indexed",
+        "proxy_types",
+        "domains",
+        "tags",
+        "mixins",
+    )
+
+    def __init__(self, proxy_type, definition, mixins=()):
+        names = tuple(name for name in definition if not name.startswith("_"))
+        prop_defs = [definition[name] or {} for name in names]
+
+        _set = super().__setattr__
+        _set("type", proxy_type)
+        _set("definition", MappingProxyType(definition))
+        _set("names", names)
+        _set("index", MappingProxyType({name: idx for idx, name in enumerate(names)}))
+        _set("types", tuple(d.get("type", "string") for d in prop_defs))
+        _set("sizes", tuple(d.get("size", None) for d in prop_defs))
+        _set("is_proxy", tuple(d.get("type", None) == "proxy" for d in prop_defs))
+        _set("array_types", tuple(_array_type(proxy_type, d) for d in prop_defs))
+        _set("tolerances", tuple(d.get("tolerance", None) for d in prop_defs))
+        _set("indexed", tuple(bool(d.get("index", False)) for d in prop_defs))
+        _set(
+            "initials",
+            tuple(
+                d.get("initial", None)
+                if dtype is None
+                else arrays.to_typed_array(d.get("initial", None), dtype)
+                for d, dtype in zip(prop_defs, self.array_types)
+            ),
+        )
+        _set("proxy_types", tuple(d.get("proxyType", None) for d in prop_defs))
+        _set("domains", tuple(tuple(d.get("domains", ())) for d in prop_defs))
+        _set("tags", frozenset(definition.get("_tags", ())))
+        _set("mixins", tuple(mixins))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ProxySchema({self.type}) is immutable")
+
+    def __reduce__(self):
+        # Compiled schemas can be cached on disk (see core/models.py)
+        attributes = {name: getattr(self, name) for name in self.__slots__}
+        for name in _MAPPINGS:
+            attributes[name] = dict(attributes[name])
+        return (_restore_schema, (attributes,))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    @property
+    def has_domains(self):
+        """Return True if any property of that type declares domains"""
+        return any(self.domains)
+
+
+# mapping proxies can't be pickled
+_MAPPINGS = ("definition", "index")
+
+
+def _restore_schema(attributes):
+    schema = ProxySchema.__new__(ProxySchema)
+    for name, value in attributes.items():
+        if name in _MAPPINGS:
+            value = MappingProxyType(value)
+        object.__setattr__(schema, name, value)
+    return schema
+
+
+# -----------------------------------------------------------------------------
+# Compilation helpers
+# -----------------------------------------------------------------------------
+
+
+def _array_type(proxy_type, prop_def):
+    """Return the dtype of a property flagged with `array: true` or None"""
+    if not prop_def.get("array", False):
+        return None
+
+    dtype = prop_def.get("type", arrays.DEFAULT_DTYPE)
+    if dtype not in arrays.TYPECODES:
+        logger.warning(
+            "Invalid array type '%s' in %s, using %s",
+            dtype,
+            proxy_type,
+            arrays.DEFAULT_DTYPE,
+        )
+        dtype = arrays.DEFAULT_DTYPE
+
+    return dtype
+
+
+def resolve_mixins(definitions, proxy_type):
+    """
+    Return the ordered list of mixin names that a given type is composed of,
+    including the mixins of its mixins.
+    """
+    result = []
+    visited = set([proxy_type])
+    stack = list(reversed(definitions.get(proxy_type, {}).get("_mixins", [])))
+    while stack:
+        name = stack.pop()
+        if name in visited:
+            continue
+        visited.add(name)
+        result.append(name)
+        if name not in definitions:
+            logger.warning("Mixin %s used by %s is not defined", name, proxy_type)
+            continue
+        stack.extend(reversed(definitions[name].get("_mixins", [])))
+
+    return result
+
+
+def compile_schema(definitions, proxy_type):
+    """Compile the definition of a given type into a ProxySchema"""
+    return ProxySchema(
+        proxy_type,
+        definitions.get(proxy_type, {}),
+        resolve_mixins(definitions, proxy_type),
+    )
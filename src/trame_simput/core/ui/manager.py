@@ -1,7 +1,6 @@
 from pathlib import Path
-from .. import utils
+from .. import models, utils
 from .utils import extract_ui
-import yaml
 import xml.etree.ElementTree as ET
 import logging
 
@@ -9,6 +8,21 @@ logger = logging.getLogger("simput.core.ui")
 logger.setLevel(logging.ERROR)
 
 
+def _copy_language(definition):
+    # The ProxyManager extends the type definitions with their mixins
+    return {
+        _type: dict(lang) if isinstance(lang, dict) else lang
+        for _type, lang in definition.items()
+    }
+
+
+def _parse_ui(xml_content):
+    result = {}
+    for child in ET.fromstring(xml_content):
+        result[child.attrib["id"]] = ET.tostring(child).decode("UTF-8").strip()
+    return result
+
+
 class UIManager:
     """
     UI Manager provide UI information to edit and input object properties
@@ -26,6 +40,8 @@ class UIManager:
         self._ui_xml = {}
         self._ui_lang = {}
         self._ui_resolved = {}
+        self._loaded_files = set()
+        self._shared_models = []
         # event handling
         self._listeners = set()
 
@@ -48,41 +64,117 @@ class UIManager:
     # Definition handling
     # -------------------------------------------------------------------------
 
-    def load_model(self, yaml_file=None, yaml_content=None):
-        self.load_language(yaml_file=yaml_file, yaml_content=yaml_content)
-        return self.proxymanager.load_model(yaml_file, yaml_content)
-
-    def load_language(self, yaml_file=None, yaml_content=None, clear_ui=False):
+    def load_model(
+        self, yaml_file=None, yaml_content=None, cache_dir=None, shared=False
+    ):
+        """
+        Load the model definition along with its language and auto generated
+        UI while only parsing the YAML content once (see ProxyManager.load_model).
+        With shared=True, the language, UI and resolved layouts are referenced
+        from the process-wide models.SHARED_MODELS rather than copied into
+        each session.
+        """
+        model = models.read_model(yaml_file, yaml_content, cache_dir)
+        if model is None:
+            return False
+
+        self._load_model_language(model, shared)
+        return self.proxymanager.load_model(model=model, shared=shared)
+
+    def load_language(
+        self,
+        yaml_file=None,
+        yaml_content=None,
+        clear_ui=False,
+        cache_dir=None,
+        shared=False,
+    ):
         """Load language for the objects form"""
         if clear_ui:
             self.clear_ui()
 
-        if yaml_file:
-            path = Path(yaml_file)
-            if path.exists():
-                yaml_content = path.read_text(encoding="UTF-8")
+        model = models.read_model(yaml_file, yaml_content, cache_dir)
+        if model is None:
+            return False
 
-        if yaml_content:
-            self._ui_lang.update(yaml.safe_load(yaml_content))
-            auto_ui = extract_ui(yaml_content)
-            self._ui_resolved = {}
-            ui_change_count = 0
-            for ui_type in auto_ui:
-                if ui_type not in self._ui_xml:
-                    self._ui_xml[ui_type] = auto_ui[ui_type]
-                    ui_change_count += 1
-
-            if ui_change_count:
-                self._emit("lang+ui")
-            else:
-                self._emit("lang")
+        self._load_model_language(model, shared)
+        return True
 
-            return True
+    def _load_model_language(self, model, shared):
+        """Internal helper registering the language of a models.Model"""
+        if not shared:
+            self._load_language(model.definition)
+            return
 
-        return False
+        shared_model = models.SHARED_MODELS.get(model.digest)
+        if shared_model.language is None:
+            shared_model.set_language(
+                _copy_language(model.definition), extract_ui(model.definition)
+            )
+        self._use_shared_model(shared_model)
+        self._add_language(shared_model.language, shared_model.ui)
+
+    def register_models(self, directory, pattern="*.yaml", cache_dir=None):
+        """
+        Index the types defined by the YAML files of a directory. Their
+        definitions, language and UI only get loaded when first needed
+        (see ProxyManager.register_models).
+        """
+        return self.proxymanager.register_models(directory, pattern, cache_dir)
+
+    def _require(self, _type):
+        """Internal helper loading the language and UI of a registered type"""
+        model_file = self._pxm._registry.file_of(_type)
+        if model_file is None or model_file in self._loaded_files:
+            return
+
+        self._pxm.get_definition(_type)
+        self._loaded_files.add(model_file)
+
+        # Don't override a language loaded explicitly
+        self._load_language(
+            {
+                name: lang
+                for name, lang in model_file.language.items()
+                if name not in self._ui_lang
+            },
+            emit=False,
+        )
+
+    def _use_shared_model(self, shared_model):
+        """Internal helper keeping a shared model alive for that session"""
+        if shared_model not in self._shared_models:
+            self._shared_models.append(shared_model)
+
+    def _load_language(self, definition, emit=True):
+        """Internal helper registering the language of a parsed definition"""
+        self._add_language(_copy_language(definition), extract_ui(definition), emit)
+
+    def _add_language(self, language, auto_ui, emit=True):
+        """Internal helper registering a language and its auto generated UI"""
+        self._ui_lang.update(language)
+        ui_change_count = 0
+        for ui_type in auto_ui:
+            if ui_type not in self._ui_xml:
+                self._ui_xml[ui_type] = auto_ui[ui_type]
+                ui_change_count += 1
+
+        if not emit:
+            # Only new types (nothing to invalidate nor notify)
+            return
+
+        self._ui_resolved = {}
+        if ui_change_count:
+            self._emit("lang+ui")
+        else:
+            self._emit("lang")
 
-    def load_ui(self, xml_file=None, xml_content=None, clear_ui=False):
-        """Load layout for the objects form"""
+    def load_ui(self, xml_file=None, xml_content=None, clear_ui=False, shared=False):
+        """
+        Load layout for the objects form.
+        With shared=True, the XML content is only parsed once per process
+        (see models.SHARED_MODELS).
+        """
         if clear_ui:
             self.clear_ui()
 
@@ -92,10 +184,16 @@ class UIManager:
                 xml_content = path.read_text(encoding="UTF-8")
 
         if xml_content:
-            root = ET.fromstring(xml_content)
-            for child in root:
-                obj_type = child.attrib["id"]
-                self._ui_xml[obj_type] = ET.tostring(child).decode("UTF-8").strip()
+            if shared:
+                shared_model = models.SHARED_MODELS.get(
+                    models.content_digest(xml_content)
+                )
+                if shared_model.ui is None:
+                    shared_model.set_ui(_parse_ui(xml_content))
+                self._use_shared_model(shared_model)
+                self._ui_xml.update(shared_model.ui)
+            else:
+                self._ui_xml.update(_parse_ui(xml_content))
 
             self._ui_resolved = {}
             self._emit("ui")
@@ -141,15 +239,32 @@ class UIManager:
         logger.info("UIManager::data(%s) => No proxy", proxy_id)
         return None
 
+    def data_delta(self, proxy_id, since_mtime):
+        """Return the part of the proxy state that changed after since_mtime"""
+        _proxy = self._pxm.get(proxy_id)
+        if _proxy:
+            return _proxy.state_delta(since_mtime)
+
+        logger.info("UIManager::data_delta(%s) => No proxy", proxy_id)
+        return None
+
     def ui(self, _type):
         """Return resolved layout"""
         if _type in self._ui_resolved:
             return self._ui_resolved[_type]
 
+        if _type not in self._ui_lang:
+            self._require(_type)
+
         model_def = self._pxm.get_definition(_type)
         lang_def = self._ui_lang[_type]
         ui_def = self._ui_xml[_type]
-        resolved = self._ui_resolver.resolve(model_def, lang_def, ui_def)
+        for shared_model in self._shared_models:
+            if shared_model.provides(_type, model_def, lang_def):
+                resolved = shared_model.resolve(self._ui_resolver, _type, ui_def)
+                break
+        else:
+            resolved = self._ui_resolver.resolve(model_def, lang_def, ui_def)
         self._ui_resolved[_type] = resolved
 
         return resolved
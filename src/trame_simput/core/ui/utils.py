@@ -1,56 +1,41 @@
-def extract_ui(yaml_content):
-    ui_map = {}
-    prop_indent = 10
-    current_type = None
-    current_list = []
-    last_property = None
-    for line in yaml_content.splitlines():
-        stline = line.strip()
-        sline = stline.split(":")[0]
-        # Skip empty lines or comments
-        if len(sline) == 0 or sline[0] == "#":
-            # print(f"skip a: {sline}")
-            continue
-
-        indent = line.index(sline)
-        if indent == 0:
-            # Detect new object definition
-            if current_type:
-                # print(f"Add ui for {current_type}")
-                current_list.insert(0, f'<ui id="{current_type}">')
-                current_list.append("</ui>")
-                ui_map[current_type] = "\n".join(current_list)
-                current_list = []
-            current_type = line.strip().split(":")[0]
-        else:
-            # Detect property
-            if prop_indent > indent:
-                prop_indent = indent
-
-            # skip hidden prop
-            if stline == "_ui: skip":
-                last_property = None
-                current_list.pop()
-                continue
+def extract_ui(definitions):
+    """
+    Generate the default UI layout of each type from a parsed model/language
+    definition where each property is an input unless it is flagged with
+    `_ui: skip`. Proxy properties also get a proxy entry unless flagged with
+    `_ui: proxy`. The YAML content can also be provided as a string.
+    """
+    if isinstance(definitions, str):
+        from ..models import parse_yaml
+
+        definitions = parse_yaml(definitions) or {}
 
-            # skip object prop
-            if stline == "_ui: proxy":
-                current_list.pop()
+    ui_map = {}
+    for current_type, properties in definitions.items():
+        current_list = [f'<ui id="{current_type}">']
+        if not isinstance(properties, dict):
+            properties = {}
+        for name, prop in properties.items():
+            if name.startswith("_"):
                 continue
 
-            if stline == "type: proxy" and last_property:
-                current_list.append(f'  <proxy name="{last_property}" />')
-
-            if indent > prop_indent or sline[0] == "_":
+            # Entries follow the order of the property attributes
+            current_list.append(f'  <input name="{name}" />')
+            last_property = name
+            if not isinstance(prop, dict):
                 continue
-
-            current_list.append(f'  <input name="{sline}" />')
-            last_property = sline
-
-    # Always have a ui container
-    # print(f"Add ui for {current_type}")
-    current_list.insert(0, f'<ui id="{current_type}">')
-    current_list.append("</ui>")
-    ui_map[current_type] = "\n".join(current_list)
+            for key, value in prop.items():
+                if key == "_ui" and value == "skip":
+                    # skip hidden prop
+                    last_property = None
+                    current_list.pop()
+                elif key == "_ui" and value == "proxy":
+                    # skip object prop
+                    current_list.pop()
+                elif key == "type" and value == "proxy" and last_property:
+                    current_list.append(f'  <proxy name="{last_property}" />')
+
+        current_list.append("</ui>")
+        ui_map[current_type] = "\n".join(current_list)
 
     return ui_map
@@ -1,3 +1,6 @@
+from .arrays import TypedArray
+
+
 def create_id_generator(prefix=""):
     """Generic id generator"""
     count = 1
@@ -6,9 +9,29 @@ def create_id_generator(prefix=""):
         count += 1
 
 
-def is_equal(a, b):
+def is_close(a, b, tolerance):
+    """Return True if both numbers or lists of numbers are within tolerance"""
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) <= tolerance
+    if isinstance(a, (list, tuple, TypedArray)) and isinstance(
+        b, (list, tuple, TypedArray)
+    ):
+        if len(a) != len(b):
+            return False
+        for item_a, item_b in zip(a, b):
+            if not is_close(item_a, item_b, tolerance):
+                return False
+        return True
+    return a == b
+
+
+def is_equal(a, b, tolerance=None):
     """Return True if both value can be conciderated as the same"""
-    # might need some deeper investigation
+    if a is b:
+        return True
+    if tolerance:
+        return is_close(a, b, tolerance)
+    # TypedArray are compared through the digest they keep
     return a == b
 
 
@@ -16,7 +39,7 @@ def is_valid_value(v):
     """Return true if a value can be stored into a property of a proxy"""
     if v is None:
         return False
-    if isinstance(v, (str, bool, int, float)):
+    if isinstance(v, (str, bool, int, float, TypedArray)):
         return True
     if isinstance(v, (list, tuple)):
         for item in v:
@@ -24,3 +47,14 @@ def is_valid_value(v):
                 return False
         return True
     return False
+
+
+def iter_lines(content):
+    """Lazily iterate over the lines of a string without splitting it upfront"""
+    start = 0
+    size = len(content)
+    while start < size:
+        end = content.find("\n", start)
+        end = size if end < 0 else end + 1
+        yield content[start:end]
+        start = end
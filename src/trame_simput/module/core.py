@@ -3,6 +3,8 @@ import json
 import logging
 from pathlib import Path
 
+from trame_simput.core.arrays import json_default
+
 logger = logging.getLogger("simput.core.controller")
 logger.setLevel(logging.ERROR)
 
@@ -14,12 +16,16 @@ class SimputController:
         ui_manager,
         namespace="simput",
         log_dir=None,
+        watch_changeset=False,
     ):
         logger.info("created")
         self._server = server
         self._ui_manager = ui_manager
         self._namespace = namespace
         self._pending_changeset = {}
+        self._pending_count = 0
+        self._domains_mtime = {}
+        self._data_mtime = {}
         self._auto_update = False
         self._log_directory = log_dir if log_dir else os.environ.get("SIMPUT_LOG_DIR")
 
@@ -27,6 +33,7 @@ class SimputController:
         self.id_key = f"{namespace}Id"
         self.changecount_key = f"{namespace}ChangeSet"
         self.changeset_key = f"{namespace}ChangeSetContent"
+        self.watch_key = f"{namespace}ChangeSetWatch"
         self.auto_key = f"{namespace}AutoApply"
         self.apply_key = f"{namespace}Apply"
         self.reset_key = f"{namespace}Reset"
@@ -34,19 +41,27 @@ class SimputController:
         self.update_key = f"{namespace}Update"
         self.refresh_key = f"{namespace}Refresh"
         self.reset_cache_key = f"{namespace}ResetCache"
+        self.undo_key = f"{namespace}Undo"
+        self.redo_key = f"{namespace}Redo"
+        self.history_key = f"{namespace}History"
 
         # Attach annotations
         self._server.state[self.id_key] = self._ui_manager.id
-        self._server.state[self.changecount_key] = len(self.changeset)
-        self._server.state[self.changeset_key] = self.changeset
+        self._server.state[self.changecount_key] = 0
+        self._server.state[self.changeset_key] = []
+        self._server.state[self.watch_key] = watch_changeset
         self._server.state[self.auto_key] = self._auto_update
+        self._server.state[self.history_key] = {"undo": 0, "redo": 0}
         self._server.change(self.auto_key)(self._update_auto)
+        self._server.change(self.watch_key)(self._update_watch)
         self._server.trigger(self.apply_key)(self.apply)
         self._server.trigger(self.reset_key)(self.reset)
         self._server.trigger(self.fetch_key)(self.push)
         self._server.trigger(self.update_key)(self.update)
         self._server.trigger(self.refresh_key)(self.refresh)
         self._server.trigger(self.reset_cache_key)(self.reset_cache)
+        self._server.trigger(self.undo_key)(self.undo)
+        self._server.trigger(self.redo_key)(self.redo)
 
         # Monitor ui change
         self._ui_manager.on(self._ui_change)
@@ -65,7 +80,7 @@ class SimputController:
         if self._log_directory:
             full_path = Path(self._log_directory) / f"{id}_{name}.json"
             with open(full_path, "w") as file:
-                file.write(json.dumps(content, indent=2))
+                file.write(json.dumps(content, indent=2, default=json_default))
 
     @property
     def changeset(self):
@@ -83,20 +98,37 @@ class SimputController:
                 )
         return change_set
 
+    def _publish_changeset(self):
+        """
+        Publish the number of pending changes and only publish their content
+        when a client is watching it ({namespace}ChangeSetWatch).
+        """
+        self._server.state[self.changecount_key] = self._pending_count
+        if self._server.state[self.watch_key]:
+            self._server.state[self.changeset_key] = self.changeset
+
+    def _update_watch(self, **kwargs):
+        logger.info("_update_watch")
+        if self._server.state[self.watch_key]:
+            self._server.state[self.changeset_key] = self.changeset
+        else:
+            self._server.state[self.changeset_key] = []
+
     def apply(self):
         logger.info("apply")
         self._ui_manager.proxymanager.commit_all()
 
         # Make sure reset don't send things twice
         self._pending_changeset = {}
+        self._pending_count = 0
         self.reset()
 
     def reset(self):
         logger.info("reset")
         ids_to_update = list(self._pending_changeset.keys())
         self._pending_changeset = {}
-        self._server.state[self.changecount_key] = 0
-        self._server.state[self.changeset_key] = []
+        self._pending_count = 0
+        self._publish_changeset()
 
         self._ui_manager.proxymanager.reset_all()
 
@@ -119,7 +151,8 @@ class SimputController:
             change_count += domain.set_value()
 
         if change_count:
-            for _id in proxy.proxymanager.list_and_clean_proxy_domains():
+            all_ids, _ = proxy.manager.apply_domains()
+            for _id in all_ids:
                 self.push(id=_id)
 
             if self._auto_update:
@@ -127,12 +160,17 @@ class SimputController:
 
     def reset_cache(self):
         logger.info("reset_cache")
+        self._domains_mtime = {}
+        self._data_mtime = {}
         self._server.protocol_call("simput.reset.cache")
 
     def push(self, id=None, type=None, domains=None):
         logger.info("push id(%s) - type(%s) - domains(%s)", id, type, domains)
         if id:
             self._server.protocol_call("simput.data.get", self._ui_manager.id, id)
+            proxy = self._ui_manager.proxymanager.get(id)
+            if proxy:
+                self._data_mtime[id] = proxy.property_mtime
         if type:
             self._server.protocol_call("simput.ui.get", self._ui_manager.id, type)
 
@@ -140,6 +178,9 @@ class SimputController:
             self._server.protocol_call(
                 "simput.domains.get", self._ui_manager.id, domains
             )
+            proxy = self._ui_manager.proxymanager.get(domains)
+            if proxy:
+                self._domains_mtime[domains] = proxy.domains_mtime
 
     def emit(self, topic, **kwargs):
         if not self._server.protocol:
@@ -156,10 +197,9 @@ class SimputController:
             _name = change.get("name")
             _value = change.get("value")
 
-            if _id not in self._pending_changeset:
-                self._pending_changeset[_id] = {}
-            _obj_change = self._pending_changeset[_id]
-
+            _obj_change = self._pending_changeset.setdefault(_id, {})
+            if _name not in _obj_change:
+                self._pending_count += 1
             _obj_change[_name] = _value
 
             # debug
@@ -171,31 +211,35 @@ class SimputController:
             for _id in id_map:
                 self._log(_id, "change", id_map[_id])
 
-        self._server.state[self.changecount_key] = len(self.changeset)
-        self._server.state[self.changeset_key] = self.changeset
+        self._publish_changeset()
 
         # Update data
         pxm.update(change_set)
 
-        # Run domains
-        change_detected = 1
-        all_ids = set()
-        data_ids = set()
-
         # Execute domains
-        while change_detected:
-            change_detected = 0
-            m_ids = pxm.list_and_clean_proxy_domains()
-            all_ids.update(m_ids)
-            for _id in m_ids:
-                if pxm.get(_id).domains_apply():
-                    data_ids.add(_id)
-                    change_detected += 1
+        all_ids, data_ids = pxm.apply_domains()
+        self._push_changes(all_ids, data_ids)
+
+        if self._auto_update:
+            self.apply()
+
+    def _push_changes(self, all_ids, data_ids):
+        """Push the domains and data of the proxies that changed"""
+        pxm = self._ui_manager.proxymanager
 
         # Push any changed state in domains
         for _id in all_ids:
             pxm.clean_proxy_domains(_id)
             proxy = pxm.get(_id)
+            if proxy is None:
+                continue
+
+            # Skip proxies for which the domains evaluation did not change
+            domains_mtime = proxy.domains_mtime
+            if self._domains_mtime.get(_id) == domains_mtime:
+                continue
+            self._domains_mtime[_id] = domains_mtime
+
             _domain = proxy.domains_state
             self._log(_id, "domain", _domain)
             self._server.protocol_call(
@@ -207,22 +251,85 @@ class SimputController:
             )
 
         for _id in data_ids:
-            _data = self._ui_manager.data(_id)
-            self._log(_id, "data", _data)
-            self._server.protocol_call(
-                "simput.message.push",
-                {
-                    "id": _id,
-                    "data": _data,
-                },
-            )
+            proxy = pxm.get(_id)
+            if proxy is None:
+                continue
+
+            # Only send the properties that changed since the last push
+            since_mtime = self._data_mtime.get(_id)
+            self._data_mtime[_id] = proxy.property_mtime
+            if since_mtime is None:
+                _data = self._ui_manager.data(_id)
+                self._log(_id, "data", _data)
+                self._server.protocol_call(
+                    "simput.message.push",
+                    {
+                        "id": _id,
+                        "data": _data,
+                    },
+                )
+            else:
+                _delta = self._ui_manager.data_delta(_id, since_mtime)
+                self._log(_id, "delta", _delta)
+                self._server.protocol_call(
+                    "simput.message.push",
+                    {
+                        "id": _id,
+                        "delta": _delta,
+                    },
+                )
 
-        if self._auto_update:
-            self.apply()
+    def undo(self):
+        logger.info("undo")
+        history = self._ui_manager.proxymanager.history
+        if history is not None:
+            self._apply_history(history.undo())
+
+    def redo(self):
+        logger.info("redo")
+        history = self._ui_manager.proxymanager.history
+        if history is not None:
+            self._apply_history(history.redo())
+
+    def _apply_history(self, ids):
+        """Push to the client the proxies affected by an undo/redo"""
+        pxm = self._ui_manager.proxymanager
+
+        # Forget the pending changes that got reverted
+        change_count = self._pending_count
+        for _id in ids:
+            pending = self._pending_changeset.get(_id)
+            if not pending:
+                continue
+            proxy = pxm.get(_id)
+            edited = proxy.edited_property_names if proxy else ()
+            for name in [name for name in pending if name not in edited]:
+                del pending[name]
+                self._pending_count -= 1
+            if not pending:
+                del self._pending_changeset[_id]
+        if change_count != self._pending_count:
+            self._publish_changeset()
+
+        all_ids, data_ids = pxm.apply_domains()
+        all_ids = set(all_ids)
+        data_ids = set(data_ids)
+        for _id in ids:
+            if pxm.get(_id) is not None:
+                all_ids.add(_id)
+                data_ids.add(_id)
+        self._push_changes(all_ids, data_ids)
+        self._publish_history()
+
+    def _publish_history(self):
+        history = self._ui_manager.proxymanager.history
+        state = history.state if history is not None else {"undo": 0, "redo": 0}
+        if self._server.state[self.history_key] != state:
+            self._server.state[self.history_key] = state
 
     @property
     def has_changes(self):
-        return len(self._pending_changeset) > 0
+        return self._pending_count > 0
 
     @property
     def auto_update(self):
@@ -250,11 +357,16 @@ class SimputController:
     def _data_change(self, action, **kwargs):
         logger.info("_data_change")
         self.emit("data-change", action=action, **kwargs)
+        self._publish_history()
 
-        if action == "commit":
+        if action in ("commit", "deleted"):
             _ids = kwargs.get("ids", [])
+            change_count = self._pending_count
             for _id in _ids:
                 if _id in self._pending_changeset:
-                    self._pending_changeset.pop(_id)
-            self._server.state[self.changecount_key] = len(self.changeset)
-            self._server.state[self.changeset_key] = self.changeset
+                    self._pending_count -= len(self._pending_changeset.pop(_id))
+                if action == "deleted":
+                    self._data_mtime.pop(_id, None)
+                    self._domains_mtime.pop(_id, None)
+            if change_count != self._pending_count:
+                self._publish_changeset()
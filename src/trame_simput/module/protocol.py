@@ -6,6 +6,7 @@ from wslink import register as exportRpc
 from wslink.websocket import LinkProtocol
 
 from trame_simput.core.factory import get_simput_manager
+from trame_simput.core.arrays import encode_properties, json_default
 import logging
 
 logger = logging.getLogger("simput.core.protocol")
@@ -26,7 +27,7 @@ class SimputProtocol(LinkProtocol):
         if self._log_directory:
             full_path = Path(self._log_directory) / f"{id}_{name}.json"
             with open(full_path, "w") as file:
-                file.write(json.dumps(content, indent=2))
+                file.write(json.dumps(content, indent=2, default=json_default))
 
     @exportRpc("simput.reset.cache")
     def reset_cache(self):
@@ -52,7 +53,21 @@ class SimputProtocol(LinkProtocol):
         if type is not None:
             message.update({"ui": uim.ui(type)})
 
-        self.publish("simput.push", message)
+        self.publish("simput.push", self._encode_arrays(message))
+
+    def _encode_arrays(self, message):
+        """
+        Send the content of typed array properties as binary, the buffers
+        are part of the message and get serialized by wslink as is.
+        """
+        for key in ("data", "delta"):
+            content = message.get(key)
+            if content and "properties" in content:
+                properties = encode_properties(content["properties"])
+                if properties is not content["properties"]:
+                    message = {**message, key: {**content, "properties": properties}}
+
+        return message
 
     @exportRpc("simput.data.get")
     def get_data(self, manager_id, id):
@@ -60,7 +75,7 @@ class SimputProtocol(LinkProtocol):
         uim = get_simput_manager(manager_id)
         _data = uim.data(id)
         self._log(id, "data", _data)
-        msg = {"id": id, "data": _data}
+        msg = self._encode_arrays({"id": id, "data": _data})
         self.send_message(msg)
         return msg
 
@@ -81,6 +96,8 @@ class SimputProtocol(LinkProtocol):
         pxm.clean_proxy_domains(id)
         proxy = pxm.get(id)
         if proxy:
+            # Explicit request: domains may depend on external state
+            proxy.domains_invalidate()
             _domain = proxy.domains_state
             self._log(id, "domain", _domain)
             msg["domains"] = _domain
@@ -101,7 +118,7 @@ class SimputProtocol(LinkProtocol):
                 return
             self.net_cache_domains[_id] = to_send
         # - end
-        self.publish("simput.push", message)
+        self.publish("simput.push", self._encode_arrays(message))
 
     @exportRpc("simput.push.event")
     def emit(self, topic, **kwargs):
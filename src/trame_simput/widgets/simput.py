@@ -60,6 +60,18 @@ class Simput(HtmlElement):
         """
         self._helper.reset()
 
+    def undo(self, **kwargs):
+        """
+        Revert the latest change (requires proxymanager.enable_history())
+        """
+        self._helper.undo()
+
+    def redo(self, **kwargs):
+        """
+        Apply again the latest reverted change
+        """
+        self._helper.redo()
+
     def push(self, id=None, type=None, domains=None, proxy=None, **kwargs):
         """
         Ask server to push data, ui, or constraints
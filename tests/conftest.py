@@ -0,0 +1,68 @@
+import pytest
+
+from trame_simput.core.mapping import ObjectFactory, ProxyObjectAdapter
+from trame_simput.core.proxy import ProxyManager
+
+
+class Factory(ObjectFactory):
+    """Create a plain dict as the concrete object of each proxy"""
+
+    def create(self, name, **kwargs):
+        return {"type": name}
+
+
+class Adapter(ProxyObjectAdapter):
+    """Mirror the pushed values into the dict objects and record the calls"""
+
+    def __init__(self):
+        self.updates = []
+        self.deleted = []
+
+    def update(self, proxy, *property_names):
+        self.updates.append((proxy.id, sorted(property_names)))
+        for name in property_names:
+            proxy.object[name] = proxy.get_property(name)
+
+    def before_delete(self, proxy):
+        self.deleted.append(proxy.id)
+
+
+class FakeServer:
+    """Minimal trame server recording the protocol calls"""
+
+    def __init__(self):
+        self.state = {}
+        self.protocol = True
+        self.calls = []
+
+    def change(self, key):
+        return lambda fn: fn
+
+    def trigger(self, key):
+        return lambda fn: fn
+
+    def protocol_call(self, name, *args, **kwargs):
+        self.calls.append((name, args))
+
+
+def create_manager(model, adapter=None):
+    """
+    Return a ProxyManager with a YAML model loaded. With an adapter, the
+    proxies get a Factory object kept in sync by that adapter.
+    """
+    if adapter is None:
+        pxm = ProxyManager()
+    else:
+        pxm = ProxyManager(object_factory=Factory(), object_adapter=adapter)
+    pxm.load_model(yaml_content=model)
+    return pxm
+
+
+@pytest.fixture
+def adapter():
+    return Adapter()
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
@@ -0,0 +1,106 @@
+import json
+
+import msgpack
+import pytest
+
+from trame_simput import get_simput_manager
+from trame_simput.core.arrays import (
+    TypedArray,
+    encode_properties,
+    json_default,
+    to_typed_array,
+)
+from trame_simput.module.protocol import SimputProtocol
+
+MODEL = """
+Item:
+  Points:
+    type: float32
+    array: true
+    initial: [1, 2, 3]
+  Label:
+    type: string
+    initial: points
+"""
+
+
+def test_typed_array_equality():
+    values = TypedArray([1, 2, 3], "float32")
+    assert values == TypedArray([1.0, 2.0, 3.0], "float32")
+    assert values == [1, 2, 3]
+    assert values != [1, 2]
+    assert values != TypedArray([1, 2, 3], "float64")
+    assert values != TypedArray([1, 2, 4], "float32")
+
+    # The digest is computed once and only depends on the dtype and content
+    assert values.digest == TypedArray(values.tobytes(), "float32").digest
+    assert values.digest is values.digest
+    assert values.digest != TypedArray([1, 2, 3], "int32").digest
+    assert hash(values) == hash(TypedArray([1, 2, 3], "float32"))
+
+    with pytest.raises(ValueError):
+        TypedArray([1], "complex")
+
+
+def test_to_typed_array():
+    values = TypedArray([1, 2, 3], "float64")
+    assert to_typed_array(None) is None
+    assert to_typed_array(values, "float64") is values
+
+    # Coerced to the requested dtype whatever the source
+    for source in (values, [1, 2, 3], (1, 2, 3), values.to_state()):
+        result = to_typed_array(source, "int16")
+        assert result.dtype == "int16"
+        assert result.tolist() == [1, 2, 3]
+
+    buffer = {"dtype": "float64", "buffer": values.tobytes()}
+    assert to_typed_array(buffer, "float32") == TypedArray([1, 2, 3], "float32")
+    assert to_typed_array([1.7], "int32").tolist() == [1]
+
+
+def test_encode_round_trip():
+    values = TypedArray([0.5, 1.5], "float32")
+    properties = {"Points": values, "Label": "a"}
+
+    # JSON state (files, logs)
+    state = json.loads(json.dumps(properties, default=json_default))
+    assert to_typed_array(state["Points"], "float32") == values
+    with pytest.raises(TypeError):
+        json.dumps({"value": object()}, default=json_default)
+
+    # Binary messages
+    encoded = encode_properties(properties)
+    assert encoded is not properties
+    assert encoded["Label"] == "a"
+    assert encoded["Points"]["dtype"] == "float32"
+    assert isinstance(encoded["Points"]["buffer"], memoryview)
+    assert to_typed_array(encoded["Points"], "float32") == values
+
+    # Nothing to encode, nothing copied
+    plain = {"Label": "a"}
+    assert encode_properties(plain) is plain
+    assert encode_properties(None) is None
+
+
+def test_protocol_binary_push():
+    ui_manager = get_simput_manager()
+    ui_manager.load_model(yaml_content=MODEL)
+    proxy = ui_manager.proxymanager.create("Item")
+
+    protocol = SimputProtocol()
+    published = []
+    protocol.publish = lambda topic, message: published.append((topic, message))
+    protocol.push(ui_manager.id, id=proxy.id)
+
+    ((topic, message),) = published
+    assert topic == "simput.push"
+    points = message["data"]["properties"]["Points"]
+    assert points["dtype"] == "float32"
+    assert isinstance(points["buffer"], memoryview)
+    assert message["data"]["properties"]["Label"] == "points"
+
+    # The buffer is sent as binary by wslink (msgpack)
+    received = msgpack.unpackb(msgpack.packb(message))
+    points = received["data"]["properties"]["Points"]
+    assert isinstance(points["buffer"], bytes)
+    assert to_typed_array(points, "float32") == proxy.Points
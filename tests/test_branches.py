@@ -0,0 +1,150 @@
+import gc
+
+import pytest
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+  Child:
+    type: proxy
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Child:
+  Value:
+    type: float64
+    initial: 1
+"""
+
+
+def content(source):
+    return {
+        proxy.id: (proxy.type, sorted(proxy.own), proxy.state["properties"])
+        for proxy in source
+    }
+
+
+def live_content(pxm):
+    return {
+        proxy_id: (proxy.type, sorted(proxy.own), proxy.state["properties"])
+        for proxy_id, proxy in pxm._id_map.items()
+    }
+
+
+def test_snapshot():
+    pxm = create_manager(MODEL)
+    items = pxm.create_many("Item", 10)
+    items[1].Child = items[0]
+    expected = live_content(pxm)
+
+    snapshot = pxm.snapshot()
+    assert snapshot.preserved_count == 0
+    assert content(snapshot) == expected
+
+    # Only the modified, deleted and created proxies get tracked
+    items[2].Opacity = 0.9
+    pxm.delete(items[0].id)  # also clear items[1].Child
+    created = pxm.create("Item")
+    assert snapshot.preserved_count == 3 + 3
+    assert content(snapshot) == expected
+    assert created.id not in snapshot
+    assert snapshot.get(items[1].id).Child.id == items[0].id
+    assert snapshot.get(items[2].id).Opacity == 0.5
+    assert len(snapshot.get_instances_of_type("Item")) == 10
+
+    with pytest.raises(AttributeError):
+        snapshot.get(items[2].id).Opacity = 0.1
+
+    # Dropped snapshots stop tracking the changes
+    del snapshot
+    gc.collect()
+    assert not pxm._snapshots
+
+
+def test_branch_diff_merge():
+    pxm = create_manager(MODEL)
+    items = pxm.create_many("Item", 5)
+    pxm.commit_all()
+    history = pxm.enable_history()
+    before = live_content(pxm)
+
+    branch = pxm.branch()
+    branch.get(items[0].id).Opacity = 0.2
+    created = branch.create("Item", Child=branch.get(items[0].id))
+    branch.delete(items[1].id)
+
+    # The live state is untouched
+    assert live_content(pxm) == before
+    assert len(branch._records) == 1 + 3 + 1
+
+    diff = branch.diff()
+    assert diff["updated"] == [{"id": items[0].id, "name": "Opacity", "value": 0.2}]
+    assert [state["id"] for state in diff["created"]] == [
+        *created.state["properties"]["Pair"],
+        created.id,
+    ]
+    assert sorted(diff["deleted"]) == sorted([items[1].id, *items[1].own])
+    expected = content(branch)
+
+    # Conflicting edit on the live side
+    items[0].Opacity = 0.7
+    assert branch.conflicts() == [(items[0].id, "Opacity")]
+    with pytest.raises(ValueError):
+        branch.merge()
+
+    items[0].reset()
+    assert branch.conflicts() == []
+    branch.merge()
+    assert live_content(pxm) == expected
+    assert pxm.get(created.id).Child is items[0]
+    assert not branch.diff()["updated"]
+
+    # A merge is a single undo step
+    history.undo()
+    assert live_content(pxm) == before
+
+
+DOMAIN_MODEL = """
+Item:
+  Mode:
+    type: string
+    domains:
+      - type: LabelList
+        initial: first
+        values:
+          - text: A
+            value: a
+          - text: B
+            value: b
+  Opacity:
+    type: float64
+    initial: 0.5
+    domains:
+      - type: Range
+        value_range: [0, 1]
+        initial: mean
+"""
+
+
+def test_merge_evaluates_domains():
+    pxm = create_manager(DOMAIN_MODEL)
+    branch = pxm.branch()
+    created = branch.create("Item")
+
+    # Branches store values as is
+    assert (created.Mode, created.Opacity) == (None, 0.5)
+
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append(topic))
+    branch.merge()
+
+    # Merged proxies get their domains evaluated like created ones
+    proxy = pxm.get(created.id)
+    assert (proxy.Mode, proxy.Opacity) == ("a", 0.5)
+    assert not proxy.edited_property_names
+    assert events == ["created"]
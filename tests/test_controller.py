@@ -0,0 +1,100 @@
+from trame_simput import get_simput_manager
+from trame_simput.module.core import SimputController
+
+MODEL = """
+Item:
+  Name:
+    type: string
+  Opacity:
+    type: float64
+    initial: 0.5
+"""
+
+
+def create_controller(server, **kwargs):
+    ui_manager = get_simput_manager()
+    ui_manager.load_model(yaml_content=MODEL)
+    proxies = [ui_manager.proxymanager.create("Item") for _ in range(2)]
+    return SimputController(server, ui_manager, **kwargs), proxies
+
+
+def test_changeset_watch(server):
+    controller, (first, second) = create_controller(server)
+    count_key = controller.changecount_key
+    content_key = controller.changeset_key
+
+    # Only the count is published while nobody watches the content
+    controller.update([{"id": first.id, "name": "Name", "value": "a"}])
+    assert server.state[count_key] == 1
+    assert server.state[content_key] == []
+
+    server.state[controller.watch_key] = True
+    controller._update_watch()
+    assert server.state[content_key] == controller.changeset
+    controller.update([{"id": second.id, "name": "Opacity", "value": 0.1}])
+    assert server.state[count_key] == 2
+    assert server.state[content_key] == [
+        {"id": first.id, "name": "Name", "value": "a"},
+        {"id": second.id, "name": "Opacity", "value": 0.1},
+    ]
+
+    server.state[controller.watch_key] = False
+    controller._update_watch()
+    assert server.state[content_key] == []
+
+    # Watching from the start
+    controller, (proxy, _) = create_controller(server, watch_changeset=True)
+    controller.update([{"id": proxy.id, "name": "Name", "value": "b"}])
+    assert server.state[content_key] == controller.changeset
+
+
+def test_changeset_count(server):
+    controller, (first, second) = create_controller(server)
+    count_key = controller.changecount_key
+
+    # One per pending property whatever the number of updates
+    controller.update(
+        [
+            {"id": first.id, "name": "Name", "value": "a"},
+            {"id": first.id, "name": "Name", "value": "b"},
+            {"id": second.id, "name": "Name", "value": "c"},
+        ]
+    )
+    controller.update([{"id": first.id, "name": "Opacity", "value": 0.2}])
+    controller.update([{"id": first.id, "name": "Opacity", "value": 0.3}])
+    assert server.state[count_key] == 3
+    assert len(controller.changeset) == 3
+
+    controller.apply()
+    assert server.state[count_key] == 0
+    assert not first.edited_property_names
+    assert (first.Name, first.Opacity, second.Name) == ("b", 0.3, "c")
+
+    controller.update([{"id": second.id, "name": "Opacity", "value": 0.9}])
+    assert server.state[count_key] == 1
+    controller.reset()
+    assert server.state[count_key] == 0
+    assert second.Opacity == 0.5
+
+    # Commits and deletions made on the ProxyManager are accounted for
+    pxm = controller._ui_manager.proxymanager
+    controller.update(
+        [
+            {"id": first.id, "name": "Name", "value": "e"},
+            {"id": first.id, "name": "Opacity", "value": 0.4},
+            {"id": second.id, "name": "Name", "value": "f"},
+        ]
+    )
+    assert server.state[count_key] == 3
+    pxm.delete(second.id)
+    assert server.state[count_key] == 2
+    pxm.commit_all()
+    assert server.state[count_key] == 0
+    assert controller.changeset == []
+
+    # Auto apply keeps nothing pending
+    second = pxm.create("Item")
+    controller.auto_update = True
+    controller.update([{"id": second.id, "name": "Name", "value": "d"}])
+    assert server.state[count_key] == 0
+    assert second.Name == "d"
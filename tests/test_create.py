@@ -0,0 +1,93 @@
+import logging
+
+from trame_simput.core.mapping import ProxyManagerLifeCycleListener
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Child:
+  Value:
+    type: float64
+    initial: 1
+"""
+
+
+class Recorder(ProxyManagerLifeCycleListener):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def proxies_create_before(self, proxy_type, initial_values, **kwargs):
+        self.calls.append(("before", proxy_type, len(initial_values)))
+
+    def proxies_create_before_commit(
+        self, proxy_type, initial_values, proxies, **kwargs
+    ):
+        assert all(proxy.edited_property_names for proxy in proxies)
+        self.calls.append(("before_commit", proxy_type, len(proxies)))
+
+    def proxies_create_after_commit(
+        self, proxy_type, initial_values, proxies, **kwargs
+    ):
+        assert not any(proxy.edited_property_names for proxy in proxies)
+        self.calls.append(("after_commit", proxy_type, len(proxies)))
+
+    def proxy_create_before(self, proxy_type, initial_values, **kwargs):
+        self.calls.append(("single", proxy_type))
+
+
+def test_create_many(adapter):
+    pxm = create_manager(MODEL, adapter)
+    recorder = Recorder()
+    pxm.add_life_cycle_listener(recorder)
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, kwargs["ids"])))
+
+    items = pxm.create_many("Item", [{"Opacity": 0.1}, {}, {"Opacity": 0.3}])
+    assert [item.Opacity for item in items] == [0.1, 0.5, 0.3]
+
+    # Batched hooks, the Item ones wrap the Child ones of the sub-proxies
+    item_calls = [call for call in recorder.calls if call[1] == "Item"]
+    assert item_calls == [
+        ("before", "Item", 3),
+        ("before_commit", "Item", 3),
+        ("after_commit", "Item", 3),
+    ]
+    assert recorder.calls.count(("before", "Child", 2)) == 3
+    assert not any(call[0] == "single" for call in recorder.calls)
+
+    # The sub-proxies get created with their parent
+    children = [child for item in items for child in item.Pair]
+    assert len(set(child.id for child in children)) == 6
+    assert all(child.type == "Child" and child.Value == 1 for child in children)
+
+    # A single event for the whole batch
+    item_events = [(topic, ids) for topic, ids in events if items[0].id in ids]
+    assert item_events == [("created", [item.id for item in items])]
+    created = [_id for topic, ids in events if topic == "created" for _id in ids]
+    assert sorted(created) == sorted(
+        [item.id for item in items] + [c.id for c in children]
+    )
+
+    # Objects got the initial values
+    assert all(item.object["Opacity"] == item.Opacity for item in items)
+
+
+def test_unknown_initial_values(caplog):
+    pxm = create_manager(MODEL)
+    with caplog.at_level(logging.WARNING, logger="simput.core.proxy"):
+        single = pxm.create("Item", Opacity=0.2, Missing=1)
+        (batch,) = pxm.create_many("Item", [{"Opacity": 0.2, "Missing": 1}])
+
+    # Both paths report the unknown property and keep the known ones
+    warnings = [r.getMessage() for r in caplog.records]
+    assert warnings == ["No definition found for 'Missing'"] * 2
+    assert single.Opacity == batch.Opacity == 0.2
@@ -0,0 +1,238 @@
+import weakref
+
+from trame_simput import get_simput_manager
+from trame_simput.core.domains import (
+    PropertyDomain,
+    Range,
+    register_property_domain,
+)
+from trame_simput.module.core import SimputController
+from trame_simput.module.protocol import SimputProtocol
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Min:
+    type: float64
+    initial: 0
+  Value:
+    type: float64
+    initial: 0.5
+    domains:
+      - type: CountingRange
+        value_range: [0, 1]
+        level: 2
+  Label:
+    type: string
+"""
+
+
+class CountingRange(Range):
+    evaluations = 0
+
+    def available(self):
+        CountingRange.evaluations += 1
+        return super().available()
+
+
+register_property_domain("CountingRange", CountingRange)
+
+
+def create_proxy():
+    ui_manager = get_simput_manager()
+    ui_manager.load_model(yaml_content=MODEL)
+    return ui_manager, ui_manager.proxymanager.create("Item")
+
+
+def domain_pushes(server):
+    return [args[0] for name, args in server.calls if name == "simput.message.push"]
+
+
+def test_domains_state_cache():
+    _, proxy = create_proxy()
+    domain = proxy.get_property_domains("Value")["CountingRange"]
+    state = proxy.domains_state
+    mtime = proxy.domains_mtime
+    assert state["Value"]["CountingRange"]["valid"]
+
+    # Cached until a dependent property changes
+    count = CountingRange.evaluations
+    assert proxy.domains_state is state
+    assert proxy.domains_mtime == mtime
+    assert CountingRange.evaluations == count
+
+    proxy.Label = "not a dependency"
+    assert proxy.domains_state is state
+    assert CountingRange.evaluations == count
+
+    proxy.Value = 2
+    state = proxy.domains_state
+    assert not state["Value"]["CountingRange"]["valid"]
+    assert proxy.domains_mtime == mtime + 1
+    assert CountingRange.evaluations > count
+
+    # Same evaluation => same mtime
+    proxy.reset()
+    mtime = proxy.domains_mtime
+    proxy.Value = 0.25
+    proxy.Value = 0.75
+    assert proxy.domains_mtime == mtime
+    assert proxy.domains_state["Value"]["CountingRange"]["valid"]
+
+    # Configuration change
+    domain.level = 0
+    proxy.Value = 5
+    assert proxy.domains_state["Value"]["CountingRange"]["valid"]
+
+
+def test_reload_domain():
+    ui_manager, proxy = create_proxy()
+    proxy.domains_state
+
+    protocol = SimputProtocol()
+    messages = []
+    protocol.send_message = messages.append
+
+    # An explicit request re-evaluates the domains
+    count = CountingRange.evaluations
+    protocol.get_domains(ui_manager.id, proxy.id)
+    assert CountingRange.evaluations > count
+    assert messages[-1]["domains"] == proxy.domains_state
+
+
+def test_push_changed_domains_only(server):
+    ui_manager, proxy = create_proxy()
+    controller = SimputController(server, ui_manager)
+
+    controller.update([{"id": proxy.id, "name": "Value", "value": 2}])
+    pushes = domain_pushes(server)
+    assert [push["id"] for push in pushes] == [proxy.id]
+    assert not pushes[0]["domains"]["Value"]["CountingRange"]["valid"]
+
+    # Still invalid => nothing to push
+    server.calls.clear()
+    controller.update([{"id": proxy.id, "name": "Value", "value": 3}])
+    assert domain_pushes(server) == []
+
+    server.calls.clear()
+    controller.update([{"id": proxy.id, "name": "Value", "value": 0.25}])
+    assert domain_pushes(server)[0]["domains"]["Value"]["CountingRange"]["valid"]
+
+    # The client cache is gone
+    server.calls.clear()
+    controller.reset_cache()
+    controller.update([{"id": proxy.id, "name": "Value", "value": 0.75}])
+    assert [push["id"] for push in domain_pushes(server)] == [proxy.id]
+
+
+CHAIN_MODEL = """
+Chain:
+  A:
+    type: string
+  B:
+    type: string
+    domains:
+      - type: CountingCopy
+        source: A
+  C:
+    type: string
+    domains:
+      - type: CountingCopy
+        source: B
+  Other:
+    type: string
+  D:
+    type: string
+    domains:
+      - type: CountingCopy
+        source: Other
+"""
+
+
+class CountingCopy(PropertyDomain):
+    evaluated = []
+
+    def __init__(self, _proxy, _property, **kwargs):
+        super().__init__(_proxy, _property, **kwargs)
+        self._source = kwargs.get("source")
+        self._dependent_properties.add(self._source)
+
+    def set_value(self):
+        CountingCopy.evaluated.append(self._property_name)
+        if self.value != self._proxy[self._source]:
+            self.value = self._proxy[self._source]
+            return True
+        return False
+
+
+register_property_domain("CountingCopy", CountingCopy)
+
+
+def test_apply_pending_domains():
+    pxm = create_manager(CHAIN_MODEL)
+    proxy = pxm.create("Chain")
+    pxm.apply_domains()
+    CountingCopy.evaluated.clear()
+
+    # Only the domains depending on A, then on the B it updated and so on
+    # (a domain also depends on its own property)
+    proxy.A = "a"
+    assert pxm.dirty_proxy_domains == {proxy.id}
+    assert pxm.apply_domains() == ({proxy.id}, {proxy.id})
+    assert (proxy.B, proxy.C, proxy.D) == ("a", "a", None)
+    assert CountingCopy.evaluated == ["B", "B", "C", "C"]
+    assert not pxm.dirty_proxy_domains
+
+    # Unrelated chain
+    CountingCopy.evaluated.clear()
+    proxy.Other = "o"
+    pxm.apply_domains()
+    assert proxy.D == "o"
+    assert CountingCopy.evaluated == ["D", "D"]
+    assert not pxm.dirty_proxy_domains
+
+    # Nothing pending, nothing evaluated
+    CountingCopy.evaluated.clear()
+    assert pxm.apply_domains() == (set(), set())
+    assert CountingCopy.evaluated == []
+
+
+class AssignedProxy(PropertyDomain):
+    """Domain written against the former plain attribute"""
+
+    def __init__(self, _proxy, _property, **kwargs):
+        super().__init__(_proxy, _property, **kwargs)
+        self._proxy = _proxy
+
+
+register_property_domain("AssignedProxy", AssignedProxy)
+
+
+def test_assign_domain_proxy():
+    pxm = create_manager(
+        """
+Item:
+  Value:
+    type: string
+    domains:
+      - type: AssignedProxy
+"""
+    )
+    proxy = pxm.create("Item")
+    domain = proxy.get_property_domains("Value")["AssignedProxy"]
+    assert domain._proxy is proxy
+
+    other = pxm.create("Item")
+    domain._proxy = other
+    assert domain._proxy is other
+    domain._proxy = None
+    assert domain._proxy is None
+
+    # Still a weak reference, the domains don't keep the proxy alive
+    domain._proxy = proxy
+    ref = weakref.ref(proxy)
+    pxm.delete(proxy.id)
+    del proxy
+    assert ref() is None
+    assert domain._proxy is None
@@ -0,0 +1,137 @@
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+  Child:
+    type: proxy
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Child:
+  Value:
+    type: float64
+    initial: 1
+"""
+
+
+def snapshot(pxm, edited=True):
+    return {
+        proxy_id: (
+            proxy.type,
+            proxy.state["own"],
+            proxy.state["properties"],
+            sorted(proxy.edited_property_names) if edited else None,
+        )
+        for proxy_id, proxy in pxm._id_map.items()
+    }
+
+
+def test_undo_redo():
+    pxm = create_manager(MODEL)
+    history = pxm.enable_history()
+    snapshots = [snapshot(pxm)]
+
+    a = pxm.create("Item")
+    snapshots.append(snapshot(pxm))
+    b = pxm.create("Item")
+    snapshots.append(snapshot(pxm))
+    pxm.update(
+        [
+            {"id": a.id, "name": "Opacity", "value": 0.9},
+            {"id": b.id, "name": "Child", "value": a.id},
+        ]
+    )
+    pxm.commit_all()
+    snapshots.append(snapshot(pxm))
+    a.Opacity = 0.1
+    a.commit()
+    snapshots.append(snapshot(pxm))
+    pxm.delete(a.id)
+    snapshots.append(snapshot(pxm))
+    c = pxm.create("Item")
+    snapshots.append(snapshot(pxm))
+    c.Opacity = 0.3
+    c.commit()
+    snapshots.append(snapshot(pxm))
+
+    assert history.state == {"undo": len(snapshots) - 1, "redo": 0}
+
+    for expected in reversed(snapshots[:-1]):
+        history.undo()
+        assert snapshot(pxm) == expected
+    assert history.undo() == []
+
+    # Proxies without pending edits are committed after a redo
+    for expected in snapshots[1:]:
+        history.redo()
+        assert snapshot(pxm, False) == {
+            proxy_id: (*values[:3], None) for proxy_id, values in expected.items()
+        }
+    assert history.state == {"undo": len(snapshots) - 1, "redo": 0}
+
+    # Pending edits get reverted too
+    b = pxm.get(b.id)
+    b.Opacity = 0.77
+    assert history.undo() == [b.id]
+    assert b.Opacity == 0.5
+    assert not b.edited_property_names
+
+    # New changes drop the redo steps
+    b.Opacity = 0.2
+    b.commit()
+    assert history.state == {"undo": len(snapshots), "redo": 0}
+
+
+def test_undo_redo_events():
+    pxm = create_manager(MODEL)
+    history = pxm.enable_history()
+    item = pxm.create("Item")
+    item_ids = sorted([item.id, *(child.id for child in item.Pair)])
+    item.Opacity = 0.3
+    item.commit()
+    pxm.delete(item.id)
+
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, sorted(kwargs["ids"]))))
+
+    # Proxies come back (the Pair children are not owned by the item)
+    history.undo()
+    assert events == [("created", [item.id])]
+
+    events.clear()
+    history.undo()
+    assert events == [("changed", [item.id])]
+
+    events.clear()
+    history.undo()
+    assert events == [("deleted", item_ids)]
+
+    events.clear()
+    history.redo()
+    assert events == [("created", item_ids)]
+
+    events.clear()
+    history.redo()
+    assert events == [("changed", [item.id])]
+    assert pxm.get(item.id).Opacity == 0.3
+
+
+def test_memory_budget():
+    pxm = create_manager(MODEL)
+    history = pxm.enable_history()
+    item = pxm.create("Item")
+    for i in range(100):
+        item.Opacity = i / 100
+        item.commit()
+
+    assert history.state["undo"] == 101
+    history.memory_budget = history.size // 2
+    assert 0 < history.state["undo"] < 101
+    assert history.size <= history.memory_budget
+
+    pxm.disable_history()
+    assert pxm.history is None
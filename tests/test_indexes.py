@@ -0,0 +1,76 @@
+from conftest import create_manager
+
+MODEL = """
+Item:
+  _tags: [item]
+  Opacity:
+    type: float64
+    initial: 0.5
+  Child:
+    type: proxy
+Child:
+  Value:
+    type: float64
+"""
+
+
+def ids(proxies):
+    return sorted(proxy.id for proxy in proxies)
+
+
+def test_type_and_tag_maps():
+    pxm = create_manager(MODEL)
+    items = [pxm.create("Item") for _ in range(3)]
+    child = pxm.create("Child")
+    assert ids(pxm.get_instances_of_type("Item")) == ids(items)
+    assert ids(pxm.get_instances_of_type("Child")) == [child.id]
+    assert ids(pxm.tags("item")) == ids(items)
+    assert pxm.tags("selected") == []
+
+    # Retagging
+    items[0].tags = {"item", "selected"}
+    items[1].tags = ["selected", "visible"]
+    child.tags = {"visible"}
+    assert ids(pxm.tags("item")) == ids([items[0], items[2]])
+    assert ids(pxm.tags("selected")) == ids(items[:2])
+    assert ids(pxm.tags("selected", "visible")) == [items[1].id]
+    assert ids(pxm.tags("visible")) == ids([items[1], child])
+    assert pxm.tags("item", "visible") == []
+
+    # Loading a state only adds tags
+    items[2].state = {
+        "id": items[2].id,
+        "type": "Item",
+        "tags": ["visible"],
+        "properties": {"Opacity": 1},
+    }
+    assert ids(pxm.tags("item", "visible")) == [items[2].id]
+
+    # Deletion
+    pxm.delete(items[1].id)
+    pxm.delete_many([child.id, items[2].id])
+    assert ids(pxm.get_instances_of_type("Item")) == [items[0].id]
+    assert pxm.get_instances_of_type("Child") == []
+    assert ids(pxm.tags("selected")) == [items[0].id]
+    assert pxm.tags("visible") == []
+    assert ids(pxm.tags("item")) == [items[0].id]
+
+
+def test_maps_after_load():
+    src = create_manager(MODEL)
+    item = src.create("Item")
+    item.tags = {"item", "selected"}
+    src.create("Child").tags = {"visible"}
+    state = src.save()
+
+    pxm = create_manager(MODEL)
+    pxm.load(file_content=state)
+    assert len(pxm.get_instances_of_type("Item")) == 1
+    assert len(pxm.get_instances_of_type("Child")) == 1
+    (loaded,) = pxm.tags("item", "selected")
+    assert loaded.type == "Item"
+    assert [proxy.type for proxy in pxm.tags("visible")] == ["Child"]
+
+    pxm.delete(loaded.id)
+    assert pxm.tags("item") == []
+    assert pxm.get_instances_of_type("Item") == []
@@ -0,0 +1,184 @@
+from trame_simput.core.domains import PropertyDomain, register_property_domain
+from trame_simput.core.journal import Journal
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+  Child:
+    type: proxy
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Child:
+  Value:
+    type: float64
+    initial: 1
+"""
+
+
+def snapshot(pxm):
+    return {
+        proxy_id: (proxy.type, proxy.state["own"], proxy.state["properties"])
+        for proxy_id, proxy in pxm._id_map.items()
+    }
+
+
+def edit(pxm, count):
+    items = [pxm.create("Item") for _ in range(count)]
+    pxm.update(
+        [
+            {"id": item.id, "name": "Opacity", "value": i / count}
+            for i, item in enumerate(items)
+        ]
+    )
+    pxm.update([{"id": items[1].id, "name": "Child", "value": items[0].id}])
+    pxm.delete(items[0].id)
+    pxm.delete_many([item.id for item in items[2:4]])
+    return items
+
+
+def test_recover(tmp_path):
+    pxm = create_manager(MODEL)
+    pxm.create("Item")
+    journal = Journal(tmp_path, checkpoint_interval=0)
+    pxm.add_life_cycle_listener(journal)
+    edit(pxm, 10)
+    expected = snapshot(pxm)
+
+    # Crash: the buffered records reached the file but nothing else happened
+    journal.flush()
+
+    restored = create_manager(MODEL)
+    assert Journal(tmp_path).recover(restored) > 0
+    assert snapshot(restored) == expected
+
+    # new proxies don't reuse restored ids
+    assert restored.create("Child").id not in expected
+
+
+def test_checkpoint(tmp_path):
+    pxm = create_manager(MODEL)
+    journal = Journal(tmp_path, checkpoint_interval=7)
+    pxm.add_life_cycle_listener(journal)
+    edit(pxm, 10)
+    edit(pxm, 10)
+    journal.close()
+
+    # Only the latest generation is kept
+    assert len(list(tmp_path.glob("checkpoint-*.simput"))) == 1
+    assert len(list(tmp_path.glob("journal-*.jsonl"))) == 1
+
+    restored = create_manager(MODEL)
+    Journal(tmp_path).recover(restored)
+    assert snapshot(restored) == snapshot(pxm)
+
+
+def pending(pxm):
+    return {
+        proxy_id: sorted(proxy.edited_property_names)
+        for proxy_id, proxy in pxm._id_map.items()
+        if proxy.edited_property_names
+    }
+
+
+def test_recover_commit_reset(tmp_path):
+    pxm = create_manager(MODEL)
+    journal = Journal(tmp_path, checkpoint_interval=0)
+    pxm.add_life_cycle_listener(journal)
+    first, second, third = [pxm.create("Item") for _ in range(3)]
+
+    pxm.update([{"id": first.id, "name": "Opacity", "value": 0.42}])
+    pxm.reset_all()
+    pxm.update([{"id": second.id, "name": "Opacity", "value": 0.1}])
+    second.commit()
+    pxm.update([{"id": second.id, "name": "Opacity", "value": 0.2}])
+    pxm.update([{"id": third.id, "name": "Opacity", "value": 0.3}])
+    journal.flush()
+
+    restored = create_manager(MODEL)
+    Journal(tmp_path).recover(restored)
+    assert snapshot(restored) == snapshot(pxm)
+    assert restored.get(first.id).Opacity == 0.5
+    assert pending(restored) == {second.id: ["Opacity"], third.id: ["Opacity"]}
+
+    # Reset goes back to the committed values
+    restored.reset_all()
+    assert restored.get(second.id).Opacity == 0.1
+    assert restored.get(third.id).Opacity == 0.5
+
+
+def test_checkpoint_pending_edits(tmp_path):
+    pxm = create_manager(MODEL)
+    item = pxm.create("Item")
+    item.Opacity = 0.1
+    item.commit()
+    item.Opacity = 0.2
+
+    # The checkpoint happens with an edit pending
+    journal = Journal(tmp_path, checkpoint_interval=0)
+    pxm.add_life_cycle_listener(journal)
+    journal.close()
+
+    restored = create_manager(MODEL)
+    Journal(tmp_path).recover(restored)
+    assert restored.get(item.id).Opacity == 0.2
+    assert pending(restored) == {item.id: ["Opacity"]}
+    restored.get(item.id).reset()
+    assert restored.get(item.id).Opacity == 0.1
+
+
+DOMAIN_MODEL = """
+Item:
+  Source:
+    type: string
+  Copy:
+    type: string
+    domains:
+      - type: JournalCopy
+"""
+
+
+class JournalCopy(PropertyDomain):
+    """Copy Source into its property"""
+
+    def __init__(self, _proxy, _property, **kwargs):
+        super().__init__(_proxy, _property, **kwargs)
+        self._dependent_properties.add("Source")
+
+    def set_value(self):
+        if self.value != self._proxy["Source"]:
+            self.value = self._proxy["Source"]
+            return True
+        return False
+
+
+register_property_domain("JournalCopy", JournalCopy)
+
+
+def test_recover_domain_values(tmp_path):
+    pxm = create_manager(DOMAIN_MODEL)
+    journal = Journal(tmp_path, checkpoint_interval=0)
+    pxm.add_life_cycle_listener(journal)
+    first, second = [pxm.create("Item") for _ in range(2)]
+
+    pxm.update([{"id": first.id, "name": "Source", "value": "a"}])
+    pxm.apply_domains()
+    first.commit()
+    pxm.update([{"id": second.id, "name": "Source", "value": "b"}])
+    with pxm.transaction():
+        pxm.update([{"id": first.id, "name": "Source", "value": "c"}])
+    assert (first.Copy, second.Copy) == ("c", "b")
+    journal.flush()
+
+    # The domains are not evaluated by the replay
+    restored = create_manager(DOMAIN_MODEL)
+    Journal(tmp_path).recover(restored)
+    assert snapshot(restored) == snapshot(pxm)
+    assert pending(restored) == pending(pxm)
+    restored.get(first.id).reset()
+    assert restored.get(first.id).Copy == "a"
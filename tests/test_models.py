@@ -0,0 +1,221 @@
+from pathlib import Path
+
+import pytest
+
+from trame_simput.core import models
+from trame_simput.core.proxy import ProxyManager
+from trame_simput.core.ui import UIManager, VuetifyResolver
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+MODEL_FILE = EXAMPLES / "01_Widgets" / "definitions" / "model.yaml"
+
+MODEL = """
+_Base:
+  Label:
+    type: string
+    initial: base
+Item:
+  _mixins:
+    - _Base
+  Opacity:
+    type: float64
+    initial: 0.5
+    index: true
+  Child:
+    type: proxy
+    _ui: proxy
+  Hidden:
+    type: int32
+    _ui: skip
+"""
+
+
+def load(cache_dir, yaml_content=MODEL):
+    ui_manager = UIManager(ProxyManager(), VuetifyResolver())
+    ui_manager.load_model(yaml_content=yaml_content, cache_dir=cache_dir)
+    return ui_manager
+
+
+def test_parse_once(monkeypatch):
+    calls = []
+    parse_yaml = models.parse_yaml
+    monkeypatch.setattr(
+        models, "parse_yaml", lambda content: calls.append(1) or parse_yaml(content)
+    )
+
+    ui_manager = UIManager(ProxyManager(), VuetifyResolver())
+    assert ui_manager.load_model(yaml_file=MODEL_FILE)
+    assert len(calls) == 1
+    assert ui_manager.proxymanager.types()
+    assert ui_manager._ui_xml and ui_manager._ui_lang
+
+
+def test_model_cache(tmp_path, monkeypatch):
+    cold = load(tmp_path)
+    assert sorted(p.name.split(".")[1] for p in tmp_path.iterdir()) == [
+        "compiled",
+        "model",
+    ]
+
+    # Warm start does not touch YAML
+    def fail(content):
+        raise AssertionError("YAML should not be parsed")
+
+    monkeypatch.setattr(models, "parse_yaml", fail)
+    warm = load(tmp_path)
+
+    cold_pxm, warm_pxm = cold.proxymanager, warm.proxymanager
+    assert warm_pxm._model_definition == cold_pxm._model_definition
+    assert warm._ui_lang == cold._ui_lang
+    assert warm._ui_xml == cold._ui_xml
+    assert warm_pxm.get_schema("Item").names == ("Opacity", "Child", "Hidden", "Label")
+    assert ("Item", "Opacity") in warm_pxm._indexes
+
+    item = warm_pxm.create("Item", Opacity=0.2)
+    assert item.Label == "base"
+    assert [proxy.id for proxy in warm_pxm.query("Item", where={"Opacity": 0.2})] == [
+        item.id
+    ]
+
+    # Language is not polluted by the mixins
+    assert "Label" not in warm._ui_lang["Item"]
+
+    # An upgrade of the package does not reuse the entries
+    monkeypatch.setattr(models, "PACKAGE_VERSION", "0.0.0")
+    assert models.read_model(yaml_content=MODEL, cache_dir=tmp_path).compiled() is None
+
+
+def test_model_cache_invalid_entry(tmp_path):
+    load(tmp_path)
+    for path in tmp_path.iterdir():
+        path.write_bytes(b"garbage")
+
+    ui_manager = load(tmp_path)
+    assert ui_manager.proxymanager.get_schema("Item").names
+
+
+REGISTRY = {
+    "base.yaml": """
+_Base:
+  _tags:
+    - base
+  Label:
+    type: string
+    initial: base
+""",
+    "items.yaml": """
+Item:
+  _mixins: [_Base]
+  Opacity:
+    type: float64
+    initial: 0.5
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Other:
+  _tags: [other]
+  Value:
+    type: int32
+""",
+    "children.yaml": """
+Child:
+  Value:
+    type: float64
+    initial: 1
+""",
+    "unused.yaml": """
+Unused:
+  Value:
+    type: float64
+""",
+}
+
+
+def test_scan_types():
+    assert models.scan_types(REGISTRY["items.yaml"]) == {
+        "Item": {"_mixins": ["_Base"]},
+        "Other": {"_tags": ["other"]},
+    }
+
+
+def test_register_models(tmp_path):
+    for name, content in REGISTRY.items():
+        (tmp_path / name).write_text(content)
+
+    ui_manager = UIManager(ProxyManager(), VuetifyResolver())
+    pxm = ui_manager.proxymanager
+    assert sorted(ui_manager.register_models(tmp_path)) == [
+        "Child",
+        "Item",
+        "Other",
+        "Unused",
+        "_Base",
+    ]
+    assert not pxm._model_definition
+
+    # Tags are known without loading anything
+    assert sorted(pxm.types("base")) == ["Item", "_Base"]
+    assert pxm.types("other") == ["Other"]
+    assert not pxm._model_definition
+
+    # Creating an item loads its file, its mixins and the sub-proxy types
+    item = pxm.create("Item")
+    assert item.Label == "base"
+    assert len(item.Pair) == 2
+    assert sorted(pxm._model_definition) == ["Child", "Item", "Other", "_Base"]
+    assert sorted(pxm._registry.pending_types()) == ["Unused"]
+
+    # Language and UI of a type
+    assert "Unused" not in ui_manager._ui_lang
+    assert ui_manager.ui("Unused")
+    assert "Unused" in ui_manager._ui_lang
+    assert "Unused" in pxm._model_definition
+    assert ui_manager.ui("Item")
+    assert "Label" not in ui_manager._ui_lang["Item"]
+
+
+def test_shared_models():
+    def session():
+        ui_manager = UIManager(ProxyManager(), VuetifyResolver())
+        ui_manager.load_model(yaml_content=MODEL, shared=True)
+        return ui_manager
+
+    first, second = session(), session()
+    assert len(models.SHARED_MODELS) >= 1
+    pxm1, pxm2 = first.proxymanager, second.proxymanager
+    assert pxm1._model_definition is not pxm2._model_definition
+    assert pxm1.get_definition("Item") is pxm2.get_definition("Item")
+    assert pxm1.get_schema("Item") is pxm2.get_schema("Item")
+    assert first._ui_lang["Item"] is second._ui_lang["Item"]
+    assert first.ui("Item") is second.ui("Item")
+    assert pxm2.create("Item").Label == "base"
+
+    # Shared content is read-only, including for the session which compiled it
+    with pytest.raises(TypeError):
+        pxm1.get_definition("Item")["Opacity"]["initial"] = 1
+    with pytest.raises(TypeError):
+        pxm2.get_definition("Item")["_mixins"].append("Extra")
+    with pytest.raises(TypeError):
+        first._ui_lang["Item"]["Opacity"]["_label"] = "Alpha"
+    assert pxm1.create("Item").Opacity == 0.5
+
+    # Importing a state keeps the shared schemas
+    pxm2.load(file_content=pxm2.save())
+    assert pxm2.get_definition("Item") is pxm1.get_definition("Item")
+    assert pxm2.get_schema("Item") is pxm1.get_schema("Item")
+
+    # Session specific additions stay in that session
+    second.load_model(yaml_content="Extra:\n  Value:\n    type: int32\n")
+    assert pxm2.get_definition("Extra")
+    assert pxm1.get_definition("Extra") is None
+    assert pxm1.get_schema("Item") is pxm2.get_schema("Item")
+
+    xml = '<layouts><ui id="Item"><input name="Opacity"/></ui></layouts>'
+    second.load_ui(xml_content=xml, shared=True)
+    assert second.ui("Item") != first.ui("Item")
+    assert first.ui("Item") is session().ui("Item")
+
+    # Not shared
+    other = load(None)
+    assert other.proxymanager.get_definition("Item") is not pxm1.get_definition("Item")
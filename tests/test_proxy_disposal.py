@@ -0,0 +1,116 @@
+import gc
+import logging
+import tracemalloc
+import weakref
+
+from trame_simput.core.mapping import ProxyObjectAdapter
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Mode:
+    type: string
+    initial: a
+    domains:
+      - type: LabelList
+        values:
+          - text: A
+            value: a
+          - text: B
+            value: b
+  Opacity:
+    type: float64
+    initial: 0.5
+    domains:
+      - type: Range
+        value_range: [0, 1]
+  Child:
+    type: proxy
+Child:
+  Value:
+    type: float64
+    initial: 1
+    domains:
+      - type: Range
+        value_range: [0, 10]
+"""
+
+
+def create_item(pxm):
+    proxy = pxm.create("Item")
+    child = pxm.create("Child")
+    proxy.Child = child
+    proxy.own = child
+    return proxy
+
+
+def churn(pxm, count):
+    for _ in range(count):
+        proxy = create_item(pxm)
+        proxy.commit()
+        pxm.delete(proxy.id)
+
+
+def test_delete_is_deterministic(adapter):
+    pxm = create_manager(MODEL, adapter)
+    proxy = create_item(pxm)
+    ids = [proxy.id, *proxy.own]
+    proxy_ref = weakref.ref(proxy)
+    del proxy
+
+    gc.disable()
+    try:
+        pxm.delete(ids[0])
+        assert sorted(adapter.deleted) == sorted(ids)
+        assert proxy_ref() is None
+    finally:
+        gc.enable()
+
+    # before_delete is only called once
+    gc.collect()
+    assert sorted(adapter.deleted) == sorted(ids)
+
+
+def test_no_memory_retained_after_churn(caplog):
+    # Don't let the captured log records hold memory
+    caplog.set_level(logging.WARNING, logger="simput.core.domains")
+
+    pxm = create_manager(MODEL, ProxyObjectAdapter())
+    churn(pxm, 200)  # warm up caches (schemas, domains, ...)
+
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        churn(pxm, 2000)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    assert not pxm._id_map
+    # Leaking the proxies and their domains would retain several MB,
+    # only allow for allocator noise (< 50 bytes per cycle)
+    assert after - before < 100000
+
+
+def test_delete_many(adapter):
+    pxm = create_manager(MODEL, adapter)
+    items = [create_item(pxm) for _ in range(5)]
+    keep = items.pop()
+    keep.Child = items[0].Child
+    ids = [item.id for item in items]
+    owned_ids = [_id for item in items for _id in item.own]
+
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, kwargs.get("ids"))))
+    pxm.delete_many(ids + ["unknown"])
+
+    assert sorted(adapter.deleted) == sorted(ids + owned_ids)
+    assert list(pxm._id_map) == [keep.id, *keep.own]
+    assert keep.Child is None
+    assert [topic for topic, _ in events] == ["changed", "deleted"]
+    assert events[0][1] == [keep.id]
+    assert sorted(events[1][1]) == sorted(ids + owned_ids)
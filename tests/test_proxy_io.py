@@ -0,0 +1,149 @@
+import pytest
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+  Points:
+    type: float32
+    array: true
+    initial: [1, 2, 3]
+  Child:
+    type: proxy
+  Pair:
+    type: proxy
+    size: 2
+    proxyType: Child
+Child:
+  Value:
+    type: float64
+    initial: 1
+"""
+
+
+def create_items(pxm, count):
+    items = []
+    for i in range(count):
+        item = pxm.create("Item", Opacity=i / count)
+        if items:
+            item.Child = items[-1]
+        item.commit()
+        items.append(item)
+    return items
+
+
+def content(pxm, proxy_id, id_map):
+    proxy = pxm.get(id_map[proxy_id])
+    pair = [child.Value for child in proxy.Pair]
+    child_id = proxy.Child.id if proxy.Child else None
+    return (proxy.Opacity, proxy.Points.tolist(), child_id, pair)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("restore", [False, True])
+def test_save_load(streaming, restore):
+    src = create_manager(MODEL)
+    items = create_items(src, 10)
+    items[-1].Pair[1].Value = 5
+
+    state = src.save(streaming=streaming)
+    if streaming:
+        state = "".join(state)
+
+    progress = []
+    dst = create_manager(MODEL)
+    id_map = dst.load(
+        file_content=state,
+        restore=restore,
+        progress=lambda count, total: progress.append((count, total)),
+    )
+
+    assert progress[-1] == (len(src._id_map), len(src._id_map))
+    for item in items:
+        expected = content(src, item.id, {_id: _id for _id in src._id_map})
+        restored = content(dst, item.id, id_map)
+        child_id = expected[2]
+        assert restored[2] == (child_id and id_map[child_id])
+        assert restored[:2] + restored[3:] == expected[:2] + expected[3:]
+    if restore:
+        assert len(dst._id_map) == len(src._id_map)
+        assert not any(proxy._dirty_properties for proxy in dst._id_map.values())
+
+
+def test_restore_keep_ids():
+    src = create_manager(MODEL)
+    create_items(src, 5)
+    state = src.save()
+
+    dst = create_manager(MODEL)
+    id_map = dst.load(file_content=state, restore=True, keep_ids=True)
+    assert all(old_id == new_id for old_id, new_id in id_map.items())
+    assert set(dst._id_map) == set(src._id_map)
+
+    # Saved ids are not reused by new proxies
+    assert dst.create("Child").id not in src._id_map
+
+    # Loading again can not keep the ids
+    id_map = dst.load(file_content=state, restore=True, keep_ids=True)
+    assert not set(id_map.values()) & set(src._id_map)
+
+
+@pytest.mark.parametrize("memory_map", [False, True])
+def test_snapshot(tmp_path, memory_map):
+    src = create_manager(MODEL)
+    items = create_items(src, 10)
+    items[-1].Pair[1].Value = 5
+    items[-1].Points = list(range(100))
+    items[-1].commit()
+
+    file_path = tmp_path / "state.simput"
+    src.save_snapshot(file_path)
+
+    dst = create_manager(MODEL)
+    id_map = dst.load_snapshot(file_path, memory_map=memory_map)
+    assert len(dst._id_map) == len(src._id_map)
+    for item in items:
+        expected = content(src, item.id, {_id: _id for _id in src._id_map})
+        restored = content(dst, item.id, id_map)
+        child_id = expected[2]
+        assert restored[2] == (child_id and id_map[child_id])
+        assert restored[:2] + restored[3:] == expected[:2] + expected[3:]
+
+
+def test_snapshot_overwrite(tmp_path):
+    src = create_manager(MODEL)
+    items = create_items(src, 3)
+    items[0].Points = list(range(50))
+    items[0].commit()
+    file_path = tmp_path / "state.simput"
+    src.save_snapshot(file_path)
+
+    # Save back to the memory mapped file the proxies were loaded from
+    pxm = create_manager(MODEL)
+    id_map = pxm.load_snapshot(file_path)
+    pxm.save_snapshot(file_path)
+    assert list(tmp_path.iterdir()) == [file_path]
+
+    dst = create_manager(MODEL)
+    dst.load_snapshot(file_path, keep_ids=True)
+    same_ids = {_id: _id for _id in dst._id_map}
+    for item in items:
+        expected = content(src, item.id, {item.id: item.id})
+        assert content(dst, id_map[item.id], same_ids)[:2] == expected[:2]
+
+
+def test_snapshot_truncated(tmp_path):
+    src = create_manager(MODEL)
+    create_items(src, 3)[0].Points = list(range(50))
+    file_path = tmp_path / "state.simput"
+    src.save_snapshot(file_path)
+
+    size = file_path.stat().st_size
+    with open(file_path, "r+b") as file:
+        file.truncate(size - 64)
+
+    with pytest.raises(ValueError, match="Truncated"):
+        create_manager(MODEL).load_snapshot(file_path)
@@ -0,0 +1,209 @@
+import inspect
+
+import pytest
+
+from trame_simput.core import query
+
+from conftest import create_manager
+
+MODEL = """
+Material:
+  Name:
+    type: string
+  Density:
+    type: float64
+    initial: 1
+    index: true
+  Kind:
+    type: string
+    initial: metal
+    index: true
+  Temperature:
+    type: float64
+    initial: 20
+  Inputs:
+    type: proxy
+    size: -1
+    index: true
+Source:
+  Value:
+    type: float64
+"""
+
+
+def names(proxies):
+    return sorted(proxy.Name for proxy in proxies)
+
+
+def create_materials():
+    pxm = create_manager(MODEL)
+    materials = [
+        pxm.create("Material", Name=f"m{i}", Density=i, Temperature=i * 10)
+        for i in range(6)
+    ]
+    materials[1].Kind = "wood"
+    materials[2].Kind = "glass"
+    return pxm, materials
+
+
+def query_plan(pxm, proxy_type=None, tags=None, where=None):
+    conditions = query.parse_where(where)
+    description, _, remaining = query.plan(pxm, proxy_type, tags, conditions)
+    return description, remaining
+
+
+def test_query_conditions():
+    pxm, materials = create_materials()
+    source = pxm.create("Source")
+    materials[3].Inputs = [source]
+    materials[4].Inputs = [source, pxm.create("Source")]
+
+    assert names(pxm.query(type="Material", where={"Density": 2})) == ["m2"]
+    assert names(pxm.query(where={"Name": "m4"})) == ["m4"]
+    assert names(pxm.query(type="Material", where={"Kind": {"!=": "metal"}})) == [
+        "m1",
+        "m2",
+    ]
+
+    # Ranges, indexed or not
+    where = {"Density": {">": 1, "<=": 3}}
+    assert names(pxm.query(type="Material", where=where)) == ["m2", "m3"]
+    where = {"Temperature": {">=": 40}}
+    assert names(pxm.query(type="Material", where=where)) == ["m4", "m5"]
+    where = {"Density": {"<": 2}, "Temperature": {">": 0}}
+    assert names(pxm.query(type="Material", where=where)) == ["m1"]
+
+    # in / contains (proxies can be used in place of their id)
+    where = {"Kind": {"in": ["wood", "glass"]}}
+    assert names(pxm.query(type="Material", where=where)) == ["m1", "m2"]
+    where = {"Inputs": {"contains": source}}
+    assert names(pxm.query(type="Material", where=where)) == ["m3", "m4"]
+    where = {"Inputs": {"contains": source.id}}
+    assert names(pxm.query(where=where)) == ["m3", "m4"]
+
+    # tags
+    materials[0].tags = {"selected"}
+    materials[5].tags = {"selected"}
+    where = {"Density": {">": 2}}
+    assert names(pxm.query(tags=["selected"], where=where)) == ["m5"]
+    assert len(list(pxm.query(type="Source"))) == 2
+
+
+def test_query_plan():
+    pxm, _ = create_materials()
+    pxm.create("Source")
+
+    # Without a type there is nothing but a scan
+    assert query_plan(pxm, where={"Density": 2})[0] == "scan"
+    assert query_plan(pxm, "Source")[0] == "type(Source)"
+
+    # The index is more selective than the type
+    description, remaining = query_plan(pxm, "Material", where={"Density": 2})
+    assert description == "index(Density ==)"
+    assert remaining == []
+
+    # Not indexed => type + filter
+    description, remaining = query_plan(pxm, "Material", where={"Temperature": 20})
+    assert description == "type(Material)"
+    assert remaining == [("Temperature", "==", 20)]
+
+    # Pick the smallest source
+    description, remaining = query_plan(
+        pxm, "Material", where={"Kind": "metal", "Density": {">=": 5}}
+    )
+    assert description == "index(Density >=)"
+    assert remaining == [("Kind", "==", "metal")]
+
+    pxm.get_instances_of_type("Material")[0].tags = {"rare"}
+    assert query_plan(pxm, "Material", ["rare"], {"Kind": "metal"})[0] == "tag(rare)"
+
+    # != can't use an index
+    description, _ = query_plan(pxm, "Material", where={"Kind": {"!=": "metal"}})
+    assert description == "type(Material)"
+
+
+def test_query_index_maintenance():
+    pxm, materials = create_materials()
+    for material in materials:
+        material.commit()
+
+    def densities(where):
+        return names(pxm.query(type="Material", where={"Density": where}))
+
+    # set
+    materials[0].Density = 10
+    assert densities(0) == []
+    assert densities(10) == ["m0"]
+    assert densities({">": 4}) == ["m0", "m5"]
+
+    # reset
+    materials[0].reset()
+    assert densities(10) == []
+    assert densities(0) == ["m0"]
+
+    # update
+    pxm.update([{"id": materials[1].id, "name": "Density", "value": 7}])
+    assert densities({">": 5}) == ["m1"]
+
+    # delete
+    pxm.delete(materials[1].id)
+    pxm.delete_many([materials[2].id, materials[3].id])
+    assert densities({">": 5}) == []
+    assert densities({"in": [1, 2, 3, 4]}) == ["m4"]
+    kinds = names(pxm.query(type="Material", where={"Kind": {"in": ["wood", "glass"]}}))
+    assert kinds == []
+
+
+def test_query_errors():
+    pxm, _ = create_materials()
+
+    # Raised at the call site, not when iterating
+    with pytest.raises(ValueError, match="~"):
+        pxm.query(where={"Density": {"~": 1}})
+
+    # Candidates are only read while iterating
+    result = pxm.query(type="Material", where={"Density": 1})
+    pxm.create("Material", Name="late", Density=1)
+    assert names(result) == ["late", "m1"]
+
+
+def test_query_lazy_sources():
+    pxm, materials = create_materials()
+
+    # Results are produced from the index bucket without copying it
+    result = pxm.query(type="Material", where={"Kind": "metal"})
+    bucket = pxm._indexes[("Material", "Kind")]._buckets["metal"]
+    assert inspect.getgeneratorlocals(result)["ids"] is bucket
+    assert next(result) in materials
+
+    # Collect the result before editing the queried property
+    for proxy in list(pxm.query(type="Material", where={"Kind": "metal"})):
+        proxy.Kind = "wood"
+    assert names(pxm.query(type="Material", where={"Kind": "wood"})) == [
+        f"m{i}" for i in (0, 1, 3, 4, 5)
+    ]
+
+    # Duplicated values of an `in` operand match once
+    result = pxm.query(type="Material", where={"Density": {"in": [1, 1, 2, 1]}})
+    assert names(result) == ["m1", "m2"]
+    result = pxm.query(where={"Name": {"in": ["m3", "m3"]}})
+    assert names(result) == ["m3"]
+
+
+def test_query_index_declared_later():
+    pxm = create_manager(MODEL)
+    sources = [pxm.create("Source", Value=i % 3) for i in range(6)]
+    assert ("Source", "Value") not in pxm._indexes
+
+    pxm.load_model(
+        yaml_content="""
+Source:
+  Value:
+    type: float64
+    index: true
+"""
+    )
+    description, _ = query_plan(pxm, "Source", where={"Value": 1})
+    assert description == "index(Value ==)"
+    result = pxm.query(type="Source", where={"Value": 1})
+    assert sorted(proxy.id for proxy in result) == [sources[1].id, sources[4].id]
@@ -0,0 +1,87 @@
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Input:
+    type: proxy
+  Inputs:
+    type: proxy
+    size: -1
+Source:
+  Value:
+    type: float64
+"""
+
+
+def test_referrers():
+    pxm = create_manager(MODEL)
+    a, b = pxm.create("Source"), pxm.create("Source")
+    item, other = pxm.create("Item"), pxm.create("Item")
+    assert pxm.referrers(a.id) == {}
+
+    # set
+    item.Input = a
+    item.Inputs = [a, b]
+    other.Inputs = [b]
+    assert pxm.referrers(a.id) == {item.id: ["Input", "Inputs"]}
+    assert pxm.referrers(b.id) == {item.id: ["Inputs"], other.id: ["Inputs"]}
+
+    # commit + set
+    item.commit()
+    item.Input = b
+    item.Inputs = [b]
+    assert pxm.referrers(a.id) == {}
+    assert pxm.referrers(b.id) == {
+        item.id: ["Input", "Inputs"],
+        other.id: ["Inputs"],
+    }
+
+    # reset to the committed references
+    item.reset()
+    assert pxm.referrers(a.id) == {item.id: ["Input", "Inputs"]}
+    assert pxm.referrers(b.id) == {item.id: ["Inputs"], other.id: ["Inputs"]}
+
+    # update
+    pxm.update(
+        [
+            {"id": other.id, "name": "Input", "value": a.id},
+            {"id": other.id, "name": "Inputs", "value": []},
+        ]
+    )
+    assert pxm.referrers(a.id) == {
+        item.id: ["Input", "Inputs"],
+        other.id: ["Input"],
+    }
+    assert pxm.referrers(b.id) == {item.id: ["Inputs"]}
+
+    item.Input = None
+    assert pxm.referrers(a.id) == {item.id: ["Inputs"], other.id: ["Input"]}
+
+
+def test_delete_clears_references():
+    pxm = create_manager(MODEL)
+    a, b, c = pxm.create("Source"), pxm.create("Source"), pxm.create("Source")
+    item, other = pxm.create("Item"), pxm.create("Item")
+    item.Input = a
+    item.Inputs = [a, b, c]
+    other.Input = b
+    other.Inputs = [c, b]
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, sorted(kwargs["ids"]))))
+
+    pxm.delete(a.id)
+    assert item.Input is None
+    assert [proxy.id for proxy in item.Inputs] == [b.id, c.id]
+    assert pxm.referrers(a.id) == {}
+    assert ("changed", [item.id]) in events
+
+    pxm.delete_many([b.id, c.id])
+    assert item.Inputs == [] and other.Inputs == []
+    assert other.Input is None
+    assert pxm.referrers(b.id) == {} and pxm.referrers(c.id) == {}
+
+    # Deleting a referrer removes its own references
+    d = pxm.create("Source")
+    item.Input = d
+    pxm.delete(item.id)
+    assert pxm.referrers(d.id) == {}
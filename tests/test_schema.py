@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+
+from trame_simput.core.proxy import ProxyManager
+
+MODEL = """
+_Base:
+  Label:
+    type: string
+Item:
+  _mixins: [_Base]
+  _tags: [item]
+  Opacity:
+    type: float64
+    initial: 0.5
+    index: true
+"""
+
+
+def test_schema_immutable():
+    pxm = ProxyManager()
+    pxm.load_model(yaml_content=MODEL)
+    schema = pxm.get_schema("Item")
+    assert schema.names == ("Opacity", "Label")
+    assert schema.mixins == ("_Base",)
+
+    with pytest.raises(AttributeError):
+        schema.names = ()
+    with pytest.raises(TypeError):
+        schema.index["Other"] = 2
+    with pytest.raises(TypeError):
+        schema.definition["Other"] = {}
+    assert pxm.create("Item").definition["Opacity"]["initial"] == 0.5
+
+    # Compiled schemas get pickled by the model cache
+    restored = pickle.loads(pickle.dumps(schema))
+    assert restored.index == schema.index
+    assert restored.definition == schema.definition
+    with pytest.raises(TypeError):
+        restored.index["Other"] = 2
+
+
+def test_redefine_type_with_live_proxies():
+    pxm = ProxyManager()
+    pxm.load_model(yaml_content=MODEL)
+    item = pxm.create("Item", Label="kept", Opacity=0.25)
+    item.commit()
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, kwargs["ids"])))
+
+    pxm.load_model(
+        yaml_content="""
+Item:
+  _mixins: [_Base]
+  _tags: [other]
+  Opacity:
+    type: float64
+    initial: 0.5
+  Size:
+    type: int32
+    initial: 3
+"""
+    )
+
+    # Values are remapped by name and new properties get their initial value
+    assert item.schema is pxm.get_schema("Item")
+    assert item.list_property_names() == ["Opacity", "Size", "Label"]
+    assert (item.Label, item.Opacity, item.Size) == ("kept", 0.25, 3)
+    assert item.edited_property_names == {"Size"}
+    assert item.set_property("Size", 4)
+    assert item.tags == {"other"}
+    assert events == [("changed", [item.id])]
+
+    # Opacity is no longer indexed
+    assert list(pxm.query("Item", where={"Opacity": 0.25})) == [item]
@@ -0,0 +1,118 @@
+from trame_simput import get_simput_manager
+from trame_simput.core.domains import PropertyDomain, register_property_domain
+from trame_simput.module.core import SimputController
+
+MODEL = """
+Item:
+  Name:
+    type: string
+  Copy:
+    type: string
+    domains:
+      - type: CopyName
+  Opacity:
+    type: float64
+    initial: 0.5
+  Points:
+    type: float64
+    size: -1
+    initial: [1, 2, 3]
+"""
+
+
+class CopyName(PropertyDomain):
+    def __init__(self, _proxy, _property, **kwargs):
+        super().__init__(_proxy, _property, **kwargs)
+        self._dependent_properties.add("Name")
+
+    def set_value(self):
+        if self.value != self._proxy.Name:
+            self.value = self._proxy.Name
+            return True
+        return False
+
+
+register_property_domain("CopyName", CopyName)
+
+
+def merge(state, delta):
+    """Same as the DataManager of the vue components"""
+    return {
+        **state,
+        **delta,
+        "properties": {**state["properties"], **delta["properties"]},
+    }
+
+
+def create_proxy():
+    ui_manager = get_simput_manager()
+    ui_manager.load_model(yaml_content=MODEL)
+    return ui_manager, ui_manager.proxymanager.create("Item")
+
+
+def test_state_delta():
+    _, proxy = create_proxy()
+    state = proxy.state
+    mtime = proxy.property_mtime
+    assert proxy.state_delta(mtime)["properties"] == {}
+
+    # No per property stamps until a change after the creation
+    assert proxy._property_mtimes is None
+    assert merge({"properties": {}}, proxy.state_delta(0)) == state
+
+    proxy.Opacity = 0.75
+    proxy.Opacity = 0.75
+    proxy.Points = [4, 5]
+    delta = proxy.state_delta(mtime)
+    assert delta["properties"] == {"Opacity": 0.75, "Points": [4, 5]}
+    assert "tags" not in delta and "own" not in delta
+    assert merge(state, delta) == proxy.state
+
+    # Only what changed after the latest stamp
+    state = proxy.state
+    mtime = proxy.property_mtime
+    proxy.tags = {"selected"}
+    proxy.Name = "item"
+    delta = proxy.state_delta(mtime)
+    assert delta["properties"] == {"Name": "item"}
+    assert delta["tags"] == ["selected"]
+    assert merge(state, delta) == proxy.state
+
+    # Reverting to the committed values is a change too
+    state = proxy.state
+    mtime = proxy.property_mtime
+    proxy.reset()
+    delta = proxy.state_delta(mtime)
+    assert sorted(delta["properties"]) == ["Name", "Opacity", "Points"]
+    assert merge(state, delta) == proxy.state
+
+
+def test_push_delta(server):
+    ui_manager, proxy = create_proxy()
+    controller = SimputController(server, ui_manager)
+
+    def data_pushes():
+        return [
+            args[0]
+            for name, args in server.calls
+            if name == "simput.message.push" and "domains" not in args[0]
+        ]
+
+    # Nothing sent yet => full state
+    controller.update([{"id": proxy.id, "name": "Name", "value": "a"}])
+    (push,) = data_pushes()
+    assert push["data"] == proxy.state
+    client_state = push["data"]
+
+    server.calls.clear()
+    controller.update([{"id": proxy.id, "name": "Name", "value": "b"}])
+    (push,) = data_pushes()
+    assert push["delta"]["properties"] == {"Name": "b", "Copy": "b"}
+    assert merge(client_state, push["delta"]) == proxy.state
+
+    # After a cache reset the client gets the full state again
+    server.calls.clear()
+    controller.reset_cache()
+    controller.update([{"id": proxy.id, "name": "Name", "value": "c"}])
+    (push,) = data_pushes()
+    assert push["data"] == proxy.state
@@ -0,0 +1,160 @@
+import pytest
+
+from trame_simput.core.domains import PropertyDomain, register_property_domain
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Name:
+    type: string
+  Copy:
+    type: string
+    domains:
+      - type: TransactionCopy
+  Opacity:
+    type: float64
+    initial: 0.5
+"""
+
+
+class TransactionCopy(PropertyDomain):
+    fail = False
+
+    def __init__(self, _proxy, _property, **kwargs):
+        super().__init__(_proxy, _property, **kwargs)
+        self._dependent_properties.add("Name")
+
+    def set_value(self):
+        if TransactionCopy.fail:
+            raise RuntimeError("domain failure")
+        if self.value != self._proxy.Name:
+            self.value = self._proxy.Name
+            return True
+        return False
+
+
+register_property_domain("TransactionCopy", TransactionCopy)
+
+
+def create_items(adapter):
+    pxm = create_manager(MODEL, adapter)
+    items = [pxm.create("Item") for _ in range(3)]
+    for item in items:
+        item.commit()
+
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, sorted(kwargs["ids"]))))
+    adapter.updates.clear()
+    return pxm, items, events
+
+
+def test_transaction_batching(adapter):
+    pxm, items, events = create_items(adapter)
+    proxy_events = []
+    items[0].on(lambda topic, **kwargs: proxy_events.append((topic, kwargs)))
+
+    with pxm.transaction() as tx:
+        for item in items:
+            item.Opacity = 0.25
+            item.Name = "a"
+        pxm.update([{"id": items[0].id, "name": "Opacity", "value": 0.75}])
+        assert adapter.updates == []
+        assert events == []
+        assert proxy_events == []
+
+    # domains evaluated once at the exit
+    assert [item.Copy for item in items] == ["a", "a", "a"]
+    assert tx.data_ids == set(item.id for item in items)
+
+    # a single adapter update and event per proxy / topic
+    assert sorted(adapter.updates) == sorted(
+        (item.id, ["Copy", "Name", "Opacity"]) for item in items
+    )
+    assert events == [("changed", sorted(item.id for item in items))]
+    ((topic, event),) = proxy_events
+    assert topic == "update"
+    assert sorted(event["properties_change"]) == ["Copy", "Name", "Opacity"]
+    assert items[0].Opacity == 0.75
+
+
+def test_nested_transaction(adapter):
+    pxm, items, events = create_items(adapter)
+    with pxm.transaction() as outer:
+        with pxm.transaction() as inner:
+            assert inner is outer
+            items[0].Name = "b"
+        assert items[0].Copy is None
+        assert adapter.updates == []
+        items[1].Name = "c"
+
+    assert (items[0].Copy, items[1].Copy) == ("b", "c")
+    assert sorted(adapter.updates) == sorted(
+        [(items[0].id, ["Copy", "Name"]), (items[1].id, ["Copy", "Name"])]
+    )
+    assert events == [("changed", sorted([items[0].id, items[1].id]))]
+    assert pxm._transaction is None
+
+
+def test_transaction_error(adapter):
+    pxm, items, events = create_items(adapter)
+
+    def in_sync():
+        return all(
+            item.object.get(name) == item.get_property(name)
+            for item in items
+            for name in ("Name", "Copy")
+        )
+
+    # The error of the body wins over the domains which are not evaluated
+    # but the assigned values still reach the objects and listeners
+    TransactionCopy.fail = True
+    try:
+        with pytest.raises(ValueError, match="body failure"):
+            with pxm.transaction():
+                items[0].Name = "d"
+                pxm.update([{"id": items[1].id, "name": "Name", "value": "e"}])
+                raise ValueError("body failure")
+    finally:
+        TransactionCopy.fail = False
+
+    assert pxm._transaction is None
+    assert items[0].Copy is None
+    assert sorted(adapter.updates) == sorted(
+        [(items[0].id, ["Name"]), (items[1].id, ["Name"])]
+    )
+    assert items[0].object["Name"] == "d"
+    assert in_sync()
+    assert events == [("changed", [items[1].id])]
+
+    # The next transaction catches up with the skipped domains
+    adapter.updates.clear()
+    events.clear()
+    with pxm.transaction():
+        pass
+    assert [item.Copy for item in items] == ["d", "e", None]
+    assert in_sync()
+    assert events == [("changed", sorted([items[0].id, items[1].id]))]
+
+    # A failure of the domains is reported too
+    adapter.updates.clear()
+    events.clear()
+    TransactionCopy.fail = True
+    try:
+        with pytest.raises(RuntimeError, match="domain failure"):
+            with pxm.transaction():
+                items[2].Name = "f"
+    finally:
+        TransactionCopy.fail = False
+    assert pxm._transaction is None
+    assert adapter.updates == [(items[2].id, ["Name"])]
+    assert in_sync()
+
+    # The manager keeps working
+    adapter.updates.clear()
+    events.clear()
+    with pxm.transaction():
+        items[2].Name = "g"
+    assert items[2].Copy == "g"
+    assert in_sync()
+    assert events == [("changed", [items[2].id])]
@@ -0,0 +1,88 @@
+import logging
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Name:
+    type: string
+  Opacity:
+    type: float64
+    initial: 0.5
+  Center:
+    type: float64
+    size: 3
+    initial: [0, 0, 0]
+"""
+
+
+def test_update_grouped_per_proxy(adapter):
+    pxm = create_manager(MODEL, adapter)
+    first, second = pxm.create("Item"), pxm.create("Item")
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, sorted(kwargs["ids"]))))
+    updates = []
+    first.on(lambda topic, **kwargs: updates.append(kwargs["properties_change"]))
+    adapter.updates.clear()
+
+    pxm.update(
+        [
+            {"id": first.id, "name": "Name", "value": "a"},
+            {"id": second.id, "name": "Opacity", "value": 0.1},
+            {"id": first.id, "name": "Opacity", "value": 0.2},
+            {"id": first.id, "name": "Center", "value": [1, 2, 3]},
+            {"id": first.id, "name": "Opacity", "value": 0.3},
+        ]
+    )
+
+    # Last value wins, one adapter update and one event per proxy
+    assert (first.Name, first.Opacity, first.Center) == ("a", 0.3, [1, 2, 3])
+    assert second.Opacity == 0.1
+    assert sorted(adapter.updates) == sorted(
+        [
+            (first.id, ["Center", "Name", "Opacity"]),
+            (second.id, ["Opacity"]),
+        ]
+    )
+    assert len(updates) == 1
+    assert sorted(updates[0]) == ["Center", "Name", "Opacity"]
+    assert events == [("changed", sorted([first.id, second.id]))]
+    assert sorted(first.edited_property_names) == ["Center", "Name", "Opacity"]
+
+
+def test_update_unknown_ids(caplog):
+    pxm = create_manager(MODEL)
+    proxy = pxm.create("Item")
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, kwargs["ids"])))
+
+    with caplog.at_level(logging.WARNING, logger="simput.core.proxy"):
+        pxm.update(
+            [
+                {"id": "missing-1", "name": "Name", "value": "a"},
+                {"id": proxy.id, "name": "Name", "value": "b"},
+                {"id": "missing-2", "name": "Name", "value": "c"},
+                {"id": "missing-1", "name": "Opacity", "value": 1},
+            ]
+        )
+
+    # A single warning listing every unknown proxy once
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "2 unknown proxies" in warnings[0].getMessage()
+    assert "missing-1" in warnings[0].getMessage()
+    assert "missing-2" in warnings[0].getMessage()
+    assert proxy.Name == "b"
+    assert events == [("changed", [proxy.id])]
+
+
+def test_update_auto_commit():
+    pxm = create_manager(MODEL)
+    proxy = pxm.create("Item")
+    proxy.tags = {"auto_commit"}
+    events = []
+    pxm.on(lambda topic, **kwargs: events.append((topic, kwargs["ids"])))
+
+    pxm.update([{"id": proxy.id, "name": "Name", "value": "a"}])
+    assert not proxy.edited_property_names
+    assert events == [("commit", [proxy.id]), ("changed", [proxy.id])]
@@ -0,0 +1,65 @@
+from trame_simput.core.arrays import TypedArray
+from trame_simput.core.utils import is_equal
+
+from conftest import create_manager
+
+MODEL = """
+Item:
+  Opacity:
+    type: float64
+    initial: 0.5
+    tolerance: 0.01
+  Center:
+    type: float64
+    size: 3
+    initial: [0, 0, 0]
+    tolerance: 0.01
+"""
+
+
+def test_is_equal():
+    values = [1, 2, 3]
+    assert is_equal(values, values)
+    assert is_equal([1, 2, 3], [1, 2, 3])
+    assert not is_equal([1, 2, 3], [1, 2])
+    assert is_equal(TypedArray(values), [1, 2, 3])
+    assert not is_equal(TypedArray(values), TypedArray([1, 2]))
+    assert not is_equal(0.5, 0.5001)
+    assert is_equal(None, None)
+    assert not is_equal(None, 0)
+
+
+def test_is_equal_tolerance():
+    # Scalars
+    assert is_equal(0.5, 0.505, 0.01)
+    assert is_equal(1, 1.005, 0.01)
+    assert not is_equal(0.5, 0.52, 0.01)
+
+    # Lists and arrays, each item within the tolerance
+    assert is_equal([0, 1, 2], [0.005, 0.995, 2], 0.01)
+    assert is_equal(TypedArray([0, 1]), (0.001, 1.001), 0.01)
+    assert not is_equal([0, 1, 2], [0, 1.5, 2], 0.01)
+    assert not is_equal([0, 1, 2], [0, 1], 0.01)
+
+    # Not numbers: plain comparison
+    assert is_equal("a", "a", 0.01)
+    assert not is_equal("a", "b", 0.01)
+    assert not is_equal(None, 0.5, 0.01)
+    assert not is_equal(["a", 1], ["b", 1], 0.01)
+    assert not is_equal(0.5, "0.5", 0.01)
+
+
+def test_property_tolerance():
+    pxm = create_manager(MODEL)
+    proxy = pxm.create("Item")
+
+    # Within the tolerance the committed value is kept
+    proxy.Opacity = 0.505
+    proxy.Center = [0.001, 0, 0]
+    assert proxy.Opacity == 0.5
+    assert proxy.Center == [0, 0, 0]
+    assert not proxy.edited_property_names
+
+    proxy.Opacity = 0.6
+    proxy.Center = [0, 0.5, 0]
+    assert sorted(proxy.edited_property_names) == ["Center", "Opacity"]
@@ -146,6 +146,9 @@ export default {
       if (!this.model) {
         this.model = [];
       }
+      if (ArrayBuffer.isView(this.model)) {
+        this.model = Array.from(this.model); // typed array can't grow
+      }
       if (this.type == 'proxy') {
         this.getSimput()
           .wsClient.getConnection()
@@ -173,6 +176,9 @@ export default {
       }
     },
     deleteEntry(index) {
+      if (ArrayBuffer.isView(this.model)) {
+        this.model = Array.from(this.model); // typed array can't shrink
+      }
       this.model.splice(index, 1);
       this.dirty(this.name);
     },
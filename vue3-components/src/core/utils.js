@@ -102,6 +102,106 @@ export function debounce(func, wait = 100) {
   return debounced;
 }
 
+const TYPED_ARRAYS = {
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  int64: BigInt64Array,
+  uint64: BigUint64Array,
+  float32: Float32Array,
+  float64: Float64Array,
+};
+
+const DTYPES = new Map(
+  Object.entries(TYPED_ARRAYS).map(([dtype, klass]) => [klass, dtype]),
+);
+
+function isEncodedArray(value) {
+  return (
+    value !== null &&
+    typeof value === "object" &&
+    typeof value.dtype === "string" &&
+    value.buffer !== undefined &&
+    TYPED_ARRAYS[value.dtype] !== undefined
+  );
+}
+
+// {dtype, buffer} => TypedArray (64 bits integers are exposed as Numbers)
+export function decodeArray({ dtype, buffer }) {
+  const klass = TYPED_ARRAYS[dtype];
+  let bytes = buffer;
+  if (bytes instanceof ArrayBuffer) {
+    bytes = new Uint8Array(bytes);
+  }
+  if (bytes.byteOffset % klass.BYTES_PER_ELEMENT !== 0) {
+    bytes = bytes.slice(); // realign
+  }
+  const array = new klass(
+    bytes.buffer,
+    bytes.byteOffset,
+    bytes.byteLength / klass.BYTES_PER_ELEMENT,
+  );
+  if (dtype === "int64" || dtype === "uint64") {
+    return Array.from(array, Number);
+  }
+  return array;
+}
+
+// TypedArray => {dtype, buffer} so it travel as binary
+export function encodeArray(value) {
+  if (!ArrayBuffer.isView(value) || !DTYPES.has(value.constructor)) {
+    return value;
+  }
+  return {
+    dtype: DTYPES.get(value.constructor),
+    buffer: new Uint8Array(value.buffer, value.byteOffset, value.byteLength),
+  };
+}
+
+function decodeProperties(properties) {
+  if (!properties) {
+    return properties;
+  }
+  const keys = Object.keys(properties);
+  for (let i = 0; i < keys.length; i++) {
+    if (isEncodedArray(properties[keys[i]])) {
+      properties[keys[i]] = decodeArray(properties[keys[i]]);
+    }
+  }
+  return properties;
+}
+
+// Deep copy keeping a private copy of the typed arrays
+function copyProperties(properties) {
+  const result = {};
+  const keys = Object.keys(properties);
+  for (let i = 0; i < keys.length; i++) {
+    const value = properties[keys[i]];
+    if (ArrayBuffer.isView(value)) {
+      result[keys[i]] = value.slice();
+    } else if (value !== undefined) {
+      result[keys[i]] = JSON.parse(JSON.stringify(value));
+    }
+  }
+  return result;
+}
+
+// Typed arrays are compared by instance rather than content
+const ARRAY_IDS = new WeakMap();
+let nextArrayId = 1;
+function propertiesReplacer(key, value) {
+  if (ArrayBuffer.isView(value)) {
+    if (!ARRAY_IDS.has(value)) {
+      ARRAY_IDS.set(value, nextArrayId++);
+    }
+    return { typedArray: ARRAY_IDS.get(value) };
+  }
+  return value;
+}
+
 export class DataManager {
   constructor(namespace, wsClient) {
     this.namespace = namespace;
@@ -120,21 +220,38 @@ export class DataManager {
       .getConnection()
       .getSession()
       .subscribe("simput.push", ([event]) => {
-        const { id, data, domains, type, ui } = event;
+        const { id, domains, type, ui, delta } = event;
+        let { data } = event;
         let idChange = false;
         let uiChange = false;
+        decodeProperties(data?.properties);
+        decodeProperties(delta?.properties);
+        if (delta) {
+          // Merge partial state into the last known server state
+          const current = this.cache.data[id];
+          if (current) {
+            data = {
+              ...current,
+              ...delta,
+              properties: { ...current.original, ...delta.properties },
+            };
+          } else {
+            this.getData(id, true);
+          }
+        }
         if (data) {
           delete this.pendingData[id];
           delete this.pendingDirtyData[id];
-          const before = JSON.stringify(this.expectedServerProps[id]);
-          const after = JSON.stringify(data.properties);
+          const before = JSON.stringify(
+            this.expectedServerProps[id],
+            propertiesReplacer,
+          );
+          const after = JSON.stringify(data.properties, propertiesReplacer);
           if (before !== after) {
             idChange = true;
             this.cache.data[id] = data;
             if (before == undefined) {
-              this.expectedServerProps[id] = JSON.parse(
-                JSON.stringify(data.properties),
-              ); // deep copy
+              this.expectedServerProps[id] = copyProperties(data.properties);
             }
             //   console.log(`data(${id}) == CHANGE`);
             //   // console.group('before');
@@ -147,7 +264,7 @@ export class DataManager {
             //   console.log(`data(${id}) == SAME`);
           }
           this.cache.data[id].mtime = data.mtime;
-          this.cache.data[id].original = JSON.parse(after);
+          this.cache.data[id].original = copyProperties(data.properties);
         }
         if (domains) {
           delete this.pendingDomain[id];
@@ -251,9 +368,13 @@ export class DataManager {
       this.pendingDirtyData[id] = true;
     });
     // console.log('sending: ', dirtySet);
-    await this.wsClient
-      .getRemote()
-      .Trame.trigger(`${this.namespace}Update`, [dirtySet]);
+    await this.wsClient.getRemote().Trame.trigger(`${this.namespace}Update`, [
+      dirtySet.map(({ id, name, value }) => ({
+        id,
+        name,
+        value: encodeArray(value),
+      })),
+    ]);
 
     this.flushDirtySet();
   }
@@ -199,6 +199,9 @@ export default {
       if (!model.value) {
         model.value = [];
       }
+      if (ArrayBuffer.isView(model.value)) {
+        model.value = Array.from(model.value); // typed array can't grow
+      }
 
       if (props.type == "proxy") {
         getSimput()
@@ -228,6 +231,9 @@ export default {
     };
 
     const deleteEntry = function deletEntry(index) {
+      if (ArrayBuffer.isView(model.value)) {
+        model.value = Array.from(model.value); // typed array can't shrink
+      }
       model.value.splice(index, 1);
       dirty(props.name);
     };